@@ -0,0 +1,158 @@
+# SPDX-FileCopyrightText: 2024 Ferenc Nandor Janky <ferenj@effective-range.com>
+# SPDX-FileCopyrightText: 2024 Attila Gombos <attila.gombos@effective-range.com>
+# SPDX-License-Identifier: MIT
+
+import time
+from dataclasses import dataclass
+from typing import Optional, Any
+
+from package_downloader import IDebDownloader, PackageConfig
+
+from package_installer import IDebProvider, IDpkgStatusReader, IDpkgRunner, DebMetadata
+
+
+@dataclass
+class Latency:
+    commit: float = 0.005
+    open: float = 0.002
+    update: float = 0.010
+    download: float = 0.002
+    dpkg: float = 0.003
+
+
+class FakeVersion(object):
+
+    def __init__(self, version: str) -> None:
+        self.version = version
+
+
+class FakePackage(object):
+
+    def __init__(self, cache: 'FakeCache', name: str, versions: list[str]) -> None:
+        self._cache = cache
+        self.name = name
+        self.versions = {version: FakeVersion(version) for version in versions}
+        self.candidate: Optional[FakeVersion] = self.versions[versions[-1]] if versions else None
+        self.marked_install = False
+
+    @property
+    def is_installed(self) -> bool:
+        return self.name in self._cache.installed
+
+    @property
+    def installed(self) -> Optional[FakeVersion]:
+        version = self._cache.installed.get(self.name)
+        return FakeVersion(version) if version else None
+
+    def mark_install(self, auto_fix: bool = True) -> None:
+        self.marked_install = True
+
+    def mark_delete(self, auto_fix: bool = True) -> None:
+        self._cache.removals.add(self.name)
+
+
+class FakeCache(object):
+    """In-memory stand-in for apt.Cache that simulates latency and counts expensive calls."""
+
+    def __init__(self, available: dict[str, list[str]], latency: Latency) -> None:
+        self.latency = latency
+        self.installed: dict[str, str] = {}
+        self.removals: set[str] = set()
+        self.commit_count = 0
+        self.dpkg_count = 0
+        self.open_count = 0
+        self.update_count = 0
+        self._available = available
+        self._packages: dict[str, FakePackage] = {}
+        self.open()
+
+    def get(self, name: str, default: Optional[FakePackage] = None) -> Optional[FakePackage]:
+        if name not in self._packages:
+            if name not in self._available and name not in self.installed:
+                return default
+            self._packages[name] = FakePackage(self, name, self._available.get(name, []))
+        return self._packages[name]
+
+    def get_providing_packages(self, pkgname: str, candidate_only: bool = True,
+                               include_nonvirtual: bool = False) -> list[FakePackage]:
+        return []
+
+    def open(self, progress: Any = None) -> None:
+        self.open_count += 1
+        time.sleep(self.latency.open)
+        self._packages = {}
+        self.removals = set()
+
+    def update(self, fetch_progress: Any = None, pulse_interval: int = 0, raise_on_error: bool = True) -> None:
+        self.update_count += 1
+        time.sleep(self.latency.update)
+
+    def commit(self, fetch_progress: Any = None, install_progress: Any = None) -> bool:
+        self.commit_count += 1
+        time.sleep(self.latency.commit)
+        for package in self._packages.values():
+            if package.marked_install and package.candidate:
+                self.installed[package.name] = package.candidate.version
+                package.marked_install = False
+        for name in self.removals:
+            self.installed.pop(name, None)
+        self.removals = set()
+        return True
+
+    def clear(self) -> None:
+        for package in self._packages.values():
+            package.marked_install = False
+        self.removals = set()
+
+
+class FakeDpkgRunner(IDpkgRunner):
+
+    def __init__(self, cache: FakeCache) -> None:
+        self._cache = cache
+
+    def install(self, package_files: list[str]) -> None:
+        self._cache.dpkg_count += 1
+        time.sleep(self._cache.latency.dpkg)
+        for package_file in package_files:
+            self._cache.installed[package_file.rsplit('/', 1)[-1][:-len('.deb')]] = '1.0.0'
+
+    def remove(self, package_names: list[str]) -> None:
+        self._cache.dpkg_count += 1
+        time.sleep(self._cache.latency.dpkg)
+        for package_name in package_names:
+            self._cache.installed.pop(package_name, None)
+
+    def configure_pending(self) -> None:
+        self._cache.dpkg_count += 1
+        time.sleep(self._cache.latency.dpkg)
+
+
+class FakeDebDownloader(IDebDownloader):
+
+    def __init__(self, latency: Latency) -> None:
+        self._latency = latency
+        self.download_count = 0
+
+    def download(self, package_config: PackageConfig) -> Optional[str]:
+        self.download_count += 1
+        time.sleep(self._latency.download)
+        return f'/tmp/packages/{package_config.package}.deb'
+
+
+class FakeDebProvider(IDebProvider):
+
+    def get_deb_package(self, package_file: str) -> Optional[DebMetadata]:
+        name = package_file.rsplit('/', 1)[-1][:-len('.deb')]
+        return DebMetadata(package_file, name, '1.0.0')
+
+
+class FakeDpkgStatusReader(IDpkgStatusReader):
+
+    def __init__(self, cache: FakeCache) -> None:
+        self._cache = cache
+
+    def get_installed_versions(self) -> dict[str, str]:
+        return dict(self._cache.installed)
+
+    def is_interrupted(self) -> bool:
+        return False
@@ -0,0 +1,114 @@
+# SPDX-FileCopyrightText: 2024 Ferenc Nandor Janky <ferenj@effective-range.com>
+# SPDX-FileCopyrightText: 2024 Attila Gombos <attila.gombos@effective-range.com>
+# SPDX-License-Identifier: MIT
+
+import json
+import time
+from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter, Namespace
+from typing import Any
+
+from common_utility.jsonLoader import IJsonLoader
+from context_logger import setup_logging
+from package_downloader import PackageConfig
+
+from benchmarks.fakeApt import (
+    FakeCache,
+    FakeDebDownloader,
+    FakeDebProvider,
+    FakeDpkgStatusReader,
+    FakeDpkgRunner,
+    Latency,
+)
+from package_installer import PackageInstaller, AptInstaller, DebInstaller, CacheRefresher
+
+
+class ConfigLoader(IJsonLoader):
+
+    def __init__(self, config_list: list[PackageConfig]) -> None:
+        self._config_list = config_list
+
+    def load_list(self, path: str, item_class: Any) -> list[Any]:
+        return list(self._config_list)
+
+
+def main() -> None:
+    arguments = _get_arguments()
+
+    setup_logging('debian-package-installer-benchmark', arguments.log_level, warn_on_overwrite=False)
+
+    latency = Latency(arguments.commit_latency, arguments.open_latency, arguments.update_latency,
+                      arguments.download_latency, arguments.dpkg_latency)
+    results = []
+
+    for package_count in arguments.packages:
+        for batch_install in (False, True):
+            results.append(run_benchmark(package_count, arguments.deb_ratio, batch_install, latency))
+
+    if arguments.json:
+        print(json.dumps(results, indent=2))
+    else:
+        _print_table(results)
+
+
+def run_benchmark(package_count: int, deb_ratio: float, batch_install: bool, latency: Latency) -> dict[str, Any]:
+    deb_count = int(package_count * deb_ratio)
+    config_list = [PackageConfig(package=f'package{index}') for index in range(package_count)]
+    available = {config.package: ['1.0.0'] for config in config_list[deb_count:]}
+
+    apt_cache: Any = FakeCache(available, latency)
+    deb_downloader = FakeDebDownloader(latency)
+    cache_refresher = CacheRefresher(apt_cache, FakeDpkgStatusReader(apt_cache))
+    apt_installer = AptInstaller(apt_cache, cache_refresher=cache_refresher)
+    deb_installer = DebInstaller(
+        apt_cache, deb_downloader, FakeDebProvider(), cache_refresher=cache_refresher,
+        dpkg_runner=FakeDpkgRunner(apt_cache)
+    )
+    package_installer = PackageInstaller(
+        'package-config.json', ConfigLoader(config_list), apt_cache, apt_installer, deb_installer,
+        batch_install=batch_install, cache_refresher=cache_refresher
+    )
+
+    apt_cache.open_count = 0
+    start = time.perf_counter()
+    results = package_installer.install_packages()
+    wall_time = time.perf_counter() - start
+
+    return {
+        'packages': package_count,
+        'mode': 'batch' if batch_install else 'single',
+        'wall_time': round(wall_time, 4),
+        'installed': sum(results.values()),
+        'commit': apt_cache.commit_count,
+        'open': apt_cache.open_count,
+        'update': apt_cache.update_count,
+        'download': deb_downloader.download_count,
+        'dpkg': apt_cache.dpkg_count,
+    }
+
+
+def _print_table(results: list[dict[str, Any]]) -> None:
+    columns = list(results[0])
+    print(''.join(f'{column:>12}' for column in columns))
+    for result in results:
+        print(''.join(f'{result[column]:>12}' for column in columns))
+
+
+def _get_arguments() -> Namespace:
+    parser = ArgumentParser(formatter_class=ArgumentDefaultsHelpFormatter)
+    parser.add_argument('-p', '--packages', help='package counts to benchmark', type=int, nargs='+',
+                        default=[10, 100, 1000])
+    parser.add_argument('-r', '--deb-ratio', help='ratio of packages installed from .deb files', type=float,
+                        default=0.1)
+    parser.add_argument('--commit-latency', help='simulated cache commit latency (s)', type=float, default=0.005)
+    parser.add_argument('--open-latency', help='simulated cache open latency (s)', type=float, default=0.002)
+    parser.add_argument('--update-latency', help='simulated cache update latency (s)', type=float, default=0.010)
+    parser.add_argument('--download-latency', help='simulated download latency (s)', type=float, default=0.002)
+    parser.add_argument('--dpkg-latency', help='simulated dpkg latency (s)', type=float, default=0.003)
+    parser.add_argument('-l', '--log-level', help='logging level', default='critical')
+    parser.add_argument('--json', help='print results as JSON', action='store_true', default=False)
+
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    main()
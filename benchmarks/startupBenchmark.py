@@ -0,0 +1,91 @@
+# SPDX-FileCopyrightText: 2024 Ferenc Nandor Janky <ferenj@effective-range.com>
+# SPDX-FileCopyrightText: 2024 Attila Gombos <attila.gombos@effective-range.com>
+# SPDX-License-Identifier: MIT
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter, Namespace
+from tempfile import TemporaryDirectory
+from typing import Any
+
+from package_installer import DpkgStatusReader
+
+INSTALLER_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'bin', 'debian-package-installer.py')
+
+
+def main() -> None:
+    arguments = _get_arguments()
+
+    with TemporaryDirectory() as temp_dir:
+        config_file = _create_package_config(temp_dir, arguments.packages)
+        commands = {
+            'python': [sys.executable, '-c', 'pass'],
+            'import': [sys.executable, '-c', 'import package_installer'],
+            'check': [sys.executable, INSTALLER_SCRIPT, '--check', '--log-level', 'critical', config_file],
+        }
+        results = [run_benchmark(name, command, arguments.runs) for name, command in commands.items()]
+
+    if arguments.json:
+        print(json.dumps(results, indent=2))
+    else:
+        _print_table(results)
+
+    check_time = results[-1]['median_ms']
+    if check_time > arguments.max_ms:
+        print(f'Check startup time {check_time} ms exceeds the {arguments.max_ms} ms limit', file=sys.stderr)
+        sys.exit(1)
+
+
+def run_benchmark(name: str, command: list[str], runs: int) -> dict[str, Any]:
+    durations = []
+
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        durations.append((time.perf_counter() - start) * 1000)
+
+    return {
+        'command': name,
+        'runs': runs,
+        'min_ms': round(min(durations), 1),
+        'median_ms': round(statistics.median(durations), 1),
+        'max_ms': round(max(durations), 1),
+    }
+
+
+def _create_package_config(temp_dir: str, package_count: int) -> str:
+    installed = DpkgStatusReader().get_installed_versions()
+    config_list = [{'package': package, 'version': version} for package, version in installed.items()]
+    config_file = os.path.join(temp_dir, 'package-config.json')
+
+    with open(config_file, 'w') as file:
+        json.dump(config_list[:package_count], file)
+
+    return config_file
+
+
+def _print_table(results: list[dict[str, Any]]) -> None:
+    columns = list(results[0])
+    print(''.join(f'{column:>12}' for column in columns))
+    for result in results:
+        print(''.join(f'{result[column]:>12}' for column in columns))
+
+
+def _get_arguments() -> Namespace:
+    parser = ArgumentParser(formatter_class=ArgumentDefaultsHelpFormatter)
+    parser.add_argument('-n', '--runs', help='number of runs per command', type=int, default=20)
+    parser.add_argument('-p', '--packages', help='number of installed packages to check', type=int, default=50)
+    parser.add_argument('--max-ms', help='fail if the median check time exceeds this limit (ms)', type=float,
+                        default=100)
+    parser.add_argument('--json', help='print results as JSON', action='store_true', default=False)
+
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    main()
@@ -4,20 +4,42 @@
 # SPDX-FileCopyrightText: 2024 Attila Gombos <attila.gombos@effective-range.com>
 # SPDX-License-Identifier: MIT
 
+import json
 import os
+import shlex
+import sys
+from functools import partial
+from typing import Optional, TYPE_CHECKING
 from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter, Namespace
 
-from apt.cache import Cache
-from aptsources.sourceslist import SourcesList
-from common_utility import SessionProvider, FileDownloader
-from common_utility.jsonLoader import JsonLoader
 from context_logger import get_logger, setup_logging
-from package_downloader import DebDownloader, AssetDownloader, RepositoryProvider
 
-from package_installer import PackageInstaller, DebInstaller, AptInstaller, DebProvider, SourceAdder, KeyAdder
+from package_installer import InstallMetrics, DpkgStatusReader
+
+if TYPE_CHECKING:
+    from apt import Cache
+    from common_utility import FileDownloader
+    from package_downloader import IDebDownloader
+    from package_installer import (
+        InstallPlan,
+        InstallPlanner,
+        DebStreamDownloader,
+        ResolutionCache,
+        CacheRefresher,
+        AptInstaller,
+        DebInstaller,
+        RetryPolicy,
+    )
 
 log = get_logger('PackageInstallerApp')
 
+# Arguments changing how packages are installed, queued invocations are merged only if these are the same
+INSTALL_OPTIONS = (
+    'download', 'download_workers', 'stream', 'async_download', 'host_connections', 'download_retries', 'deb_cache',
+    'deb_cache_size', 'verify_deb_cache', 'resolution_cache', 'source_timeout', 'fetch_workers', 'snapshot',
+    'update_max_age', 'commit_retries', 'commit_backoff', 'batch',
+)
+
 
 def main() -> None:
     arguments = _get_arguments()
@@ -26,34 +48,294 @@ def main() -> None:
 
     log.info('Starting package installer', arguments=vars(arguments))
 
+    metrics = InstallMetrics()
+
+    status_reader = DpkgStatusReader()
+
+    if arguments.install_bundle:
+        _install_bundle(arguments, metrics, status_reader)
+        return
+
+    package_config_path = _get_config_file(arguments, arguments.package_config)
+
+    if arguments.check:
+        sys.exit(1 if status_reader.get_missing(_load_requirements(package_config_path)) else 0)
+
+    if not arguments.force and not arguments.fleet and not arguments.export_bundle:
+        requirements = _load_requirements(package_config_path)
+        if not status_reader.get_missing(requirements):
+            log.info('All packages are already installed')
+            if arguments.plan:
+                from package_installer import InstallPlan
+                _print_plan(InstallPlan())
+            _write_results(arguments, {package: True for package in requirements})
+            _write_metrics(arguments, metrics)
+            return
+
+    source_config_path = _get_config_file(arguments, arguments.source_config) if arguments.source_config else None
+
+    if arguments.plan or arguments.export_bundle or arguments.fleet:
+        _run_planner(arguments, metrics, status_reader, package_config_path, source_config_path)
+        return
+
+    if arguments.queue:
+        from package_installer import InstallQueue
+
+        install_queue = InstallQueue(arguments.queue, arguments.queue_window)
+        install = partial(_install, arguments, metrics, status_reader)
+        options = {option: getattr(arguments, option) for option in INSTALL_OPTIONS}
+        results = install_queue.submit(package_config_path, source_config_path, install, options)
+    else:
+        results = _install(arguments, metrics, status_reader, package_config_path, source_config_path)
+
+    _write_results(arguments, results)
+    _write_metrics(arguments, metrics)
+
+
+def _install(
+    arguments: Namespace,
+    metrics: InstallMetrics,
+    status_reader: DpkgStatusReader,
+    package_config_path: str,
+    source_config_path: Optional[str],
+) -> dict[str, bool]:
+    from aptsources.sourceslist import SourcesList
+    from common_utility.jsonLoader import JsonLoader
+
+    from package_installer import (
+        PackageInstaller,
+        SourceAdder,
+        KeyAdder,
+        UpdatePolicy,
+        ConfigSnapshot,
+        ListUpdater,
+        RetryPolicy,
+        DpkgRunner,
+    )
+
     json_loader = JsonLoader()
-    session_provider = SessionProvider()
-    file_downloader = FileDownloader(session_provider, os.path.abspath(arguments.download))
+    file_downloader = _create_file_downloader(arguments)
 
-    if arguments.source_config:
-        source_config_path = file_downloader.download(arguments.source_config, skip_if_exists=False)
+    if source_config_path:
         sources_list = SourcesList()
         key_adder = KeyAdder()
-        source_adder = SourceAdder(source_config_path, json_loader, sources_list, key_adder, file_downloader)
+        source_adder = SourceAdder(
+            source_config_path, json_loader, sources_list, key_adder, file_downloader, arguments.download_workers
+        )
     else:
         source_adder = None
 
+    retry_policy = RetryPolicy(
+        DpkgRunner(), status_reader, arguments.commit_retries, arguments.commit_backoff, metrics=metrics
+    )
+
+    apt_cache, cache_refresher, apt_installer, deb_installer, resolution_cache = _create_installers(
+        arguments, metrics, status_reader, file_downloader, retry_policy
+    )
+
+    update_policy = UpdatePolicy(apt_installer, arguments.update_max_age)
+    list_updater = ListUpdater(apt_cache, metrics, arguments.source_timeout, arguments.fetch_workers)
+    config_snapshot = None
+
+    if arguments.snapshot:
+        config_snapshot = ConfigSnapshot(arguments.snapshot, source_config_path, status_reader)
+
+    package_installer = PackageInstaller(
+        package_config_path,
+        json_loader,
+        apt_cache,
+        apt_installer,
+        deb_installer,
+        source_adder,
+        batch_install=arguments.batch,
+        update_policy=update_policy,
+        metrics=metrics,
+        cache_refresher=cache_refresher,
+        resolution_cache=resolution_cache,
+        config_snapshot=config_snapshot,
+        list_updater=list_updater,
+        retry_policy=retry_policy,
+    )
+
+    return package_installer.install_packages()
+
+
+def _run_planner(
+    arguments: Namespace,
+    metrics: InstallMetrics,
+    status_reader: DpkgStatusReader,
+    package_config_path: str,
+    source_config_path: Optional[str],
+) -> None:
+    from common_utility.jsonLoader import JsonLoader
+    from package_downloader import PackageConfig
+
+    from package_installer import InstallPlanner, BundleExporter
+
+    json_loader = JsonLoader()
+    file_downloader = _create_file_downloader(arguments)
+
+    apt_cache, _, apt_installer, deb_installer, _ = _create_installers(
+        arguments, metrics, status_reader, file_downloader
+    )
+    planner = InstallPlanner(apt_cache, apt_installer, deb_installer)
+
+    if arguments.plan:
+        _print_plan(planner.plan(json_loader.load_list(package_config_path, PackageConfig)))
+    elif arguments.export_bundle:
+        bundle_exporter = BundleExporter(apt_cache, planner)
+        config_list = json_loader.load_list(package_config_path, PackageConfig)
+        _print_plan(bundle_exporter.export(config_list, os.path.abspath(arguments.export_bundle)))
+    else:
+        _install_fleet(arguments, planner, package_config_path, source_config_path)
+
+    _write_metrics(arguments, metrics)
+
+
+def _create_installers(
+    arguments: Namespace,
+    metrics: InstallMetrics,
+    status_reader: DpkgStatusReader,
+    file_downloader: 'FileDownloader',
+    retry_policy: Optional['RetryPolicy'] = None,
+) -> tuple['Cache', 'CacheRefresher', 'AptInstaller', 'DebInstaller', Optional['ResolutionCache']]:
+    from package_installer import (
+        DebInstaller,
+        AptInstaller,
+        DebProvider,
+        DebCache,
+        MeteredCache,
+        CacheRefresher,
+        ResolutionCache,
+    )
+
+    resolution_cache = ResolutionCache(arguments.resolution_cache) if arguments.resolution_cache else None
+    deb_downloader, stream_downloader = _create_deb_downloader(arguments, file_downloader, resolution_cache)
+
+    apt_cache = MeteredCache(metrics)
+    cache_refresher = CacheRefresher(apt_cache, status_reader)
+    apt_installer = AptInstaller(apt_cache, metrics, cache_refresher, retry_policy)
+    deb_provider = DebProvider(stream_downloader)
+    deb_cache = DebCache(arguments.deb_cache, arguments.deb_cache_size * 1024 * 1024) if arguments.deb_cache else None
+    if deb_cache and arguments.verify_deb_cache:
+        deb_cache.verify()
+    deb_installer = DebInstaller(
+        apt_cache, deb_downloader, deb_provider, arguments.download_workers, deb_cache, metrics, cache_refresher,
+        retry_policy=retry_policy,
+    )
+
+    return apt_cache, cache_refresher, apt_installer, deb_installer, resolution_cache
+
+
+def _install_bundle(arguments: Namespace, metrics: InstallMetrics, status_reader: DpkgStatusReader) -> None:
+    from package_installer import BundleInstaller
+
+    bundle_installer = BundleInstaller(status_reader)
+    _write_results(arguments, bundle_installer.install(arguments.install_bundle))
+    _write_metrics(arguments, metrics)
+
+
+def _install_fleet(
+    arguments: Namespace, planner: 'InstallPlanner', package_config_path: str, source_config_path: Optional[str]
+) -> None:
+    from dataclasses import asdict
+
+    from common_utility.jsonLoader import JsonLoader
+
+    from package_installer import FleetInstaller, SshTransport
+
+    fleet_installer = FleetInstaller(
+        JsonLoader(),
+        planner,
+        SshTransport(),
+        arguments.fleet.split(','),
+        os.path.abspath(arguments.download),
+        arguments.fleet_workers,
+        shlex.split(arguments.fleet_command),
+    )
+    host_results = fleet_installer.install(package_config_path, source_config_path)
+    print(json.dumps({host: asdict(result) for host, result in host_results.items()}, indent=2))
+
+
+def _get_config_file(arguments: Namespace, location: str) -> str:
+    if os.path.isfile(location):
+        return os.path.abspath(location)
+
+    file_downloader = _create_file_downloader(arguments)
+    config_path: str = file_downloader.download(location, skip_if_exists=False)
+
+    return config_path
+
+
+def _load_requirements(package_config_path: str) -> dict[str, Optional[str]]:
+    with open(package_config_path) as file:
+        entries = json.load(file)
+
+    if all(isinstance(entry, dict) and 'package' in entry for entry in entries):
+        return {entry['package']: entry.get('version') for entry in entries}
+
+    from common_utility.jsonLoader import JsonLoader
+    from package_downloader import PackageConfig
+
+    config_list = JsonLoader().load_list(package_config_path, PackageConfig)
+
+    return {config.package: config.version for config in config_list}
+
+
+def _create_file_downloader(arguments: Namespace) -> 'FileDownloader':
+    from common_utility import SessionProvider, FileDownloader
+
+    return FileDownloader(SessionProvider(), os.path.abspath(arguments.download))
+
+
+def _create_deb_downloader(
+    arguments: Namespace, file_downloader: 'FileDownloader', resolution_cache: Optional['ResolutionCache']
+) -> tuple['IDebDownloader', Optional['DebStreamDownloader']]:
+    from package_downloader import DebDownloader, AssetDownloader, RepositoryProvider
+    from requests import Session
+
+    from package_installer import AssetResolver, DebStreamDownloader, AsyncDebDownloader
+
     repository_provider = RepositoryProvider()
     asset_downloader = AssetDownloader(file_downloader)
     deb_downloader = DebDownloader(repository_provider, asset_downloader, file_downloader)
 
-    apt_cache = Cache()
-    apt_installer = AptInstaller(apt_cache)
-    deb_provider = DebProvider(apt_cache)
-    deb_installer = DebInstaller(apt_cache, deb_downloader, deb_provider)
+    if not arguments.stream and not arguments.async_download:
+        return deb_downloader, None
 
-    package_config_path = file_downloader.download(arguments.package_config, skip_if_exists=False)
+    session = Session()
+    asset_resolver = AssetResolver(session, resolution_cache=resolution_cache)
 
-    package_installer = PackageInstaller(
-        package_config_path, json_loader, apt_cache, apt_installer, deb_installer, source_adder
-    )
+    download_dir = os.path.abspath(arguments.download)
+
+    if arguments.async_download:
+        stream_downloader: 'DebStreamDownloader' = AsyncDebDownloader(
+            asset_resolver,
+            session,
+            download_dir,
+            deb_downloader,
+            arguments.host_connections,
+            arguments.download_retries,
+        )
+    else:
+        stream_downloader = DebStreamDownloader(asset_resolver, session, download_dir, deb_downloader)
+
+    return stream_downloader, stream_downloader
+
+
+def _print_plan(plan: 'InstallPlan') -> None:
+    print(json.dumps(plan.to_dict(), indent=2))
 
-    package_installer.install_packages()
+
+def _write_results(arguments: Namespace, results: dict[str, bool]) -> None:
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+
+def _write_metrics(arguments: Namespace, metrics: InstallMetrics) -> None:
+    if arguments.metrics:
+        metrics.write_report(arguments.metrics, arguments.metrics_format)
 
 
 def _get_arguments() -> Namespace:
@@ -62,10 +344,59 @@ def _get_arguments() -> Namespace:
     parser.add_argument('-l', '--log-level', help='logging level', default='info')
     parser.add_argument('-s', '--source-config', help='source config JSON file or URL')
     parser.add_argument('-d', '--download', help='package download location', default='/tmp/packages')
+    parser.add_argument('-w', '--download-workers', help='number of parallel key and package file downloads',
+                        type=int, default=4)
+    parser.add_argument('-t', '--stream', help='stream package files to disk with checksum verification',
+                        action='store_true', default=False)
+    parser.add_argument('-a', '--async-download', help='stream package files with retry and resume (implies --stream)',
+                        action='store_true', default=False)
+    parser.add_argument('--host-connections', help='number of parallel downloads per host', type=int, default=2)
+    parser.add_argument('--download-retries', help='number of download retries', type=int, default=3)
+    parser.add_argument('-c', '--deb-cache', help='persistent package file cache location')
+    parser.add_argument('--deb-cache-size', help='package file cache size limit (MB)', type=int, default=1024)
+    parser.add_argument('--verify-deb-cache', help='verify the checksum of every cached package file before use',
+                        action='store_true', default=False)
+    parser.add_argument('-r', '--resolution-cache', help='persistent package resolution cache file')
+    parser.add_argument('--source-timeout', help='package list fetch timeout per source (s)', type=int, default=30)
+    parser.add_argument('--fetch-workers', help='number of parallel package list fetches, 0 for apt default',
+                        type=int, default=0)
+    parser.add_argument('--snapshot', help='config snapshot file, apply only packages changed since last run')
+    parser.add_argument('-u', '--update-max-age', help='skip apt update if package lists are younger (minutes)',
+                        type=int, default=0)
+    parser.add_argument('--commit-retries', help='number of retries of failed package installations', type=int,
+                        default=2)
+    parser.add_argument('--commit-backoff', help='initial delay between package installation retries (s)',
+                        type=float, default=5.0)
+    parser.add_argument('-b', '--batch', help='install repository packages and package files in one transaction each',
+                        action='store_true', default=False)
+    parser.add_argument('-m', '--metrics', help='write run metrics report to file')
+    parser.add_argument('--metrics-format', help='metrics report format', choices=['json', 'prometheus'],
+                        default='json')
+    parser.add_argument('-p', '--plan', help='print the install plan as JSON without installing anything',
+                        action='store_true', default=False)
+    parser.add_argument('-o', '--output', help='write per-package install results to JSON file')
+    parser.add_argument('--fleet', help='comma separated list of hosts to install on over SSH')
+    parser.add_argument('--fleet-workers', help='number of hosts to install on in parallel', type=int, default=8)
+    parser.add_argument('--fleet-command', help='installer command to run on the hosts',
+                        default='sudo debian-package-installer.py')
+    parser.add_argument('-e', '--export-bundle', help='write the resolved packages to an offline bundle file')
+    parser.add_argument('-i', '--install-bundle', help='install packages from an offline bundle file')
+    parser.add_argument('-q', '--queue', help='queue directory, merge concurrent invocations into one transaction')
+    parser.add_argument('--queue-window', help='time to wait for concurrent invocations to merge (s)', type=float,
+                        default=1.0)
+    parser.add_argument('--force', help='run even if all packages are already installed',
+                        action='store_true', default=False)
+    parser.add_argument('--check', help='only check if all packages are installed, exit with 1 if not',
+                        action='store_true', default=False)
+
+    parser.add_argument('package_config', help='package config JSON file or URL', nargs='?')
+
+    arguments = parser.parse_args()
 
-    parser.add_argument('package_config', help='package config JSON file or URL')
+    if not arguments.package_config and not arguments.install_bundle:
+        parser.error('the following arguments are required: package_config')
 
-    return parser.parse_args()
+    return arguments
 
 
 if __name__ == '__main__':
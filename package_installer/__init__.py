@@ -1,7 +1,147 @@
-from .sourceConfig import *
-from .keyAdder import *
-from .sourceAdder import *
-from .debProvider import *
-from .aptInstaller import *
-from .debInstaller import *
-from .packageInstaller import *
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .sourceConfig import SourceConfig as SourceConfig
+    from .aptSources import AptSources as AptSources
+    from .fileWriter import (
+        get_file_checksum as get_file_checksum,
+        write_file as write_file,
+        write_json as write_json,
+    )
+    from .configKey import get_config_key as get_config_key
+    from .versionConstraint import VersionConstraint as VersionConstraint
+    from .installMetrics import IInstallMetrics as IInstallMetrics, InstallMetrics as InstallMetrics
+    from .meteredCache import MeteredCache as MeteredCache
+    from .installPlan import PlanEntry as PlanEntry, InstallPlan as InstallPlan
+    from .keyAdder import IKeyAdder as IKeyAdder, KeyAdder as KeyAdder
+    from .dpkgStatusReader import IDpkgStatusReader as IDpkgStatusReader, DpkgStatusReader as DpkgStatusReader
+    from .dpkgRunner import IDpkgRunner as IDpkgRunner, DpkgRunner as DpkgRunner
+    from .cacheRefresher import ICacheRefresher as ICacheRefresher, CacheRefresher as CacheRefresher
+    from .retryPolicy import IRetryPolicy as IRetryPolicy, RetryPolicy as RetryPolicy
+    from .listUpdater import (
+        SourceFetch as SourceFetch,
+        ListFetchProgress as ListFetchProgress,
+        IListUpdater as IListUpdater,
+        ListUpdater as ListUpdater,
+    )
+    from .sourceAdder import ISourceAdder as ISourceAdder, SourceAdder as SourceAdder
+    from .resolutionCache import (
+        Resolution as Resolution,
+        IResolutionCache as IResolutionCache,
+        ResolutionCache as ResolutionCache,
+    )
+    from .configSnapshot import IConfigSnapshot as IConfigSnapshot, ConfigSnapshot as ConfigSnapshot
+    from .installQueue import IInstallQueue as IInstallQueue, InstallQueue as InstallQueue
+    from .debControlParser import DebControlParser as DebControlParser
+    from .debMetadata import DebMetadata as DebMetadata
+    from .assetResolver import AssetInfo as AssetInfo, IAssetResolver as IAssetResolver, AssetResolver as AssetResolver
+    from .debStreamDownloader import (
+        IDebStreamDownloader as IDebStreamDownloader,
+        DebStreamDownloader as DebStreamDownloader,
+    )
+    from .asyncDebDownloader import AsyncDebDownloader as AsyncDebDownloader
+    from .debProvider import IDebProvider as IDebProvider, DebProvider as DebProvider
+    from .debCache import IDebCache as IDebCache, DebCache as DebCache
+    from .aptInstaller import IAptInstaller as IAptInstaller, AptInstaller as AptInstaller
+    from .debInstaller import IDebInstaller as IDebInstaller, DebInstaller as DebInstaller
+    from .installPlanner import IInstallPlanner as IInstallPlanner, InstallPlanner as InstallPlanner
+    from .bundleExporter import IBundleExporter as IBundleExporter, BundleExporter as BundleExporter
+    from .bundleInstaller import IBundleInstaller as IBundleInstaller, BundleInstaller as BundleInstaller
+    from .fleetTransport import (
+        CommandResult as CommandResult,
+        IFleetTransport as IFleetTransport,
+        SshTransport as SshTransport,
+    )
+    from .fleetInstaller import (
+        HostResult as HostResult,
+        IFleetInstaller as IFleetInstaller,
+        FleetInstaller as FleetInstaller,
+    )
+    from .updatePolicy import IUpdatePolicy as IUpdatePolicy, UpdatePolicy as UpdatePolicy
+    from .packageInstaller import PackageInstaller as PackageInstaller
+
+_EXPORTS = {
+    'SourceConfig': 'sourceConfig',
+    'AptSources': 'aptSources',
+    'get_file_checksum': 'fileWriter',
+    'write_file': 'fileWriter',
+    'write_json': 'fileWriter',
+    'get_config_key': 'configKey',
+    'VersionConstraint': 'versionConstraint',
+    'IInstallMetrics': 'installMetrics',
+    'InstallMetrics': 'installMetrics',
+    'MeteredCache': 'meteredCache',
+    'PlanEntry': 'installPlan',
+    'InstallPlan': 'installPlan',
+    'IKeyAdder': 'keyAdder',
+    'KeyAdder': 'keyAdder',
+    'IDpkgStatusReader': 'dpkgStatusReader',
+    'DpkgStatusReader': 'dpkgStatusReader',
+    'IDpkgRunner': 'dpkgRunner',
+    'DpkgRunner': 'dpkgRunner',
+    'ICacheRefresher': 'cacheRefresher',
+    'CacheRefresher': 'cacheRefresher',
+    'IRetryPolicy': 'retryPolicy',
+    'RetryPolicy': 'retryPolicy',
+    'SourceFetch': 'listUpdater',
+    'ListFetchProgress': 'listUpdater',
+    'IListUpdater': 'listUpdater',
+    'ListUpdater': 'listUpdater',
+    'ISourceAdder': 'sourceAdder',
+    'SourceAdder': 'sourceAdder',
+    'Resolution': 'resolutionCache',
+    'IResolutionCache': 'resolutionCache',
+    'ResolutionCache': 'resolutionCache',
+    'IConfigSnapshot': 'configSnapshot',
+    'ConfigSnapshot': 'configSnapshot',
+    'IInstallQueue': 'installQueue',
+    'InstallQueue': 'installQueue',
+    'DebControlParser': 'debControlParser',
+    'DebMetadata': 'debMetadata',
+    'AssetInfo': 'assetResolver',
+    'IAssetResolver': 'assetResolver',
+    'AssetResolver': 'assetResolver',
+    'IDebStreamDownloader': 'debStreamDownloader',
+    'DebStreamDownloader': 'debStreamDownloader',
+    'AsyncDebDownloader': 'asyncDebDownloader',
+    'IDebProvider': 'debProvider',
+    'DebProvider': 'debProvider',
+    'IDebCache': 'debCache',
+    'DebCache': 'debCache',
+    'IAptInstaller': 'aptInstaller',
+    'AptInstaller': 'aptInstaller',
+    'IDebInstaller': 'debInstaller',
+    'DebInstaller': 'debInstaller',
+    'IInstallPlanner': 'installPlanner',
+    'InstallPlanner': 'installPlanner',
+    'IBundleExporter': 'bundleExporter',
+    'BundleExporter': 'bundleExporter',
+    'IBundleInstaller': 'bundleInstaller',
+    'BundleInstaller': 'bundleInstaller',
+    'CommandResult': 'fleetTransport',
+    'IFleetTransport': 'fleetTransport',
+    'SshTransport': 'fleetTransport',
+    'HostResult': 'fleetInstaller',
+    'IFleetInstaller': 'fleetInstaller',
+    'FleetInstaller': 'fleetInstaller',
+    'IUpdatePolicy': 'updatePolicy',
+    'UpdatePolicy': 'updatePolicy',
+    'PackageInstaller': 'packageInstaller',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _EXPORTS:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+    value = getattr(import_module(f'.{_EXPORTS[name]}', __name__), name)
+    globals()[name] = value
+
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + __all__)
@@ -4,31 +4,86 @@
 
 from typing import Optional
 
-from apt import Cache, Package
+from apt import Cache, Package, Version
 from context_logger import get_logger
 from package_downloader import PackageConfig
 
+from package_installer import (
+    IInstallMetrics,
+    InstallMetrics,
+    ICacheRefresher,
+    CacheRefresher,
+    VersionConstraint,
+    IRetryPolicy,
+    RetryPolicy,
+)
+
 log = get_logger('AptInstaller')
 
 
 class IAptInstaller(object):
 
+    def is_available(self, package_config: PackageConfig) -> bool:
+        raise NotImplementedError()
+
+    def is_installed(self, package_config: PackageConfig) -> bool:
+        raise NotImplementedError()
+
     def install(self, package_config: PackageConfig) -> bool:
         raise NotImplementedError()
 
+    def install_batch(self, package_configs: list[PackageConfig]) -> dict[str, bool]:
+        raise NotImplementedError()
+
+    def mark_batch(self, package_configs: list[PackageConfig]) -> dict[str, bool]:
+        raise NotImplementedError()
+
 
 class AptInstaller(IAptInstaller):
 
-    def __init__(self, apt_cache: Cache):
+    def __init__(
+        self,
+        apt_cache: Cache,
+        metrics: Optional[IInstallMetrics] = None,
+        cache_refresher: Optional[ICacheRefresher] = None,
+        retry_policy: Optional[IRetryPolicy] = None,
+    ) -> None:
         self._apt_cache = apt_cache
+        self._metrics = metrics or InstallMetrics()
+        self._cache_refresher = cache_refresher or CacheRefresher(apt_cache)
+        self._retry_policy = retry_policy or RetryPolicy()
+
+    def is_available(self, package_config: PackageConfig) -> bool:
+        self._cache_refresher.refresh()
+        package: Package = self._apt_cache.get(package_config.package)
+
+        if not package:
+            return False
+
+        if not package_config.version or self._is_installed_matching(package, package_config.version):
+            return True
+
+        return self._select_version(package, package_config.version) is not None
+
+    def is_installed(self, package_config: PackageConfig) -> bool:
+        self._cache_refresher.refresh()
+        package: Package = self._apt_cache.get(package_config.package)
+
+        if not package:
+            return False
+
+        return self._is_installed_matching(package, package_config.version)
 
     def install(self, package_config: PackageConfig) -> bool:
-        package = self._get_apt_package(package_config)
+        self._cache_refresher.refresh()
+
+        with self._metrics.measure('resolve', package_config.package):
+            package = self._get_apt_package(package_config)
 
         if not package:
             return False
 
-        if package.is_installed:
+        if self._is_installed_matching(package, package_config.version):
             installed_version = self._get_installed_version(package)
             log.info('Package is already installed', package=package.name, version=installed_version)
             return True
@@ -37,34 +92,175 @@ class AptInstaller(IAptInstaller):
 
         try:
             log.info('Installing package from repository', package=package.name, version=version)
-            package.mark_install()
-            self._apt_cache.commit()
-            self._apt_cache.open()
+            with self._metrics.measure('install', package.name):
+                package.mark_install()
+                self._commit([package_config])
+                self._cache_refresher.invalidate()
 
-            if package.is_installed:
-                installed_version = self._get_installed_version(package)
+            with self._metrics.measure('verify', package.name):
+                installed_version = self._cache_refresher.get_installed_version(package.name)
+
+            if installed_version:
                 log.info('Package installed successfully', package=package.name, version=installed_version)
                 return True
         except Exception as error:
             self._apt_cache.clear()
+            self._cache_refresher.invalidate()
             log.error('Error during package installation', package=package.name, version=version, error=error)
 
         return False
 
+    def install_batch(self, package_configs: list[PackageConfig]) -> dict[str, bool]:
+        results, marked = self._mark_packages(package_configs)
+
+        if marked:
+            results.update(self._commit_marked(marked, package_configs))
+
+        return results
+
+    def mark_batch(self, package_configs: list[PackageConfig]) -> dict[str, bool]:
+        results, marked = self._mark_packages(package_configs)
+
+        results.update({name: True for name in marked})
+
+        return results
+
+    def _mark_packages(
+        self, package_configs: list[PackageConfig]
+    ) -> tuple[dict[str, bool], dict[str, Optional[str]]]:
+        results: dict[str, bool] = {}
+        marked: dict[str, Optional[str]] = {}
+
+        self._cache_refresher.refresh()
+
+        for package_config in package_configs:
+            with self._metrics.measure('resolve', package_config.package):
+                package = self._get_apt_package(package_config)
+
+            if not package:
+                results[package_config.package] = False
+                continue
+
+            if self._is_installed_matching(package, package_config.version):
+                installed_version = self._get_installed_version(package)
+                log.info('Package is already installed', package=package.name, version=installed_version)
+                results[package_config.package] = True
+                continue
+
+            version = self._get_candidate_version(package)
+            log.info('Marking package for installation', package=package.name, version=version)
+
+            try:
+                package.mark_install()
+            except Exception as error:
+                log.error('Package cannot be marked for installation', package=package.name, version=version,
+                          error=error)
+                results[package_config.package] = False
+                # A failed mark can leave partial changes behind, start over with the packages marked so far
+                self._apt_cache.clear()
+                self._mark_configs([config for config in package_configs if config.package in marked])
+                continue
+
+            marked[package_config.package] = version
+
+        return results, marked
+
+    def _commit_marked(
+        self, marked: dict[str, Optional[str]], package_configs: list[PackageConfig]
+    ) -> dict[str, bool]:
+        marked_configs = [config for config in package_configs if config.package in marked]
+
+        try:
+            log.info('Installing packages from repository', packages=list(marked))
+            with self._metrics.measure('install'):
+                self._commit(marked_configs)
+        except Exception as error:
+            self._apt_cache.clear()
+            self._cache_refresher.invalidate()
+            log.error('Error during package installation, installing packages one by one', packages=list(marked),
+                      error=error)
+            return {config.package: self.install(config) for config in marked_configs}
+
+        self._cache_refresher.invalidate()
+
+        with self._metrics.measure('verify'):
+            installed_versions = {name: self._cache_refresher.get_installed_version(name) for name in marked}
+
+        results: dict[str, bool] = {}
+
+        for name, version in marked.items():
+            installed_version = installed_versions[name]
+            if installed_version:
+                log.info('Package installed successfully', package=name, version=installed_version)
+                results[name] = True
+            else:
+                log.error('Package is not installed', package=name, version=version)
+                results[name] = False
+
+        return results
+
+    def _commit(self, package_configs: list[PackageConfig]) -> None:
+        self._retry_policy.run(self._apt_cache.commit, lambda: self._mark_again(package_configs))
+
+    def _mark_again(self, package_configs: list[PackageConfig]) -> None:
+        # Reopening the cache drops the marks of the failed attempt and picks up what dpkg already installed
+        self._cache_refresher.invalidate()
+        self._cache_refresher.refresh()
+        self._mark_configs(package_configs)
+
+    def _mark_configs(self, package_configs: list[PackageConfig]) -> None:
+        for package_config in package_configs:
+            package = self._get_apt_package(package_config)
+            if package and not self._is_installed_matching(package, package_config.version):
+                log.info('Marking package for installation again', package=package.name,
+                         version=self._get_candidate_version(package))
+                package.mark_install()
+
     def _get_apt_package(self, package_config: PackageConfig) -> Optional[Package]:
         package: Package = self._apt_cache.get(package_config.package)
 
-        if package and package_config.version:
-            target_version = package.versions.get(package_config.version)
-            if target_version:
-                package.candidate = target_version
-            else:
-                log.error('Package version is not available', package=package_config.package,
-                          version=package_config.version, available_versions=package.versions.keys())
-                return None
+        if not package or not package_config.version or self._is_installed_matching(package, package_config.version):
+            return package
+
+        target_version = self._select_version(package, package_config.version)
+
+        if not target_version:
+            log.error('Package version is not available', package=package_config.package,
+                      version=package_config.version, available_versions=package.versions.keys())
+            return None
+
+        package.candidate = target_version
 
         return package
 
+    def _select_version(self, package: Package, version: str) -> Optional[Version]:
+        try:
+            constraint = VersionConstraint(version)
+        except ValueError as error:
+            log.error('Invalid package version', package=package.name, version=version, error=error)
+            return None
+
+        exact_version = constraint.get_exact_version()
+
+        if exact_version:
+            return package.versions.get(exact_version)
+
+        index = {package_version.version: package_version for package_version in package.versions}
+        selected = constraint.select(index)
+
+        return index[selected] if selected else None
+
+    def _is_installed_matching(self, package: Package, version: Optional[str]) -> bool:
+        installed_version = self._get_installed_version(package)
+
+        if not package.is_installed or not installed_version:
+            return False
+
+        try:
+            return not version or VersionConstraint(version).matches(installed_version)
+        except ValueError:
+            return False
+
     def _get_installed_version(self, package: Package) -> Optional[str]:
         return package.installed.version if package.installed else None
 
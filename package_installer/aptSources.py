@@ -0,0 +1,33 @@
+# SPDX-FileCopyrightText: 2024 Ferenc Nandor Janky <ferenj@effective-range.com>
+# SPDX-FileCopyrightText: 2024 Attila Gombos <attila.gombos@effective-range.com>
+# SPDX-License-Identifier: MIT
+
+import hashlib
+import os
+
+
+class AptSources(object):
+
+    def __init__(self, sources_paths: tuple[str, ...] = ('/etc/apt/sources.list', '/etc/apt/sources.list.d')) -> None:
+        self._sources_paths = sources_paths
+
+    def get_hash(self) -> str:
+        sources_hash = hashlib.sha256()
+
+        for source_file in self.get_files():
+            sources_hash.update(source_file.encode())
+            with open(source_file, 'rb') as file:
+                sources_hash.update(file.read())
+
+        return sources_hash.hexdigest()
+
+    def get_files(self) -> list[str]:
+        source_files: list[str] = []
+
+        for path in self._sources_paths:
+            if os.path.isdir(path):
+                source_files.extend(os.path.join(path, name) for name in sorted(os.listdir(path)))
+            elif os.path.isfile(path):
+                source_files.append(path)
+
+        return [source_file for source_file in source_files if os.path.isfile(source_file)]
@@ -0,0 +1,109 @@
+# SPDX-FileCopyrightText: 2024 Ferenc Nandor Janky <ferenj@effective-range.com>
+# SPDX-FileCopyrightText: 2024 Attila Gombos <attila.gombos@effective-range.com>
+# SPDX-License-Identifier: MIT
+
+import os
+from dataclasses import dataclass
+from fnmatch import fnmatch
+from typing import Optional, Any
+from urllib.parse import urlparse, unquote
+
+from context_logger import get_logger
+from package_downloader import PackageConfig, ReleaseConfig
+from requests import Session
+
+from package_installer import IResolutionCache, Resolution
+
+log = get_logger('AssetResolver')
+
+
+@dataclass
+class AssetInfo:
+    url: str
+    name: str
+    sha256: Optional[str] = None
+
+
+class IAssetResolver(object):
+
+    def resolve(self, package_config: PackageConfig) -> Optional[AssetInfo]:
+        raise NotImplementedError()
+
+
+class AssetResolver(IAssetResolver):
+
+    def __init__(
+        self,
+        session: Session,
+        api_url: str = 'https://api.github.com',
+        timeout: float = 30,
+        resolution_cache: Optional[IResolutionCache] = None,
+    ) -> None:
+        self._session = session
+        self._api_url = api_url
+        self._timeout = timeout
+        self._resolution_cache = resolution_cache
+
+    def resolve(self, package_config: PackageConfig) -> Optional[AssetInfo]:
+        try:
+            if package_config.file_url:
+                return self._resolve_file_url(package_config.file_url)
+
+            if package_config.release:
+                return self._resolve_release(package_config, package_config.release)
+        except Exception as error:
+            log.error('Failed to resolve package asset', package=package_config.package, error=error)
+
+        return None
+
+    def _resolve_file_url(self, file_url: str) -> AssetInfo:
+        url = urlparse(file_url)
+        sha256 = url.fragment[len('sha256='):] if url.fragment.startswith('sha256=') else None
+
+        return AssetInfo(url._replace(fragment='').geturl(), self._get_file_name(file_url), sha256)
+
+    def _resolve_release(self, package_config: PackageConfig, release_config: ReleaseConfig) -> Optional[AssetInfo]:
+        resolution = self._resolution_cache.get(package_config) if self._resolution_cache else None
+
+        if resolution and resolution.url:
+            log.info('Release asset resolved from cache', package=package_config.package, url=resolution.url)
+            return AssetInfo(resolution.url, self._get_file_name(resolution.url), resolution.sha256)
+
+        asset = self._resolve_release_asset(package_config.package, release_config)
+
+        if asset and self._resolution_cache:
+            self._resolution_cache.put(package_config, Resolution('deb', url=asset.url, sha256=asset.sha256))
+
+        return asset
+
+    def _resolve_release_asset(self, package: str, release_config: ReleaseConfig) -> Optional[AssetInfo]:
+        release = self._get_release(release_config)
+
+        for asset in release.get('assets', []):
+            if fnmatch(asset['name'], release_config.matcher):
+                digest = asset.get('digest') or ''
+                sha256 = digest[len('sha256:'):] if digest.startswith('sha256:') else None
+                log.info('Release asset resolved', package=package, release=release.get('tag_name'),
+                         asset=asset['name'])
+                return AssetInfo(asset['browser_download_url'], asset['name'], sha256)
+
+        log.warn('No matching release asset found', package=package, repo=release_config.repo,
+                 matcher=release_config.matcher)
+
+        return None
+
+    def _get_release(self, release_config: ReleaseConfig) -> Any:
+        repo = release_config.repo
+
+        if release_config.tag == 'latest':
+            url = f'{self._api_url}/repos/{repo}/releases/latest'
+        else:
+            url = f'{self._api_url}/repos/{repo}/releases/tags/{release_config.tag}'
+
+        response = self._session.get(url, headers={'Accept': 'application/vnd.github+json'}, timeout=self._timeout)
+        response.raise_for_status()
+
+        return response.json()
+
+    def _get_file_name(self, url: str) -> str:
+        return os.path.basename(unquote(urlparse(url).path))
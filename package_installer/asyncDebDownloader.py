@@ -0,0 +1,187 @@
+# SPDX-FileCopyrightText: 2024 Ferenc Nandor Janky <ferenj@effective-range.com>
+# SPDX-FileCopyrightText: 2024 Attila Gombos <attila.gombos@effective-range.com>
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import hashlib
+import os
+from threading import Thread
+from typing import Optional, Any
+from urllib.parse import urlparse
+
+from context_logger import get_logger
+from package_downloader import IDebDownloader
+from requests import Session, Response, ConnectionError, Timeout, HTTPError
+from requests.exceptions import ChunkedEncodingError
+from requests.adapters import HTTPAdapter
+
+from package_installer import IAssetResolver, AssetInfo, DebStreamDownloader, DebControlParser
+
+log = get_logger('AsyncDebDownloader')
+
+
+class AsyncDebDownloader(DebStreamDownloader):
+    _VALIDATOR_SUFFIX = '.validator'
+    _TRANSIENT_STATUS_CODES = {429}
+
+    def __init__(
+        self,
+        asset_resolver: IAssetResolver,
+        session: Session,
+        download_dir: str,
+        deb_downloader: Optional[IDebDownloader] = None,
+        host_connections: int = 2,
+        retries: int = 3,
+        backoff: float = 1.0,
+        chunk_size: int = 64 * 1024,
+        timeout: float = 30,
+    ) -> None:
+        super().__init__(asset_resolver, session, download_dir, deb_downloader, chunk_size, timeout)
+        self._host_connections = host_connections
+        self._retries = retries
+        self._backoff = backoff
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+
+        adapter = HTTPAdapter(pool_maxsize=host_connections)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+    def _transfer(self, asset: AssetInfo, partial_file: str) -> tuple[str, Optional[str]]:
+        future = asyncio.run_coroutine_threadsafe(self._transfer_async(asset, partial_file), self._get_loop())
+        return future.result()
+
+    def _discard(self, asset: AssetInfo, partial_file: str) -> None:
+        # Keep the partial file only if it can be verified, so the next run can resume the download
+        if not asset.sha256:
+            self._remove_partial(partial_file)
+
+    async def _transfer_async(self, asset: AssetInfo, partial_file: str) -> tuple[str, Optional[str]]:
+        semaphore = self._get_semaphore(urlparse(asset.url).netloc)
+
+        for attempt in range(self._retries + 1):
+            if attempt:
+                delay = self._backoff * 2 ** (attempt - 1)
+                log.info('Retrying download', url=asset.url, attempt=attempt, delay=delay)
+                await asyncio.sleep(delay)
+
+            try:
+                async with semaphore:
+                    return await asyncio.to_thread(self._transfer_range, asset, partial_file)
+            except Exception as error:
+                if attempt == self._retries or not self._is_transient(error):
+                    raise
+                log.warn('Download interrupted', url=asset.url, attempt=attempt, error=error)
+
+        raise RuntimeError('Download retries exhausted')
+
+    def _transfer_range(self, asset: AssetInfo, partial_file: str) -> tuple[str, Optional[str]]:
+        if not asset.sha256:
+            self._remove_partial(partial_file)
+
+        digest = hashlib.sha256()
+        parser = DebControlParser()
+        offset = self._read_partial(partial_file, digest, parser)
+        headers = self._get_range_headers(partial_file, offset)
+
+        with self._session.get(asset.url, stream=True, timeout=self._timeout, headers=headers) as response:
+            if offset and response.status_code == 416:
+                log.info('Partial file does not match remote file, restarting download', url=asset.url)
+                self._remove_partial(partial_file)
+                return self._transfer_range(asset, partial_file)
+
+            response.raise_for_status()
+
+            if offset and response.status_code != 206:
+                log.info('Remote file changed or range requests not supported, restarting download', url=asset.url)
+                digest = hashlib.sha256()
+                parser = DebControlParser()
+                offset = 0
+            elif offset:
+                if not self._is_content_range_matching(response, offset):
+                    log.warn('Unexpected content range, restarting download', url=asset.url, offset=offset,
+                             content_range=response.headers.get('Content-Range'))
+                    self._remove_partial(partial_file)
+                    return self._transfer_range(asset, partial_file)
+
+                log.info('Resuming download', url=asset.url, offset=offset)
+
+            if not offset:
+                self._save_validator(response, partial_file)
+
+            with open(partial_file, 'ab' if offset else 'wb') as file:
+                self._write_chunks(response, file, digest, parser)
+
+        self._remove_file(f'{partial_file}{self._VALIDATOR_SUFFIX}')
+
+        return digest.hexdigest(), parser.get_control()
+
+    def _get_range_headers(self, partial_file: str, offset: int) -> Optional[dict[str, str]]:
+        if not offset:
+            return None
+
+        headers = {'Range': f'bytes={offset}-'}
+
+        try:
+            with open(f'{partial_file}{self._VALIDATOR_SUFFIX}') as file:
+                headers['If-Range'] = file.read().strip()
+        except OSError:
+            pass
+
+        return headers
+
+    def _is_content_range_matching(self, response: Response, offset: int) -> bool:
+        content_range: str = response.headers.get('Content-Range', '')
+        return content_range.removeprefix('bytes ').split('-', 1)[0] == str(offset)
+
+    def _is_transient(self, error: Exception) -> bool:
+        if isinstance(error, HTTPError):
+            status_code = error.response.status_code if error.response is not None else 0
+            return status_code >= 500 or status_code in self._TRANSIENT_STATUS_CODES
+
+        return isinstance(error, (ConnectionError, Timeout, ChunkedEncodingError))
+
+    def _save_validator(self, response: Response, partial_file: str) -> None:
+        etag = response.headers.get('ETag')
+        validator = etag if etag and not etag.startswith('W/') else response.headers.get('Last-Modified')
+        validator_file = f'{partial_file}{self._VALIDATOR_SUFFIX}'
+
+        if validator:
+            with open(validator_file, 'w') as file:
+                file.write(validator)
+        else:
+            self._remove_file(validator_file)
+
+    def _remove_partial(self, partial_file: str) -> None:
+        self._remove_file(partial_file)
+        self._remove_file(f'{partial_file}{self._VALIDATOR_SUFFIX}')
+
+    def _remove_file(self, file_path: str) -> None:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+    def _read_partial(self, partial_file: str, digest: Any, parser: DebControlParser) -> int:
+        if not os.path.isfile(partial_file):
+            return 0
+
+        size = 0
+
+        with open(partial_file, 'rb') as file:
+            while chunk := file.read(self._chunk_size):
+                digest.update(chunk)
+                parser.feed(chunk)
+                size += len(chunk)
+
+        return size
+
+    def _get_semaphore(self, host: str) -> asyncio.Semaphore:
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self._host_connections)
+        return self._semaphores[host]
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if not self._loop:
+                self._loop = asyncio.new_event_loop()
+                Thread(target=self._loop.run_forever, name='AsyncDebDownloader', daemon=True).start()
+            return self._loop
@@ -0,0 +1,88 @@
+# SPDX-FileCopyrightText: 2024 Ferenc Nandor Janky <ferenj@effective-range.com>
+# SPDX-FileCopyrightText: 2024 Attila Gombos <attila.gombos@effective-range.com>
+# SPDX-License-Identifier: MIT
+
+import io
+import json
+import os
+import shutil
+import tarfile
+import time
+from tempfile import TemporaryDirectory
+from typing import Optional
+
+from apt import Cache
+from context_logger import get_logger
+from package_downloader import PackageConfig
+
+from package_installer import IInstallPlanner, InstallPlan, get_file_checksum
+
+log = get_logger('BundleExporter')
+
+
+class IBundleExporter(object):
+
+    def export(self, package_configs: list[PackageConfig], bundle_path: str) -> InstallPlan:
+        raise NotImplementedError()
+
+
+class BundleExporter(IBundleExporter):
+    _MANIFEST_FILE = 'manifest.json'
+    _PACKAGES_DIR = 'packages'
+
+    def __init__(self, apt_cache: Cache, install_planner: IInstallPlanner) -> None:
+        self._apt_cache = apt_cache
+        self._install_planner = install_planner
+
+    def export(self, package_configs: list[PackageConfig], bundle_path: str) -> InstallPlan:
+        plan = self._install_planner.plan(package_configs)
+        checksums: dict[str, str] = {}
+
+        with TemporaryDirectory() as work_dir:
+            for entry in plan.entries:
+                if entry.action == 'remove':
+                    continue
+
+                package_file = self._get_package_file(entry.package, entry.version, entry.file, work_dir)
+                entry.file = f'{self._PACKAGES_DIR}/{os.path.basename(package_file)}'
+                checksums[entry.file] = get_file_checksum(package_file)
+
+            manifest = {'created_at': time.time(), 'plan': plan.to_dict(), 'checksums': checksums}
+
+            os.makedirs(os.path.dirname(os.path.abspath(bundle_path)), exist_ok=True)
+
+            with tarfile.open(f'{bundle_path}.tmp', 'w:gz', compresslevel=1) as bundle:
+                self._add_bytes(bundle, self._MANIFEST_FILE, json.dumps(manifest, indent=2).encode())
+                for name in checksums:
+                    bundle.add(os.path.join(work_dir, os.path.basename(name)), name)
+
+            os.replace(f'{bundle_path}.tmp', bundle_path)
+
+        log.info('Bundle exported', file=bundle_path, packages=len(checksums), unresolved=plan.unresolved,
+                 size=os.path.getsize(bundle_path))
+
+        return plan
+
+    def _get_package_file(self, name: str, version: Optional[str], package_file: Optional[str], work_dir: str) -> str:
+        if package_file:
+            target_file = os.path.join(work_dir, os.path.basename(package_file))
+            shutil.copyfile(package_file, target_file)
+            return target_file
+
+        package = self._apt_cache[name]
+        package_version = package.versions.get(version) if version else package.candidate
+
+        if not package_version:
+            raise ValueError(f'Package version is not available: {name} {version}')
+
+        log.info('Fetching package from repository', package=name, version=package_version.version)
+
+        fetched_file: str = package_version.fetch_binary(work_dir)
+
+        return fetched_file
+
+    def _add_bytes(self, bundle: tarfile.TarFile, name: str, data: bytes) -> None:
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        bundle.addfile(info, io.BytesIO(data))
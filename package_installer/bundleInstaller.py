@@ -0,0 +1,107 @@
+# SPDX-FileCopyrightText: 2024 Ferenc Nandor Janky <ferenj@effective-range.com>
+# SPDX-FileCopyrightText: 2024 Attila Gombos <attila.gombos@effective-range.com>
+# SPDX-License-Identifier: MIT
+
+import json
+import os
+import shutil
+import tarfile
+from tempfile import TemporaryDirectory
+from typing import Any, Optional
+
+from context_logger import get_logger
+
+from package_installer import InstallPlan, IDpkgStatusReader, IDpkgRunner, DpkgRunner, get_file_checksum
+
+log = get_logger('BundleInstaller')
+
+
+class IBundleInstaller(object):
+
+    def install(self, bundle_path: str) -> dict[str, bool]:
+        raise NotImplementedError()
+
+
+class BundleInstaller(IBundleInstaller):
+    _MANIFEST_FILE = 'manifest.json'
+
+    def __init__(self, status_reader: IDpkgStatusReader, dpkg_runner: Optional[IDpkgRunner] = None) -> None:
+        self._status_reader = status_reader
+        self._dpkg_runner = dpkg_runner or DpkgRunner()
+
+    def install(self, bundle_path: str) -> dict[str, bool]:
+        with TemporaryDirectory() as work_dir, tarfile.open(bundle_path, 'r:*') as bundle:
+            manifest = self._read_manifest(bundle)
+            plan = InstallPlan.from_dict(manifest['plan'])
+            installed_versions = self._status_reader.get_installed_versions()
+
+            removals = [entry.package for entry in plan.get_entries('remove') if entry.package in installed_versions]
+            package_files = []
+
+            try:
+                for entry in plan.entries:
+                    if entry.action == 'remove' or not entry.file:
+                        continue
+
+                    if installed_versions.get(entry.package) == entry.version:
+                        log.info('Package is already installed', package=entry.package, version=entry.version)
+                        continue
+
+                    package_files.append(
+                        self._extract(bundle, entry.file, manifest['checksums'][entry.file], work_dir)
+                    )
+
+                if removals:
+                    self._dpkg_runner.remove(removals)
+                if package_files:
+                    self._dpkg_runner.install(package_files)
+            except Exception as error:
+                log.error('Error during bundle installation', file=bundle_path, error=error)
+
+        return self._get_results(plan)
+
+    def _read_manifest(self, bundle: tarfile.TarFile) -> Any:
+        manifest_file = bundle.extractfile(self._MANIFEST_FILE)
+
+        if not manifest_file:
+            raise ValueError('Bundle manifest is missing')
+
+        return json.load(manifest_file)
+
+    def _extract(self, bundle: tarfile.TarFile, name: str, checksum: str, work_dir: str) -> str:
+        try:
+            member_file = bundle.extractfile(name)
+        except KeyError:
+            member_file = None
+
+        if not member_file:
+            raise ValueError(f'Bundle member is missing: {name}')
+
+        target_file = os.path.join(work_dir, os.path.basename(name))
+
+        with open(target_file, 'wb') as file:
+            shutil.copyfileobj(member_file, file)
+
+        if get_file_checksum(target_file) != checksum:
+            raise ValueError(f'Bundle member checksum mismatch: {name}')
+
+        return target_file
+
+    def _get_results(self, plan: InstallPlan) -> dict[str, bool]:
+        installed_versions = self._status_reader.get_installed_versions()
+        results = {}
+
+        for entry in plan.entries:
+            if entry.action == 'remove':
+                results[entry.package] = entry.package not in installed_versions
+            else:
+                results[entry.package] = installed_versions.get(entry.package) == entry.version
+
+        for package in plan.unresolved:
+            log.error('Package is not in the bundle', package=package)
+            results[package] = False
+
+        failed = [package for package, result in results.items() if not result]
+        log.info('Bundle installation finished', installed=len(results) - len(failed), failed=failed)
+
+        return results
@@ -0,0 +1,71 @@
+# SPDX-FileCopyrightText: 2024 Ferenc Nandor Janky <ferenj@effective-range.com>
+# SPDX-FileCopyrightText: 2024 Attila Gombos <attila.gombos@effective-range.com>
+# SPDX-License-Identifier: MIT
+
+from dataclasses import dataclass
+from threading import Lock
+from typing import Optional
+from weakref import WeakKeyDictionary
+
+from apt import Cache, Package
+from context_logger import get_logger
+
+from package_installer import IDpkgStatusReader
+
+log = get_logger('CacheRefresher')
+
+
+class ICacheRefresher(object):
+
+    def invalidate(self) -> None:
+        raise NotImplementedError()
+
+    def refresh(self) -> None:
+        raise NotImplementedError()
+
+    def get_installed_version(self, package_name: str) -> Optional[str]:
+        raise NotImplementedError()
+
+
+@dataclass
+class CacheState:
+    stale: bool = False
+    installed_versions: Optional[dict[str, str]] = None
+
+
+class CacheRefresher(ICacheRefresher):
+    # Refreshers of the same cache share its state, so an invalidation by one component is seen by all of them
+    _states: 'WeakKeyDictionary[Cache, CacheState]' = WeakKeyDictionary()
+    _states_lock = Lock()
+
+    def __init__(self, apt_cache: Cache, status_reader: Optional[IDpkgStatusReader] = None) -> None:
+        self._apt_cache = apt_cache
+        self._status_reader = status_reader
+
+        with self._states_lock:
+            self._state = self._states.setdefault(apt_cache, CacheState())
+
+    def invalidate(self) -> None:
+        self._state.stale = True
+        self._state.installed_versions = None
+
+    def refresh(self) -> None:
+        if self._state.stale:
+            log.debug('Reopening apt cache')
+            self._apt_cache.open()
+            self._state.stale = False
+
+    def get_installed_version(self, package_name: str) -> Optional[str]:
+        if self._state.stale and self._status_reader:
+            if self._state.installed_versions is None:
+                self._state.installed_versions = self._status_reader.get_installed_versions()
+            return self._state.installed_versions.get(package_name)
+
+        self.refresh()
+
+        package: Package = self._apt_cache.get(package_name)
+
+        if package and package.is_installed and package.installed:
+            return package.installed.version
+
+        return None
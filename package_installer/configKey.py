@@ -0,0 +1,18 @@
+# SPDX-FileCopyrightText: 2024 Ferenc Nandor Janky <ferenj@effective-range.com>
+# SPDX-FileCopyrightText: 2024 Attila Gombos <attila.gombos@effective-range.com>
+# SPDX-License-Identifier: MIT
+
+import json
+
+from package_downloader import PackageConfig
+
+
+def get_config_key(package_config: PackageConfig) -> str:
+    release = package_config.release
+
+    return json.dumps({
+        'package': package_config.package,
+        'version': package_config.version,
+        'file_url': package_config.file_url,
+        'release': [release.repo, release.tag, release.matcher] if release else None,
+    }, sort_keys=True)
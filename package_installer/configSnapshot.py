@@ -0,0 +1,133 @@
+# SPDX-FileCopyrightText: 2024 Ferenc Nandor Janky <ferenj@effective-range.com>
+# SPDX-FileCopyrightText: 2024 Attila Gombos <attila.gombos@effective-range.com>
+# SPDX-License-Identifier: MIT
+
+import hashlib
+import json
+from threading import Lock
+from typing import Optional, Any
+
+from context_logger import get_logger
+from package_downloader import PackageConfig
+
+from package_installer import IDpkgStatusReader, DpkgStatusReader, write_json, get_config_key
+
+log = get_logger('ConfigSnapshot')
+
+
+class IConfigSnapshot(object):
+
+    def is_source_changed(self) -> bool:
+        raise NotImplementedError()
+
+    def get_changes(self, package_configs: list[PackageConfig]) -> list[PackageConfig]:
+        raise NotImplementedError()
+
+    def update(self, package_configs: list[PackageConfig], results: dict[str, bool]) -> None:
+        raise NotImplementedError()
+
+    def save(self) -> None:
+        raise NotImplementedError()
+
+
+class ConfigSnapshot(IConfigSnapshot):
+
+    def __init__(
+        self,
+        snapshot_file: str = '/var/lib/debian-package-installer/config-snapshot.json',
+        source_config_path: Optional[str] = None,
+        status_reader: Optional[IDpkgStatusReader] = None,
+    ) -> None:
+        self._snapshot_file = snapshot_file
+        self._source_config_path = source_config_path
+        self._status_reader = status_reader or DpkgStatusReader()
+        self._lock = Lock()
+        self._source_checksum: Optional[str] = None
+        self._packages: dict[str, dict[str, Any]] = {}
+        self._loaded = False
+        self._changed = False
+
+    def is_source_changed(self) -> bool:
+        with self._lock:
+            self._load()
+            return self._source_checksum != self._get_source_checksum()
+
+    def get_changes(self, package_configs: list[PackageConfig]) -> list[PackageConfig]:
+        if self.is_source_changed():
+            log.info('Source config changed, applying all packages')
+            return list(package_configs)
+
+        installed = self._status_reader.get_installed_versions()
+        changes: list[PackageConfig] = []
+
+        with self._lock:
+            for config in package_configs:
+                entry = self._packages.get(self._get_checksum(config))
+                if not entry:
+                    log.info('Package config added or changed', package=config.package, version=config.version)
+                    changes.append(config)
+                elif installed.get(config.package) != entry['version']:
+                    log.info('Installed package drifted from snapshot', package=config.package,
+                             version=entry['version'], installed_version=installed.get(config.package))
+                    changes.append(config)
+
+        log.info('Package config diff computed', total=len(package_configs), changed=len(changes))
+
+        return changes
+
+    def update(self, package_configs: list[PackageConfig], results: dict[str, bool]) -> None:
+        installed = self._status_reader.get_installed_versions()
+        packages: dict[str, dict[str, Any]] = {}
+
+        for config in package_configs:
+            version = installed.get(config.package)
+            if results.get(config.package) and version:
+                packages[self._get_checksum(config)] = {'package': config.package, 'version': version}
+
+        with self._lock:
+            self._load()
+            self._source_checksum = self._get_source_checksum()
+            self._packages = packages
+            self._changed = True
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._changed:
+                return
+
+            data = {'source_checksum': self._source_checksum, 'packages': self._packages}
+
+            try:
+                write_json(self._snapshot_file, data)
+                self._changed = False
+            except Exception as error:
+                log.warn('Failed to save config snapshot', file=self._snapshot_file, error=error)
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+
+        self._loaded = True
+
+        try:
+            with open(self._snapshot_file) as file:
+                data = json.load(file)
+        except Exception:
+            return
+
+        self._source_checksum = data.get('source_checksum')
+        self._packages = data.get('packages', {})
+
+    def _get_checksum(self, package_config: PackageConfig) -> str:
+        return hashlib.sha256(get_config_key(package_config).encode()).hexdigest()
+
+    def _get_source_checksum(self) -> Optional[str]:
+        if not self._source_config_path:
+            return None
+
+        try:
+            with open(self._source_config_path, 'rb') as file:
+                return hashlib.sha256(file.read()).hexdigest()
+        except Exception as error:
+            log.warn('Failed to read source config', file=self._source_config_path, error=error)
+            return None
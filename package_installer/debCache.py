@@ -0,0 +1,203 @@
+# SPDX-FileCopyrightText: 2024 Ferenc Nandor Janky <ferenj@effective-range.com>
+# SPDX-FileCopyrightText: 2024 Attila Gombos <attila.gombos@effective-range.com>
+# SPDX-License-Identifier: MIT
+
+import json
+import os
+import shutil
+import time
+from typing import Optional, Any
+
+import apt_pkg
+from context_logger import get_logger
+from package_downloader import PackageConfig
+
+from package_installer import VersionConstraint, get_file_checksum, write_json
+
+log = get_logger('DebCache')
+
+
+class IDebCache(object):
+
+    def find(self, package_config: PackageConfig) -> Optional[str]:
+        raise NotImplementedError()
+
+    def store(
+        self, package_config: PackageConfig, package_file: str, name: str, version: str, architecture: str
+    ) -> None:
+        raise NotImplementedError()
+
+    def verify(self) -> int:
+        raise NotImplementedError()
+
+
+class DebCache(IDebCache):
+    _INDEX_FILE = 'index.json'
+
+    def __init__(self, cache_dir: str, max_size: int, architectures: Optional[list[str]] = None) -> None:
+        self._cache_dir = cache_dir
+        self._max_size = max_size
+        self._architectures = architectures or apt_pkg.get_architectures() + ['all']
+        self._index = self._load_index()
+
+    def find(self, package_config: PackageConfig) -> Optional[str]:
+        for key in self._get_lookup_keys(package_config):
+            checksum = self._index['keys'].get(key)
+            if checksum and self._is_valid(checksum):
+                entry = self._index['entries'][checksum]
+                entry['last_used'] = time.time()
+                self._save_index()
+                log.info('Package file found in cache', package=package_config.package, key=key, sha256=checksum)
+                return self._get_object_path(checksum)
+
+        return None
+
+    def store(
+        self, package_config: PackageConfig, package_file: str, name: str, version: str, architecture: str
+    ) -> None:
+        try:
+            checksum = get_file_checksum(package_file)
+            object_path = self._get_object_path(checksum)
+
+            if not os.path.isfile(object_path):
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                shutil.copyfile(package_file, f'{object_path}.tmp')
+                os.replace(f'{object_path}.tmp', object_path)
+
+            stat = os.stat(object_path)
+            self._index['entries'][checksum] = {
+                'name': name,
+                'version': version,
+                'architecture': architecture,
+                'size': stat.st_size,
+                'mtime': stat.st_mtime_ns,
+                'last_used': time.time(),
+            }
+            self._index['keys'][self._get_package_key(name, version, architecture)] = checksum
+            if package_config.file_url:
+                self._index['keys'][self._get_url_key(package_config.file_url)] = checksum
+
+            self._evict()
+            self._save_index()
+
+            log.info('Package file stored in cache', package=name, version=version, sha256=checksum)
+        except Exception as error:
+            log.warn('Failed to store package file in cache', file=package_file, error=error)
+
+    def verify(self) -> int:
+        corrupted = [checksum for checksum in self._index['entries'] if not self._is_intact(checksum)]
+
+        for checksum in corrupted:
+            log.warn('Cached package file is missing or corrupted, removing', sha256=checksum)
+            self._remove_entry(checksum)
+
+        if corrupted:
+            self._save_index()
+
+        log.info('Package file cache verified', entries=len(self._index['entries']), removed=len(corrupted))
+
+        return len(corrupted)
+
+    def _get_lookup_keys(self, package_config: PackageConfig) -> list[str]:
+        keys = []
+
+        if package_config.file_url:
+            keys.append(self._get_url_key(package_config.file_url))
+
+        version = None
+
+        if package_config.version:
+            version = self._get_cached_version(package_config.package, package_config.version)
+
+        if version:
+            for architecture in self._architectures:
+                keys.append(self._get_package_key(package_config.package, version, architecture))
+
+        return keys
+
+    def _get_cached_version(self, package: str, version: str) -> Optional[str]:
+        try:
+            constraint = VersionConstraint(version)
+        except ValueError as error:
+            log.warn('Invalid package version', package=package, version=version, error=error)
+            return None
+
+        exact_version = constraint.get_exact_version()
+
+        if exact_version:
+            return exact_version
+
+        return constraint.select(entry['version'] for entry in self._index['entries'].values()
+                                 if entry['name'] == package
+                                 and entry['architecture'] in self._architectures)
+
+    def _get_package_key(self, name: str, version: str, architecture: str) -> str:
+        return f'deb:{name}_{version}_{architecture}'
+
+    def _get_url_key(self, url: str) -> str:
+        return f'url:{url}'
+
+    def _get_object_path(self, checksum: str) -> str:
+        return os.path.join(self._cache_dir, 'objects', checksum[:2], f'{checksum}.deb')
+
+    def _is_valid(self, checksum: str) -> bool:
+        entry = self._index['entries'].get(checksum, {})
+
+        try:
+            stat = os.stat(self._get_object_path(checksum))
+        except OSError:
+            stat = None
+
+        # Files were hashed when stored, an unchanged size and modification time is enough to trust them
+        if stat and stat.st_size == entry.get('size') and stat.st_mtime_ns == entry.get('mtime'):
+            return True
+
+        if stat and 'mtime' not in entry and self._is_intact(checksum):
+            entry['mtime'] = stat.st_mtime_ns
+            return True
+
+        log.warn('Cached package file is missing or corrupted, removing', sha256=checksum)
+        self._remove_entry(checksum)
+        self._save_index()
+
+        return False
+
+    def _is_intact(self, checksum: str) -> bool:
+        object_path = self._get_object_path(checksum)
+        return os.path.isfile(object_path) and get_file_checksum(object_path) == checksum
+
+    def _evict(self) -> None:
+        entries = self._index['entries']
+        total_size = sum(entry['size'] for entry in entries.values())
+
+        for checksum in sorted(entries, key=lambda key: entries[key]['last_used']):
+            if total_size <= self._max_size:
+                break
+            total_size -= entries[checksum]['size']
+            log.info('Evicting package file from cache', package=entries[checksum]['name'], sha256=checksum)
+            self._remove_entry(checksum)
+
+    def _remove_entry(self, checksum: str) -> None:
+        self._index['entries'].pop(checksum, None)
+        self._index['keys'] = {key: value for key, value in self._index['keys'].items() if value != checksum}
+
+        try:
+            os.remove(self._get_object_path(checksum))
+        except OSError:
+            pass
+
+    def _load_index(self) -> dict[str, Any]:
+        try:
+            with open(os.path.join(self._cache_dir, self._INDEX_FILE)) as file:
+                index: dict[str, Any] = json.load(file)
+                return index
+        except Exception:
+            return {'entries': {}, 'keys': {}}
+
+    def _save_index(self) -> None:
+        index_path = os.path.join(self._cache_dir, self._INDEX_FILE)
+
+        try:
+            write_json(index_path, self._index)
+        except Exception as error:
+            log.warn('Failed to save cache index', file=index_path, error=error)
@@ -0,0 +1,106 @@
+# SPDX-FileCopyrightText: 2024 Ferenc Nandor Janky <ferenj@effective-range.com>
+# SPDX-FileCopyrightText: 2024 Attila Gombos <attila.gombos@effective-range.com>
+# SPDX-License-Identifier: MIT
+
+import io
+import tarfile
+from typing import Optional
+
+from context_logger import get_logger
+
+log = get_logger('DebControlParser')
+
+
+class DebControlParser(object):
+    _AR_MAGIC = b'!<arch>\n'
+    _AR_HEADER_SIZE = 60
+    _AR_HEADER_END = b'`\n'
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+        self._skip = 0
+        self._started = False
+        self._done = False
+        self._control: Optional[str] = None
+
+    def feed(self, data: bytes) -> None:
+        if self._done:
+            return
+
+        self._buffer.extend(data)
+
+        try:
+            self._parse()
+        except Exception as error:
+            log.error('Failed to parse package control data', error=error)
+            self._finish()
+
+    def is_done(self) -> bool:
+        return self._done
+
+    def get_control(self) -> Optional[str]:
+        return self._control
+
+    def _parse(self) -> None:
+        if not self._started and not self._parse_magic():
+            return
+
+        while not self._done:
+            if self._skip:
+                skipped = min(self._skip, len(self._buffer))
+                del self._buffer[:skipped]
+                self._skip -= skipped
+                if self._skip:
+                    return
+
+            if len(self._buffer) < self._AR_HEADER_SIZE:
+                return
+
+            name, size = self._parse_header(bytes(self._buffer[:self._AR_HEADER_SIZE]))
+
+            if name.startswith('control.tar'):
+                if len(self._buffer) < self._AR_HEADER_SIZE + size:
+                    return
+                member = bytes(self._buffer[self._AR_HEADER_SIZE:self._AR_HEADER_SIZE + size])
+                self._control = self._extract_control(member)
+                self._finish()
+            elif name.startswith('data.tar'):
+                raise ValueError('Control member is missing')
+            else:
+                del self._buffer[:self._AR_HEADER_SIZE]
+                self._skip = size + size % 2
+
+    def _parse_magic(self) -> bool:
+        if len(self._buffer) < len(self._AR_MAGIC):
+            return False
+
+        if not self._buffer.startswith(self._AR_MAGIC):
+            raise ValueError('Not a Debian package archive')
+
+        del self._buffer[:len(self._AR_MAGIC)]
+        self._started = True
+
+        return True
+
+    def _parse_header(self, header: bytes) -> tuple[str, int]:
+        if header[58:60] != self._AR_HEADER_END:
+            raise ValueError('Invalid archive member header')
+
+        name = header[0:16].decode('ascii').strip().rstrip('/')
+        size = int(header[48:58].decode('ascii').strip())
+
+        return name, size
+
+    def _extract_control(self, member: bytes) -> Optional[str]:
+        with tarfile.open(fileobj=io.BytesIO(member), mode='r:*') as archive:
+            for info in archive:
+                if info.isfile() and info.name.lstrip('./') == 'control':
+                    control_file = archive.extractfile(info)
+                    if control_file:
+                        return control_file.read().decode('utf-8')
+
+        raise ValueError('Control file is missing')
+
+    def _finish(self) -> None:
+        self._done = True
+        self._buffer = bytearray()
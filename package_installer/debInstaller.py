@@ -2,94 +2,483 @@
 # SPDX-FileCopyrightText: 2024 Attila Gombos <attila.gombos@effective-range.com>
 # SPDX-License-Identifier: MIT
 
-from typing import Optional
+import os
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Optional, Callable, Any
 
+import apt_pkg
 from apt import Cache, Package as AptPackage
-from apt.debfile import DebPackage
+from apt.cache import ProblemResolver
 from context_logger import get_logger
 from package_downloader import IDebDownloader, PackageConfig
 
-from package_installer import IDebProvider
+from package_installer import (
+    IDebProvider,
+    DebMetadata,
+    IDebCache,
+    IInstallMetrics,
+    InstallMetrics,
+    ICacheRefresher,
+    CacheRefresher,
+    PlanEntry,
+    IDpkgRunner,
+    DpkgRunner,
+    IRetryPolicy,
+    RetryPolicy,
+)
 
 log = get_logger('DebInstaller')
 
 
 class IDebInstaller(object):
 
+    def prefetch(self, package_configs: list[PackageConfig]) -> None:
+        raise NotImplementedError()
+
     def install(self, package_config: PackageConfig) -> bool:
         raise NotImplementedError()
 
+    def install_batch(self, package_configs: list[PackageConfig]) -> dict[str, bool]:
+        raise NotImplementedError()
+
+    def mark(self, package_config: PackageConfig) -> Optional[PlanEntry]:
+        raise NotImplementedError()
+
 
 class DebInstaller(IDebInstaller):
 
-    def __init__(self, apt_cache: Cache, deb_downloader: IDebDownloader, deb_provider: IDebProvider):
+    def __init__(
+        self,
+        apt_cache: Cache,
+        deb_downloader: IDebDownloader,
+        deb_provider: IDebProvider,
+        download_workers: int = 4,
+        deb_cache: Optional[IDebCache] = None,
+        metrics: Optional[IInstallMetrics] = None,
+        cache_refresher: Optional[ICacheRefresher] = None,
+        dpkg_runner: Optional[IDpkgRunner] = None,
+        retry_policy: Optional[IRetryPolicy] = None,
+    ) -> None:
         self._apt_cache = apt_cache
         self._deb_downloader = deb_downloader
         self._deb_provider = deb_provider
+        self._download_workers = download_workers
+        self._deb_cache = deb_cache
+        self._metrics = metrics or InstallMetrics()
+        self._cache_refresher = cache_refresher or CacheRefresher(apt_cache)
+        self._dpkg_runner = dpkg_runner or DpkgRunner()
+        self._retry_policy = retry_policy or RetryPolicy(self._dpkg_runner)
+        self._download_executor: Optional[ThreadPoolExecutor] = None
+        self._downloads: dict[str, Future[Optional[str]]] = {}
+
+    def prefetch(self, package_configs: list[PackageConfig]) -> None:
+        if self._download_workers < 1:
+            return
+
+        if not self._download_executor:
+            self._download_executor = ThreadPoolExecutor(self._download_workers, thread_name_prefix='DebDownloader')
+
+        for package_config in package_configs:
+            if package_config.package not in self._downloads and not self._find_cached(package_config):
+                log.info('Prefetching package file', package=package_config.package)
+                future = self._download_executor.submit(self._download_package_file, package_config)
+                self._downloads[package_config.package] = future
 
     def install(self, package_config: PackageConfig) -> bool:
+        self._cache_refresher.refresh()
+
         package = self._download_package(package_config)
 
         if not package:
             return False
 
-        version = self._get_package_file_version(package)
+        version = package.version
 
         try:
-            self._prepare_install(package)
+            with self._metrics.measure('install', package.pkgname):
+                self._prepare_install(package)
 
-            log.info('Installing package file', package=package.pkgname, version=version, file=package.filename)
-            package.install()
+                log.info('Installing package file', package=package.pkgname, version=version, file=package.filename)
+                self._retry_policy.run(lambda: self._dpkg_runner.install([package.filename]))
         except Exception as error:
             log.error('Error during installing package file',
                       package=package.pkgname, version=version, file=package.filename, error=error)
+        finally:
+            self._cache_refresher.invalidate()
+
+        with self._metrics.measure('verify', package.pkgname):
+            installed = self._is_package_installed(package)
 
-        if self._is_package_installed(package):
+        if installed:
             log.info('Package file installed successfully',
                      package=package.pkgname, version=version, file=package.filename)
             return True
 
         return False
 
-    def _download_package(self, package_config: PackageConfig) -> Optional[DebPackage]:
-        package_file = self._deb_downloader.download(package_config)
+    def install_batch(self, package_configs: list[PackageConfig]) -> dict[str, bool]:
+        self._cache_refresher.refresh()
 
-        if package_file:
-            return self._deb_provider.get_deb_package(package_file)
+        results: dict[str, bool] = {}
+        packages: dict[str, DebMetadata] = {}
 
-        return None
+        for package_config in package_configs:
+            package = self._download_package(package_config)
+            if package:
+                packages[package_config.package] = package
+            else:
+                results[package_config.package] = False
+
+        packages = self._resolve_batch(packages, results)
+
+        if not packages:
+            return results
+
+        ordered = self._order_packages(list(packages.values()))
+        package_files = [package.filename for package in ordered]
+
+        try:
+            with self._metrics.measure('install'):
+                self._prepare_batch_install(ordered)
+
+                log.info('Installing package files', packages=[package.pkgname for package in ordered],
+                         files=package_files)
+                self._retry_policy.run(lambda: self._dpkg_runner.install(package_files))
+        except Exception as error:
+            log.error('Error during installing package files', files=package_files, error=error)
+        finally:
+            self._cache_refresher.invalidate()
+
+        with self._metrics.measure('verify'):
+            for name, package in packages.items():
+                results[name] = self._is_package_installed(package)
+
+        for name, package in packages.items():
+            version = package.version
+            if results[name]:
+                log.info('Package file installed successfully', package=package.pkgname, version=version,
+                         file=package.filename)
+            else:
+                log.error('Package file is not installed', package=package.pkgname, version=version,
+                          file=package.filename)
+
+        return results
+
+    def mark(self, package_config: PackageConfig) -> Optional[PlanEntry]:
+        self._cache_refresher.refresh()
+
+        package = self._download_package(package_config)
+
+        if not package:
+            return None
+
+        self._mark_changes(package)
+
+        version = package.version
+        apt_package: AptPackage = self._apt_cache.get(package.pkgname)
+        current_version = apt_package.installed.version if apt_package and apt_package.installed else None
+
+        if not current_version:
+            action = 'install'
+        elif apt_pkg.version_compare(version, current_version) > 0:
+            action = 'upgrade'
+        elif apt_pkg.version_compare(version, current_version) < 0:
+            action = 'downgrade'
+        else:
+            action = 'reinstall'
+
+        size = os.path.getsize(package.filename) if os.path.isfile(package.filename) else 0
+
+        return PlanEntry(package.pkgname, action, 'deb', version, current_version, size, package.filename)
+
+    def _download_package(self, package_config: PackageConfig) -> Optional[DebMetadata]:
+        cached_file = self._find_cached(package_config)
+
+        if cached_file:
+            return self._deb_provider.get_deb_package(cached_file)
+
+        package_file = self._get_package_file(package_config)
+
+        if not package_file:
+            return None
+
+        package = self._deb_provider.get_deb_package(package_file)
+
+        if package and self._deb_cache:
+            self._deb_cache.store(
+                package_config,
+                package_file,
+                package.pkgname,
+                package.version,
+                package.architecture,
+            )
+
+        return package
+
+    def _find_cached(self, package_config: PackageConfig) -> Optional[str]:
+        return self._deb_cache.find(package_config) if self._deb_cache else None
+
+    def _get_package_file(self, package_config: PackageConfig) -> Optional[str]:
+        future = self._downloads.pop(package_config.package, None)
+
+        if future:
+            try:
+                return future.result()
+            except Exception as error:
+                log.warn('Failed to prefetch package file, retrying', package=package_config.package, error=error)
+
+        return self._download_package_file(package_config)
+
+    def _download_package_file(self, package_config: PackageConfig) -> Optional[str]:
+        if package_config.file_url and package_config.file_url.startswith('file://'):
+            local_file = package_config.file_url[len('file://'):]
+            return local_file if os.path.isfile(local_file) else None
+
+        with self._metrics.measure('download', package_config.package):
+            package_file: Optional[str] = self._deb_downloader.download(package_config)
+
+        if package_file and os.path.isfile(package_file):
+            self._metrics.increment('download_bytes', os.path.getsize(package_file))
+
+        return package_file
+
+    def _prepare_install(self, deb_package: DebMetadata) -> None:
+        changes = self._mark_changes(deb_package)
+
+        if changes:
+            self._commit_changes([deb_package.pkgname], changes, lambda: self._mark_changes(deb_package))
+
+    def _resolve_batch(self, packages: dict[str, DebMetadata], results: dict[str, bool]) -> dict[str, DebMetadata]:
+        resolvable = dict(packages)
+
+        while True:
+            provided = self._get_provided(list(resolvable.values()))
+            unresolvable = [name for name, package in resolvable.items() if not self._is_resolvable(package, provided)]
+
+            if not unresolvable:
+                return resolvable
+
+            for name in unresolvable:
+                log.error('Package file dependencies cannot be resolved, skipping', package=name,
+                          file=resolvable[name].filename)
+                results[name] = False
+                del resolvable[name]
+
+    def _is_resolvable(self, package: DebMetadata, provided: dict[str, str]) -> bool:
+        return all(
+            self._is_provided(depends, provided)
+            or self._is_dependency_satisfied(depends)
+            or self._is_dependency_available(depends)
+            for depends in package.depends
+        )
+
+    def _prepare_batch_install(self, deb_packages: list[DebMetadata]) -> None:
+        changes = self._mark_batch_changes(deb_packages)
 
-    def _get_package_file_version(self, package: DebPackage) -> str:
-        return package._sections['Version']
+        if changes:
+            self._commit_changes([package.pkgname for package in deb_packages], changes,
+                                 lambda: self._mark_batch_changes(deb_packages))
 
-    def _prepare_install(self, deb_package: DebPackage) -> None:
-        if not deb_package.check_conflicts():
-            self._remove_conflicting_packages(deb_package)
+    def _mark_batch_changes(self, deb_packages: list[DebMetadata]) -> list[AptPackage]:
+        provided = self._get_provided(deb_packages)
+        changes: list[AptPackage] = []
+
+        for deb_package in deb_packages:
+            changes.extend(self._collect_changes(deb_package, provided))
+
+        if changes:
+            self._resolve_changes(changes)
+
+        return changes
+
+    def _get_provided(self, deb_packages: list[DebMetadata]) -> dict[str, str]:
+        provided: dict[str, str] = {}
+
+        for package in deb_packages:
+            for provides in package.provides:
+                for name, version, _ in provides:
+                    provided.setdefault(name, version)
+
+        provided.update({package.pkgname: package.version for package in deb_packages})
+
+        return provided
+
+    def _order_packages(self, deb_packages: list[DebMetadata]) -> list[DebMetadata]:
+        packages: dict[str, DebMetadata] = {}
+
+        for package in deb_packages:
+            for provides in package.provides:
+                for name, _, _ in provides:
+                    packages.setdefault(name, package)
+
+        packages.update({package.pkgname: package for package in deb_packages})
+        ordered: list[DebMetadata] = []
+
+        for package in deb_packages:
+            self._add_ordered(package, packages, ordered, set())
+
+        return ordered
+
+    def _add_ordered(
+        self, package: DebMetadata, packages: dict[str, DebMetadata], ordered: list[DebMetadata], visiting: set[str]
+    ) -> None:
+        if package in ordered or package.pkgname in visiting:
+            return
+
+        visiting.add(package.pkgname)
+
+        for depends in package.depends:
+            for dependency, _, _ in depends:
+                if dependency in packages:
+                    self._add_ordered(packages[dependency], packages, ordered, visiting)
+
+        ordered.append(package)
+
+    def _mark_changes(self, deb_package: DebMetadata) -> list[AptPackage]:
+        changes = self._collect_changes(deb_package)
+
+        if changes:
+            self._resolve_changes(changes)
+
+        return changes
+
+    def _collect_changes(
+        self, deb_package: DebMetadata, provided: Optional[dict[str, str]] = None
+    ) -> list[AptPackage]:
+        changes: list[AptPackage] = []
+
+        if deb_package.conflicts:
+            changes.extend(self._mark_conflicting_packages(deb_package))
 
         if deb_package.depends:
-            self._install_missing_dependencies(deb_package)
+            changes.extend(self._mark_missing_dependencies(deb_package, provided or {}))
+
+        return changes
+
+    def _resolve_changes(self, changes: list[AptPackage]) -> None:
+        resolver = ProblemResolver(self._apt_cache)
+
+        for apt_package in changes:
+            resolver.protect(apt_package)
+
+        try:
+            resolver.resolve()
+        except Exception:
+            self._apt_cache.clear()
+            raise
+
+    def _mark_conflicting_packages(self, package: DebMetadata) -> list[AptPackage]:
+        removals = []
 
-    def _remove_conflicting_packages(self, package: DebPackage) -> None:
         for conflict in package.conflicts:
-            conflicting = conflict[0][0]
-            apt_package = self._apt_cache.get(conflicting)
-            if apt_package and apt_package.is_installed:
-                log.info('Removing conflicting package', package=package.pkgname, conflict=conflicting)
-                apt_package.mark_delete()
-                self._apt_cache.commit()
-        self._apt_cache.open()
-
-    def _install_missing_dependencies(self, package: DebPackage) -> None:
+            for conflicting, version, operator in conflict:
+                apt_package = self._apt_cache.get(conflicting)
+                if (
+                    apt_package
+                    and apt_package.is_installed
+                    and conflicting != package.pkgname
+                    and self._is_version_matching(apt_package.installed.version, operator, version)
+                ):
+                    log.info('Removing conflicting package', package=package.pkgname, conflict=conflicting)
+                    apt_package.mark_delete(auto_fix=False)
+                    removals.append(apt_package)
+
+        return removals
+
+    def _mark_missing_dependencies(self, package: DebMetadata, provided: dict[str, str]) -> list[AptPackage]:
+        installs = []
+
         for depends in package.depends:
-            dependency = depends[0][0]
-            apt_package = self._apt_cache.get(dependency)
-            if apt_package and not apt_package.is_installed:
-                log.info('Installing missing dependency', package=package.pkgname, dependency=dependency)
-                apt_package.mark_install()
-                self._apt_cache.commit()
-        self._apt_cache.open()
-
-    def _is_package_installed(self, package: DebPackage) -> bool:
-        self._apt_cache.open()
-        apt_package: AptPackage = self._apt_cache.get(package.pkgname)
-        return apt_package.is_installed if apt_package else False
+            if self._is_provided(depends, provided) or self._is_dependency_satisfied(depends):
+                continue
+
+            apt_package = self._select_dependency(depends)
+
+            if apt_package:
+                log.info('Installing missing dependency', package=package.pkgname, dependency=apt_package.name,
+                         version=apt_package.candidate.version if apt_package.candidate else None)
+                apt_package.mark_install(auto_fix=False)
+                installs.append(apt_package)
+            else:
+                log.warn('Dependency is not available', package=package.pkgname,
+                         dependency=[dependency for dependency, _, _ in depends])
+
+        return installs
+
+    def _is_dependency_satisfied(self, depends: list[tuple[str, str, str]]) -> bool:
+        for dependency, version, operator in depends:
+            for apt_package in self._get_dependency_packages(dependency, version):
+                installed = apt_package.installed if apt_package.is_installed else None
+                if installed and self._is_version_matching(installed.version, operator, version):
+                    return True
+                candidate = apt_package.candidate if apt_package.marked_install else None
+                if candidate and self._is_version_matching(candidate.version, operator, version):
+                    return True
+
+        return False
+
+    def _is_provided(self, depends: list[tuple[str, str, str]], provided: dict[str, str]) -> bool:
+        return any(
+            dependency in provided and self._is_version_matching(provided[dependency], operator, version)
+            for dependency, version, operator in depends
+        )
+
+    def _is_dependency_available(self, depends: list[tuple[str, str, str]]) -> bool:
+        for dependency, version, operator in depends:
+            for apt_package in self._get_dependency_packages(dependency, version):
+                if any(
+                    self._is_version_matching(candidate.version, operator, version)
+                    for candidate in apt_package.versions
+                ):
+                    return True
+
+        return False
+
+    def _select_dependency(self, depends: list[tuple[str, str, str]]) -> Optional[AptPackage]:
+        for dependency, version, operator in depends:
+            for apt_package in self._get_dependency_packages(dependency, version):
+                matching = [
+                    candidate for candidate in apt_package.versions
+                    if self._is_version_matching(candidate.version, operator, version)
+                ]
+
+                if matching:
+                    apt_package.candidate = max(matching)
+                    return apt_package
+
+        return None
+
+    def _get_dependency_packages(self, dependency: str, version: str) -> list[AptPackage]:
+        apt_package: Optional[AptPackage] = self._apt_cache.get(dependency)
+
+        if apt_package:
+            return [apt_package]
+
+        # Virtual packages (awk, mail-transport-agent) are only reachable through their providers, whose own versions
+        # say nothing about the virtual one, so versioned dependencies are not matched this way
+        if version:
+            return []
+
+        return list(self._apt_cache.get_providing_packages(dependency, candidate_only=False))
+
+    def _is_version_matching(self, version: str, operator: str, required: str) -> bool:
+        return not required or apt_pkg.check_dep(version, operator, required)
+
+    def _commit_changes(self, packages: list[str], changes: list[AptPackage], mark: Callable[[], Any]) -> None:
+        try:
+            log.info('Committing dependency changes', packages=packages,
+                     changes=[apt_package.name for apt_package in changes])
+            self._retry_policy.run(self._apt_cache.commit, lambda: self._mark_again(mark))
+        except Exception:
+            self._apt_cache.clear()
+            raise
+        finally:
+            self._cache_refresher.invalidate()
+
+    def _is_package_installed(self, package: DebMetadata) -> bool:
+        return self._cache_refresher.get_installed_version(package.pkgname) is not None
+
+    def _mark_again(self, mark: Callable[[], Any]) -> None:
+        self._cache_refresher.invalidate()
+        self._cache_refresher.refresh()
+        mark()
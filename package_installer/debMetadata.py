@@ -0,0 +1,32 @@
+# SPDX-FileCopyrightText: 2024 Ferenc Nandor Janky <ferenj@effective-range.com>
+# SPDX-FileCopyrightText: 2024 Attila Gombos <attila.gombos@effective-range.com>
+# SPDX-License-Identifier: MIT
+
+from typing import Optional
+
+Dependency = list[tuple[str, str, str]]
+
+
+class DebMetadata(object):
+    __slots__ = ('filename', 'pkgname', 'version', 'architecture', 'depends', 'conflicts', 'provides')
+
+    def __init__(
+        self,
+        filename: str,
+        pkgname: str,
+        version: str,
+        architecture: str = 'all',
+        depends: Optional[list[Dependency]] = None,
+        conflicts: Optional[list[Dependency]] = None,
+        provides: Optional[list[Dependency]] = None,
+    ) -> None:
+        self.filename = filename
+        self.pkgname = pkgname
+        self.version = version
+        self.architecture = architecture
+        self.depends = depends or []
+        self.conflicts = conflicts or []
+        self.provides = provides or []
+
+    def __repr__(self) -> str:
+        return f'DebMetadata(pkgname={self.pkgname!r}, version={self.version!r}, filename={self.filename!r})'
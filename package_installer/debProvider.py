@@ -4,27 +4,57 @@
 
 from typing import Optional
 
-from apt import Cache
-from apt.debfile import DebPackage
+import apt_pkg
+from apt_inst import DebFile
 from context_logger import get_logger
 
+from package_installer import IDebStreamDownloader, DebMetadata
+
 log = get_logger('DebPackageProvider')
 
 
 class IDebProvider(object):
 
-    def get_deb_package(self, package_file: str) -> Optional[DebPackage]:
+    def get_deb_package(self, package_file: str) -> Optional[DebMetadata]:
         raise NotImplementedError()
 
 
 class DebProvider(IDebProvider):
 
-    def __init__(self, apt_cache: Cache):
-        self._apt_cache = apt_cache
+    def __init__(self, stream_downloader: Optional[IDebStreamDownloader] = None) -> None:
+        self._stream_downloader = stream_downloader
 
-    def get_deb_package(self, package_file: str) -> Optional[DebPackage]:
+    def get_deb_package(self, package_file: str) -> Optional[DebMetadata]:
         try:
-            return DebPackage(package_file, cache=self._apt_cache)
+            control = self._stream_downloader.get_control(package_file) if self._stream_downloader else None
+
+            if not control:
+                control = self._read_control(package_file)
+
+            return self._create_metadata(package_file, control)
         except Exception as error:
             log.error('Error while reading package file', file=package_file, error=error)
             return None
+
+    def _read_control(self, package_file: str) -> str:
+        # Seeks to the control member only, data.tar is neither read nor extracted
+        control: bytes = DebFile(package_file).control.extractdata('control')
+        return control.decode('utf-8')
+
+    def _create_metadata(self, package_file: str, control: str) -> DebMetadata:
+        section = apt_pkg.TagSection(control)
+
+        return DebMetadata(
+            package_file,
+            section['Package'],
+            section['Version'],
+            section.get('Architecture', 'all'),
+            self._parse_relations(section, 'Depends') + self._parse_relations(section, 'Pre-Depends'),
+            self._parse_relations(section, 'Conflicts'),
+            self._parse_relations(section, 'Provides'),
+        )
+
+    def _parse_relations(self, section: 'apt_pkg.TagSection[str]', field: str) -> list[list[tuple[str, str, str]]]:
+        value = section.get(field)
+        # Multi-arch qualifiers are stripped, python3:any has to be looked up as python3 in the apt cache
+        return apt_pkg.parse_depends(value, True) if value else []
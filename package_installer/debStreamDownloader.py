@@ -0,0 +1,117 @@
+# SPDX-FileCopyrightText: 2024 Ferenc Nandor Janky <ferenj@effective-range.com>
+# SPDX-FileCopyrightText: 2024 Attila Gombos <attila.gombos@effective-range.com>
+# SPDX-License-Identifier: MIT
+
+import hashlib
+import os
+from threading import Lock
+from typing import Optional, BinaryIO, Any
+
+from context_logger import get_logger
+from package_downloader import IDebDownloader, PackageConfig
+from requests import Session, Response
+
+from package_installer import IAssetResolver, AssetInfo, DebControlParser
+
+log = get_logger('DebStreamDownloader')
+
+
+class IDebStreamDownloader(IDebDownloader):
+
+    def get_control(self, package_file: str) -> Optional[str]:
+        raise NotImplementedError()
+
+
+class DebStreamDownloader(IDebStreamDownloader):
+
+    def __init__(
+        self,
+        asset_resolver: IAssetResolver,
+        session: Session,
+        download_dir: str,
+        deb_downloader: Optional[IDebDownloader] = None,
+        chunk_size: int = 64 * 1024,
+        timeout: float = 30,
+    ) -> None:
+        self._asset_resolver = asset_resolver
+        self._session = session
+        self._download_dir = download_dir
+        self._deb_downloader = deb_downloader
+        self._chunk_size = chunk_size
+        self._timeout = timeout
+        self._controls: dict[str, str] = {}
+        self._lock = Lock()
+
+    def download(self, package_config: PackageConfig) -> Optional[str]:
+        asset = self._asset_resolver.resolve(package_config)
+
+        if not asset:
+            if self._deb_downloader:
+                log.info('Falling back to staged download', package=package_config.package)
+                package_file: Optional[str] = self._deb_downloader.download(package_config)
+                return package_file
+            return None
+
+        try:
+            return self._stream(package_config, asset)
+        except Exception as error:
+            log.error('Failed to download package file', package=package_config.package, url=asset.url, error=error)
+            return None
+
+    def get_control(self, package_file: str) -> Optional[str]:
+        with self._lock:
+            return self._controls.get(package_file)
+
+    def _stream(self, package_config: PackageConfig, asset: AssetInfo) -> Optional[str]:
+        package_file = os.path.join(self._download_dir, asset.name)
+        partial_file = f'{package_file}.part'
+
+        os.makedirs(self._download_dir, exist_ok=True)
+
+        log.info('Streaming package file', package=package_config.package, url=asset.url, file=package_file)
+
+        try:
+            checksum, control = self._transfer(asset, partial_file)
+        except Exception:
+            self._discard(asset, partial_file)
+            raise
+
+        if asset.sha256 and checksum != asset.sha256.lower():
+            log.error('Package file checksum mismatch', package=package_config.package,
+                      expected=asset.sha256, actual=checksum)
+            os.remove(partial_file)
+            return None
+
+        os.replace(partial_file, package_file)
+
+        with self._lock:
+            if control:
+                self._controls[package_file] = control
+            else:
+                self._controls.pop(package_file, None)
+
+        log.info('Package file downloaded', package=package_config.package, file=package_file,
+                 sha256=checksum, verified=asset.sha256 is not None)
+
+        return package_file
+
+    def _transfer(self, asset: AssetInfo, partial_file: str) -> tuple[str, Optional[str]]:
+        digest = hashlib.sha256()
+        parser = DebControlParser()
+
+        with self._session.get(asset.url, stream=True, timeout=self._timeout) as response:
+            response.raise_for_status()
+            with open(partial_file, 'wb') as file:
+                self._write_chunks(response, file, digest, parser)
+
+        return digest.hexdigest(), parser.get_control()
+
+    def _write_chunks(self, response: Response, file: BinaryIO, digest: Any, parser: DebControlParser) -> None:
+        for chunk in response.iter_content(self._chunk_size):
+            file.write(chunk)
+            digest.update(chunk)
+            parser.feed(chunk)
+
+    def _discard(self, asset: AssetInfo, partial_file: str) -> None:
+        if os.path.exists(partial_file):
+            os.remove(partial_file)
@@ -0,0 +1,39 @@
+# SPDX-FileCopyrightText: 2024 Ferenc Nandor Janky <ferenj@effective-range.com>
+# SPDX-FileCopyrightText: 2024 Attila Gombos <attila.gombos@effective-range.com>
+# SPDX-License-Identifier: MIT
+
+import subprocess
+
+from context_logger import get_logger
+
+log = get_logger('DpkgRunner')
+
+
+class IDpkgRunner(object):
+
+    def install(self, package_files: list[str]) -> None:
+        raise NotImplementedError()
+
+    def remove(self, package_names: list[str]) -> None:
+        raise NotImplementedError()
+
+    def configure_pending(self) -> None:
+        raise NotImplementedError()
+
+
+class DpkgRunner(IDpkgRunner):
+
+    def install(self, package_files: list[str]) -> None:
+        log.info('Installing package files', files=package_files)
+        self._run(['dpkg', '--install'] + package_files)
+
+    def remove(self, package_names: list[str]) -> None:
+        log.info('Removing packages', packages=package_names)
+        self._run(['dpkg', '--remove'] + package_names)
+
+    def configure_pending(self) -> None:
+        log.info('Configuring unpacked and interrupted packages')
+        self._run(['dpkg', '--configure', '-a'])
+
+    def _run(self, command: list[str]) -> None:
+        subprocess.run(command, check=True)
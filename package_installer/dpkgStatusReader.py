@@ -0,0 +1,118 @@
+# SPDX-FileCopyrightText: 2024 Ferenc Nandor Janky <ferenj@effective-range.com>
+# SPDX-FileCopyrightText: 2024 Attila Gombos <attila.gombos@effective-range.com>
+# SPDX-License-Identifier: MIT
+
+import os
+from typing import Optional
+
+from context_logger import get_logger
+
+log = get_logger('DpkgStatusReader')
+
+
+class IDpkgStatusReader(object):
+
+    def get_installed_versions(self) -> dict[str, str]:
+        raise NotImplementedError()
+
+    def get_missing(self, requirements: dict[str, Optional[str]]) -> list[str]:
+        raise NotImplementedError()
+
+    def is_interrupted(self) -> bool:
+        raise NotImplementedError()
+
+
+class DpkgStatusReader(IDpkgStatusReader):
+    _PENDING_STATES = ('unpacked', 'half-configured', 'half-installed', 'triggers-awaited', 'triggers-pending')
+
+    def __init__(self, status_file: str = '/var/lib/dpkg/status') -> None:
+        self._status_file = status_file
+
+    def get_installed_versions(self) -> dict[str, str]:
+        installed: dict[str, str] = {}
+
+        for paragraph in self._read_paragraphs():
+            name = self._get_field(paragraph, 'Package')
+            version = self._get_field(paragraph, 'Version')
+            status = self._get_field(paragraph, 'Status')
+            self._add_installed(installed, name, version, status.split() if status else None)
+
+        return installed
+
+    def get_missing(self, requirements: dict[str, Optional[str]]) -> list[str]:
+        installed = self.get_installed_versions()
+        missing: list[str] = []
+
+        for package, version in requirements.items():
+            installed_version = installed.get(package)
+            if installed_version is None or (version and not self._is_version_matching(installed_version, version)):
+                log.info('Package is not installed', package=package, version=version,
+                         installed_version=installed_version)
+                missing.append(package)
+
+        return missing
+
+    def is_interrupted(self) -> bool:
+        # Journal entries not yet merged into the status file are left behind by an interrupted dpkg run
+        updates_dir = os.path.join(os.path.dirname(self._status_file), 'updates')
+
+        try:
+            if any(name.isdigit() for name in os.listdir(updates_dir)):
+                log.warn('Found unprocessed dpkg journal entries', directory=updates_dir)
+                return True
+        except OSError:
+            pass
+
+        pending = []
+
+        for paragraph in self._read_paragraphs():
+            status = self._get_field(paragraph, 'Status')
+            if status and status.split()[-1] in self._PENDING_STATES:
+                pending.append(self._get_field(paragraph, 'Package'))
+
+        if pending:
+            log.warn('Found packages with pending dpkg operations', packages=pending)
+
+        return bool(pending)
+
+    def _read_paragraphs(self) -> list[str]:
+        try:
+            with open(self._status_file, encoding='utf-8', errors='replace') as file:
+                return file.read().split('\n\n')
+        except Exception as error:
+            log.warn('Failed to read dpkg status', file=self._status_file, error=error)
+            return []
+
+    def _is_version_matching(self, installed_version: str, version: str) -> bool:
+        if version == installed_version:
+            return True
+
+        # Loads apt_pkg only when a version constraint has to be evaluated
+        from package_installer import VersionConstraint
+
+        try:
+            return VersionConstraint(version).matches(installed_version)
+        except ValueError as error:
+            log.warn('Invalid package version', version=version, error=error)
+            return False
+
+    def _add_installed(
+        self, installed: dict[str, str], name: Optional[str], version: Optional[str], status: Optional[list[str]]
+    ) -> None:
+        if name and version and status and status[-1] == 'installed':
+            installed[name] = version
+
+    def _get_field(self, paragraph: str, field: str) -> Optional[str]:
+        prefix = f'{field}: '
+
+        if paragraph.startswith(prefix):
+            start = len(prefix)
+        else:
+            start = paragraph.find(f'\n{prefix}')
+            if start < 0:
+                return None
+            start += len(prefix) + 1
+
+        end = paragraph.find('\n', start)
+
+        return paragraph[start:end if end >= 0 else None].strip()
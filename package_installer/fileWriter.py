@@ -0,0 +1,32 @@
+# SPDX-FileCopyrightText: 2024 Ferenc Nandor Janky <ferenj@effective-range.com>
+# SPDX-FileCopyrightText: 2024 Attila Gombos <attila.gombos@effective-range.com>
+# SPDX-License-Identifier: MIT
+
+import hashlib
+import json
+import os
+from typing import Any
+
+
+def get_file_checksum(file_path: str) -> str:
+    checksum = hashlib.sha256()
+
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            checksum.update(chunk)
+
+    return checksum.hexdigest()
+
+
+def write_file(file_path: str, content: str) -> None:
+    # Readers never see a partially written file, the temporary file replaces the target in one step
+    os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+
+    with open(f'{file_path}.tmp', 'w') as file:
+        file.write(content)
+
+    os.replace(f'{file_path}.tmp', file_path)
+
+
+def write_json(file_path: str, data: Any) -> None:
+    write_file(file_path, json.dumps(data))
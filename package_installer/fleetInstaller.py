@@ -0,0 +1,162 @@
+# SPDX-FileCopyrightText: 2024 Ferenc Nandor Janky <ferenj@effective-range.com>
+# SPDX-FileCopyrightText: 2024 Attila Gombos <attila.gombos@effective-range.com>
+# SPDX-License-Identifier: MIT
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from tempfile import TemporaryDirectory
+from typing import Optional, Any
+
+from common_utility.jsonLoader import IJsonLoader
+from context_logger import get_logger
+from package_downloader import PackageConfig
+
+from package_installer import IInstallPlanner, IFleetTransport
+
+log = get_logger('FleetInstaller')
+
+
+@dataclass
+class HostResult:
+    host: str
+    success: bool
+    packages: dict[str, bool] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+class IFleetInstaller(object):
+
+    def install(self, package_config_path: str, source_config_path: Optional[str] = None) -> dict[str, HostResult]:
+        raise NotImplementedError()
+
+
+class FleetInstaller(IFleetInstaller):
+    _PACKAGE_CONFIG_FILE = 'package-config.json'
+    _SOURCE_CONFIG_FILE = 'source-config.json'
+    _RESULTS_FILE = 'results.json'
+
+    def __init__(
+        self,
+        json_loader: IJsonLoader,
+        install_planner: IInstallPlanner,
+        transport: IFleetTransport,
+        hosts: list[str],
+        remote_dir: str = '/tmp/packages',
+        max_workers: int = 8,
+        installer_command: Optional[list[str]] = None,
+    ) -> None:
+        self._json_loader = json_loader
+        self._install_planner = install_planner
+        self._transport = transport
+        self._hosts = hosts
+        self._remote_dir = remote_dir
+        self._max_workers = max_workers
+        self._installer_command = installer_command or ['debian-package-installer.py']
+
+    def install(self, package_config_path: str, source_config_path: Optional[str] = None) -> dict[str, HostResult]:
+        config_list = self._json_loader.load_list(package_config_path, PackageConfig)
+
+        with open(package_config_path) as file:
+            raw_configs: list[dict[str, Any]] = json.load(file)
+
+        plan = self._install_planner.plan(config_list)
+        artifacts = {entry.package: entry.file for entry in plan.entries if entry.source == 'deb' and entry.file}
+
+        with TemporaryDirectory() as work_dir:
+            files = self._prepare_files(work_dir, config_list, raw_configs, artifacts, source_config_path)
+
+            log.info('Installing on fleet', hosts=len(self._hosts), workers=self._max_workers,
+                     artifacts=len(artifacts), download_size=plan.get_download_size())
+
+            with ThreadPoolExecutor(self._max_workers, thread_name_prefix='FleetInstaller') as executor:
+                futures = {host: executor.submit(self._install_host, host, files) for host in self._hosts}
+                results = {host: future.result() for host, future in futures.items()}
+
+        succeeded = [host for host, result in results.items() if result.success]
+        log.info('Fleet installation finished', succeeded=len(succeeded), failed=len(results) - len(succeeded))
+
+        return results
+
+    def _prepare_files(
+        self,
+        work_dir: str,
+        config_list: list[PackageConfig],
+        raw_configs: list[dict[str, Any]],
+        artifacts: dict[str, str],
+        source_config_path: Optional[str],
+    ) -> dict[str, str]:
+        files = {self._get_remote_path(os.path.basename(file)): file for file in artifacts.values()}
+
+        target_configs = []
+
+        for config, raw_config in zip(config_list, raw_configs):
+            package_file = artifacts.get(config.package)
+            if package_file:
+                remote_file = self._get_remote_path(os.path.basename(package_file))
+                raw_config = {key: value for key, value in raw_config.items() if key != 'release'}
+                raw_config['file_url'] = f'file://{remote_file}'
+            target_configs.append(raw_config)
+
+        files[self._get_remote_path(self._PACKAGE_CONFIG_FILE)] = self._write_json(
+            work_dir, self._PACKAGE_CONFIG_FILE, target_configs
+        )
+
+        if source_config_path:
+            files[self._get_remote_path(self._SOURCE_CONFIG_FILE)] = source_config_path
+
+        return files
+
+    def _install_host(self, host: str, files: dict[str, str]) -> HostResult:
+        try:
+            for remote_file, local_file in files.items():
+                self._transport.upload(host, local_file, remote_file)
+
+            result = self._transport.run(host, self._get_install_command(files))
+
+            if result.return_code != 0:
+                raise RuntimeError(f'Installer exited with code {result.return_code}')
+
+            packages = self._read_results(host)
+            success = all(packages.values())
+
+            log.info('Host installation finished', host=host, success=success, packages=packages)
+
+            return HostResult(host, success, packages)
+        except Exception as error:
+            log.error('Host installation failed', host=host, error=error)
+            return HostResult(host, False, error=str(error))
+
+    def _get_install_command(self, files: dict[str, str]) -> list[str]:
+        command = self._installer_command + [
+            self._get_remote_path(self._PACKAGE_CONFIG_FILE),
+            '--download', self._remote_dir,
+            '--output', self._get_remote_path(self._RESULTS_FILE),
+        ]
+
+        if self._get_remote_path(self._SOURCE_CONFIG_FILE) in files:
+            command += ['--source-config', self._get_remote_path(self._SOURCE_CONFIG_FILE)]
+
+        return command
+
+    def _read_results(self, host: str) -> dict[str, bool]:
+        result = self._transport.run(host, ['cat', self._get_remote_path(self._RESULTS_FILE)])
+
+        if result.return_code != 0:
+            raise RuntimeError('Failed to read installation results')
+
+        packages: dict[str, bool] = json.loads(result.output)
+
+        return packages
+
+    def _get_remote_path(self, file_name: str) -> str:
+        return os.path.join(self._remote_dir, file_name)
+
+    def _write_json(self, work_dir: str, file_name: str, data: Any) -> str:
+        file_path = os.path.join(work_dir, file_name)
+
+        with open(file_path, 'w') as file:
+            json.dump(data, file, indent=2)
+
+        return file_path
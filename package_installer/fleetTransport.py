@@ -0,0 +1,49 @@
+# SPDX-FileCopyrightText: 2024 Ferenc Nandor Janky <ferenj@effective-range.com>
+# SPDX-FileCopyrightText: 2024 Attila Gombos <attila.gombos@effective-range.com>
+# SPDX-License-Identifier: MIT
+
+import os
+import shlex
+import subprocess
+from dataclasses import dataclass
+from typing import Optional
+
+from context_logger import get_logger
+
+log = get_logger('FleetTransport')
+
+
+@dataclass
+class CommandResult:
+    return_code: int
+    output: str
+
+
+class IFleetTransport(object):
+
+    def upload(self, host: str, local_file: str, remote_file: str) -> None:
+        raise NotImplementedError()
+
+    def run(self, host: str, command: list[str]) -> CommandResult:
+        raise NotImplementedError()
+
+
+class SshTransport(IFleetTransport):
+
+    def __init__(self, user: Optional[str] = None, options: Optional[list[str]] = None) -> None:
+        self._user = user
+        self._options = options if options is not None else ['-o', 'BatchMode=yes']
+
+    def upload(self, host: str, local_file: str, remote_file: str) -> None:
+        self._run(['ssh', *self._options, self._get_target(host), 'mkdir', '-p', os.path.dirname(remote_file)])
+        self._run(['scp', '-q', *self._options, local_file, f'{self._get_target(host)}:{remote_file}'])
+
+    def run(self, host: str, command: list[str]) -> CommandResult:
+        result = self._run(['ssh', *self._options, self._get_target(host), shlex.join(command)], check=False)
+        return CommandResult(result.returncode, result.stdout)
+
+    def _get_target(self, host: str) -> str:
+        return f'{self._user}@{host}' if self._user else host
+
+    def _run(self, command: list[str], check: bool = True) -> 'subprocess.CompletedProcess[str]':
+        return subprocess.run(command, check=check, capture_output=True, text=True)
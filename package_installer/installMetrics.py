@@ -0,0 +1,140 @@
+# SPDX-FileCopyrightText: 2024 Ferenc Nandor Janky <ferenj@effective-range.com>
+# SPDX-FileCopyrightText: 2024 Attila Gombos <attila.gombos@effective-range.com>
+# SPDX-License-Identifier: MIT
+
+import json
+import time
+from contextlib import contextmanager
+from threading import Lock
+from typing import Optional, Any, Iterator, ContextManager
+
+from context_logger import get_logger
+
+from package_installer import write_file
+
+log = get_logger('InstallMetrics')
+
+
+class IInstallMetrics(object):
+
+    def measure(self, phase: str, package: Optional[str] = None) -> ContextManager[None]:
+        raise NotImplementedError()
+
+    def increment(self, counter: str, value: int = 1) -> None:
+        raise NotImplementedError()
+
+    def record_source(self, source: str, duration: float, success: bool) -> None:
+        raise NotImplementedError()
+
+    def get_report(self) -> dict[str, Any]:
+        raise NotImplementedError()
+
+    def write_report(self, file_path: str, output_format: str = 'json') -> None:
+        raise NotImplementedError()
+
+
+class InstallMetrics(IInstallMetrics):
+
+    def __init__(self) -> None:
+        self._start = time.perf_counter()
+        self._lock = Lock()
+        self._phases: dict[str, float] = {}
+        self._packages: dict[str, dict[str, float]] = {}
+        self._counters: dict[str, int] = {}
+        self._sources: dict[str, dict[str, Any]] = {}
+
+    @contextmanager
+    def measure(self, phase: str, package: Optional[str] = None) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add_duration(phase, package, time.perf_counter() - start)
+
+    def increment(self, counter: str, value: int = 1) -> None:
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + value
+
+    def record_source(self, source: str, duration: float, success: bool) -> None:
+        with self._lock:
+            self._sources[source] = {'duration': duration, 'success': success}
+
+    def get_report(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                'duration': round(time.perf_counter() - self._start, 6),
+                'phases': {phase: round(duration, 6) for phase, duration in self._phases.items()},
+                'packages': {
+                    package: {phase: round(duration, 6) for phase, duration in phases.items()}
+                    for package, phases in self._packages.items()
+                },
+                'sources': {
+                    source: {'duration': round(fetch['duration'], 6), 'success': fetch['success']}
+                    for source, fetch in self._sources.items()
+                },
+                'counters': dict(self._counters),
+            }
+
+    def write_report(self, file_path: str, output_format: str = 'json') -> None:
+        report = self.get_report()
+
+        if output_format == 'prometheus':
+            content = self._format_prometheus(report)
+        else:
+            content = json.dumps(report, indent=2) + '\n'
+
+        try:
+            write_file(file_path, content)
+            log.info('Metrics report written', file=file_path, format=output_format)
+        except Exception as error:
+            log.error('Failed to write metrics report', file=file_path, error=error)
+
+    def _add_duration(self, phase: str, package: Optional[str], duration: float) -> None:
+        with self._lock:
+            self._phases[phase] = self._phases.get(phase, 0.0) + duration
+            if package:
+                phases = self._packages.setdefault(package, {})
+                phases[phase] = phases.get(phase, 0.0) + duration
+
+    def _format_prometheus(self, report: dict[str, Any]) -> str:
+        lines = [
+            '# HELP package_installer_duration_seconds Duration of the installer run',
+            '# TYPE package_installer_duration_seconds gauge',
+            f'package_installer_duration_seconds {report["duration"]}',
+            '# HELP package_installer_phase_duration_seconds Duration of installer phases',
+            '# TYPE package_installer_phase_duration_seconds gauge',
+        ]
+
+        for phase, duration in report['phases'].items():
+            lines.append(f'package_installer_phase_duration_seconds{{phase="{phase}"}} {duration}')
+
+        lines.extend([
+            '# HELP package_installer_package_phase_duration_seconds Duration of installer phases per package',
+            '# TYPE package_installer_package_phase_duration_seconds gauge',
+        ])
+
+        for package, phases in report['packages'].items():
+            for phase, duration in phases.items():
+                lines.append(
+                    f'package_installer_package_phase_duration_seconds{{package="{package}",phase="{phase}"}} '
+                    f'{duration}'
+                )
+
+        lines.extend([
+            '# HELP package_installer_source_fetch_duration_seconds Duration of package list fetch per source',
+            '# TYPE package_installer_source_fetch_duration_seconds gauge',
+        ])
+
+        for source, fetch in report['sources'].items():
+            lines.append(
+                f'package_installer_source_fetch_duration_seconds{{source="{source}",'
+                f'success="{str(fetch["success"]).lower()}"}} {fetch["duration"]}'
+            )
+
+        for counter, value in report['counters'].items():
+            lines.extend([
+                f'# TYPE package_installer_{counter}_total counter',
+                f'package_installer_{counter}_total {value}',
+            ])
+
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,41 @@
+# SPDX-FileCopyrightText: 2024 Ferenc Nandor Janky <ferenj@effective-range.com>
+# SPDX-FileCopyrightText: 2024 Attila Gombos <attila.gombos@effective-range.com>
+# SPDX-License-Identifier: MIT
+
+from dataclasses import dataclass, field, asdict
+from typing import Optional, Any
+
+
+@dataclass
+class PlanEntry:
+    package: str
+    action: str
+    source: str
+    version: Optional[str] = None
+    current_version: Optional[str] = None
+    size: int = 0
+    file: Optional[str] = None
+
+
+@dataclass
+class InstallPlan:
+    entries: list[PlanEntry] = field(default_factory=list)
+    unresolved: list[str] = field(default_factory=list)
+
+    def is_empty(self) -> bool:
+        return not self.entries and not self.unresolved
+
+    def get_download_size(self) -> int:
+        return sum(entry.size for entry in self.entries)
+
+    def get_entries(self, action: str) -> list[PlanEntry]:
+        return [entry for entry in self.entries if entry.action == action]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {**asdict(self), 'download_size': self.get_download_size()}
+
+    @staticmethod
+    def from_dict(data: dict[str, Any]) -> 'InstallPlan':
+        return InstallPlan(
+            [PlanEntry(**entry) for entry in data.get('entries', [])], list(data.get('unresolved', []))
+        )
@@ -0,0 +1,86 @@
+# SPDX-FileCopyrightText: 2024 Ferenc Nandor Janky <ferenj@effective-range.com>
+# SPDX-FileCopyrightText: 2024 Attila Gombos <attila.gombos@effective-range.com>
+# SPDX-License-Identifier: MIT
+
+from apt import Cache, Package
+from context_logger import get_logger
+from package_downloader import PackageConfig
+
+from package_installer import IAptInstaller, IDebInstaller, InstallPlan, PlanEntry
+
+log = get_logger('InstallPlanner')
+
+
+class IInstallPlanner(object):
+
+    def plan(self, package_configs: list[PackageConfig]) -> InstallPlan:
+        raise NotImplementedError()
+
+
+class InstallPlanner(IInstallPlanner):
+
+    def __init__(self, apt_cache: Cache, apt_installer: IAptInstaller, deb_installer: IDebInstaller) -> None:
+        self._apt_cache = apt_cache
+        self._apt_installer = apt_installer
+        self._deb_installer = deb_installer
+
+    def plan(self, package_configs: list[PackageConfig]) -> InstallPlan:
+        results = self._apt_installer.mark_batch(package_configs)
+
+        deb_entries = []
+        unresolved = []
+
+        try:
+            for config in package_configs:
+                if results.get(config.package):
+                    continue
+
+                try:
+                    entry = self._deb_installer.mark(config)
+                except Exception as error:
+                    log.error('Failed to resolve package file', package=config.package, error=error)
+                    entry = None
+
+                if entry:
+                    deb_entries.append(entry)
+                else:
+                    log.warn('Package cannot be resolved', package=config.package, version=config.version)
+                    unresolved.append(config.package)
+
+            apt_entries = [self._create_entry(package) for package in self._apt_cache.get_changes()]
+        finally:
+            self._apt_cache.clear()
+
+        plan = InstallPlan(apt_entries + deb_entries, unresolved)
+
+        log.info('Install plan created', install=len(plan.get_entries('install')),
+                 upgrade=len(plan.get_entries('upgrade')), remove=len(plan.get_entries('remove')),
+                 unresolved=len(unresolved), download_size=plan.get_download_size())
+
+        return plan
+
+    def _create_entry(self, package: Package) -> PlanEntry:
+        current_version = package.installed.version if package.installed else None
+
+        if package.marked_delete:
+            return PlanEntry(package.name, 'remove', 'apt', current_version, current_version)
+
+        if package.marked_upgrade:
+            action = 'upgrade'
+        elif package.marked_downgrade:
+            action = 'downgrade'
+        elif package.marked_reinstall:
+            action = 'reinstall'
+        else:
+            action = 'install'
+
+        candidate = package.candidate
+
+        return PlanEntry(
+            package.name,
+            action,
+            'apt',
+            candidate.version if candidate else None,
+            current_version,
+            candidate.size if candidate else 0,
+        )
@@ -0,0 +1,183 @@
+# SPDX-FileCopyrightText: 2024 Ferenc Nandor Janky <ferenj@effective-range.com>
+# SPDX-FileCopyrightText: 2024 Attila Gombos <attila.gombos@effective-range.com>
+# SPDX-License-Identifier: MIT
+
+import fcntl
+import json
+import os
+import time
+from typing import Optional, Any, Callable
+
+from context_logger import get_logger
+
+from package_installer import write_json
+
+log = get_logger('InstallQueue')
+
+InstallFunction = Callable[[str, Optional[str]], dict[str, bool]]
+
+
+class IInstallQueue(object):
+
+    def submit(
+        self,
+        package_config_path: str,
+        source_config_path: Optional[str],
+        install: InstallFunction,
+        options: Optional[dict[str, Any]] = None,
+    ) -> dict[str, bool]:
+        raise NotImplementedError()
+
+
+class InstallQueue(IInstallQueue):
+    _LOCK_FILE = 'install.lock'
+    _REQUESTS_DIR = 'requests'
+    _RESULTS_DIR = 'results'
+    _MERGED_DIR = 'merged'
+
+    def __init__(
+        self, queue_dir: str = '/run/debian-package-installer', merge_window: float = 1.0, results_max_age: float = 3600
+    ) -> None:
+        self._queue_dir = queue_dir
+        self._merge_window = merge_window
+        self._results_max_age = results_max_age
+        self._requests_dir = os.path.join(queue_dir, self._REQUESTS_DIR)
+        self._results_dir = os.path.join(queue_dir, self._RESULTS_DIR)
+        self._merged_dir = os.path.join(queue_dir, self._MERGED_DIR)
+
+    def submit(
+        self,
+        package_config_path: str,
+        source_config_path: Optional[str],
+        install: InstallFunction,
+        options: Optional[dict[str, Any]] = None,
+    ) -> dict[str, bool]:
+        options = options or {}
+
+        for directory in (self._requests_dir, self._results_dir, self._merged_dir):
+            os.makedirs(directory, exist_ok=True)
+
+        request_id = f'{time.time_ns()}-{os.getpid()}'
+        self._write_request(request_id, package_config_path, source_config_path, options)
+
+        with open(os.path.join(self._queue_dir, self._LOCK_FILE), 'a') as lock_file:
+            log.info('Waiting for install lock', request=request_id)
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+            try:
+                results = self._read_results(request_id)
+
+                if results is None:
+                    log.info('Acquired install lock, collecting pending requests', request=request_id)
+                    time.sleep(self._merge_window)
+                    self._remove_stale_results()
+                    self._process_requests(install, options)
+                    results = self._read_results(request_id)
+                else:
+                    log.info('Request was installed by another invocation', request=request_id)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+        return results or {}
+
+    def _write_request(
+        self, request_id: str, package_config_path: str, source_config_path: Optional[str], options: dict[str, Any]
+    ) -> None:
+        request = {
+            'packages': self._read_file(package_config_path),
+            'sources': self._read_file(source_config_path) if source_config_path else [],
+            'options': options,
+        }
+
+        if not all(isinstance(entry, dict) and 'package' in entry for entry in request['packages']):
+            raise ValueError(f'Invalid package config: {package_config_path}')
+
+        self._write_file(os.path.join(self._requests_dir, f'{request_id}.json'), request)
+
+    def _process_requests(self, install: InstallFunction, options: dict[str, Any]) -> None:
+        while True:
+            requests = self._read_requests(options)
+
+            if not requests:
+                return
+
+            self._process_round(requests, install)
+
+    def _read_requests(self, options: dict[str, Any]) -> dict[str, Any]:
+        requests = {}
+
+        for name in sorted(os.listdir(self._requests_dir)):
+            if not name.endswith('.json'):
+                continue
+
+            request = self._read_file(os.path.join(self._requests_dir, name))
+
+            # Requests are installed with the options of the lock holder, others wait for their own invocation
+            if request.get('options', {}) == options:
+                requests[name[:-5]] = request
+            else:
+                log.info('Request has different install options, deferring', request=name[:-5])
+
+        return requests
+
+    def _process_round(self, requests: dict[str, Any], install: InstallFunction) -> None:
+        packages: dict[str, Any] = {}
+        sources: list[Any] = []
+        merged: dict[str, list[str]] = {}
+
+        for request_id, request in requests.items():
+            names = [entry['package'] for entry in request['packages']]
+
+            if any(name in packages and packages[name] != entry for name, entry in zip(names, request['packages'])):
+                log.info('Request conflicts with pending packages, deferring', request=request_id)
+                continue
+
+            packages.update(zip(names, request['packages']))
+            sources.extend(entry for entry in request['sources'] if entry not in sources)
+            merged[request_id] = names
+
+        package_config_path = os.path.join(self._merged_dir, 'package-config.json')
+        self._write_file(package_config_path, list(packages.values()))
+
+        source_config_path = os.path.join(self._merged_dir, 'source-config.json') if sources else None
+        if source_config_path:
+            self._write_file(source_config_path, sources)
+
+        log.info('Installing merged requests', requests=list(merged), packages=list(packages))
+
+        try:
+            results = install(package_config_path, source_config_path)
+        except Exception as error:
+            log.error('Failed to install merged requests', requests=list(merged), error=error)
+            results = {}
+
+        for request_id, names in merged.items():
+            self._write_file(os.path.join(self._results_dir, f'{request_id}.json'),
+                             {name: results.get(name, False) for name in names})
+            os.remove(os.path.join(self._requests_dir, f'{request_id}.json'))
+
+    def _remove_stale_results(self) -> None:
+        # Results of callers that died before reading them
+        for name in os.listdir(self._results_dir):
+            results_file = os.path.join(self._results_dir, name)
+            if time.time() - os.path.getmtime(results_file) > self._results_max_age:
+                log.info('Removing stale results', file=results_file)
+                os.remove(results_file)
+
+    def _read_results(self, request_id: str) -> Optional[dict[str, bool]]:
+        results_file = os.path.join(self._results_dir, f'{request_id}.json')
+
+        if not os.path.isfile(results_file):
+            return None
+
+        results: dict[str, bool] = self._read_file(results_file)
+        os.remove(results_file)
+
+        return results
+
+    def _read_file(self, path: str) -> Any:
+        with open(path) as file:
+            return json.load(file)
+
+    def _write_file(self, path: str, data: Any) -> None:
+        write_json(path, data)
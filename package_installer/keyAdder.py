@@ -2,6 +2,10 @@
 # SPDX-FileCopyrightText: 2024 Attila Gombos <attila.gombos@effective-range.com>
 # SPDX-License-Identifier: MIT
 
+import os
+import subprocess
+from tempfile import TemporaryDirectory
+
 from apt import auth
 
 
@@ -10,7 +14,7 @@ class IKeyAdder(object):
     def add_from_key_file(self, file_path: str) -> None:
         raise NotImplementedError()
 
-    def add_from_key_server(self, key_server: str, key_id: str) -> None:
+    def fetch_from_key_server(self, key_server: str, key_id: str, file_path: str) -> None:
         raise NotImplementedError()
 
     def get_available_key_ids(self) -> list[str]:
@@ -22,8 +26,22 @@ class KeyAdder(IKeyAdder):
     def add_from_key_file(self, file_path: str) -> None:
         auth.add_key_from_file(file_path)
 
-    def add_from_key_server(self, key_server: str, key_id: str) -> None:
-        auth.add_key_from_keyserver(key_id, key_server)
+    def fetch_from_key_server(self, key_server: str, key_id: str, file_path: str) -> None:
+        with TemporaryDirectory(ignore_cleanup_errors=True) as keyring_dir:
+            gpg = ['gpg', '--no-default-keyring', '--no-options', '--batch', '--homedir', keyring_dir]
+            keyring = ['--keyring', os.path.join(keyring_dir, 'pubring.gpg')]
+
+            self._run(gpg + keyring + ['--keyserver', key_server, '--recv-keys', key_id])
+            self._run(gpg + keyring + ['--output', file_path, '--export', key_id])
+
+            output = self._run(gpg + ['--keyring', file_path, '--fingerprint', '--fixed-list-mode', '--with-colons'])
+
+        fingerprints = [line.split(':')[9] for line in output.splitlines() if line.startswith('fpr:')]
+        if not fingerprints or fingerprints[0] != key_id.replace('0x', '').upper():
+            raise auth.AptKeyError(f"recv from '{key_server}' failed for '{key_id}'")
 
     def get_available_key_ids(self) -> list[str]:
         return [key.keyid for key in auth.list_keys()]
+
+    def _run(self, command: list[str]) -> str:
+        return subprocess.run(command, check=True, capture_output=True, text=True).stdout
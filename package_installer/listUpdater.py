@@ -0,0 +1,126 @@
+# SPDX-FileCopyrightText: 2024 Ferenc Nandor Janky <ferenj@effective-range.com>
+# SPDX-FileCopyrightText: 2024 Attila Gombos <attila.gombos@effective-range.com>
+# SPDX-License-Identifier: MIT
+
+import time
+from dataclasses import dataclass
+from typing import Optional, Any
+
+import apt_pkg
+from apt import Cache
+from apt.progress.base import AcquireProgress
+from context_logger import get_logger
+
+from package_installer import IInstallMetrics, InstallMetrics
+
+log = get_logger('ListUpdater')
+
+
+@dataclass
+class SourceFetch:
+    source: str
+    success: bool = True
+    duration: float = 0.0
+    items: int = 0
+    failed: int = 0
+
+
+class ListFetchProgress(AcquireProgress):
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._started = time.perf_counter()
+        self._sources: dict[str, SourceFetch] = {}
+
+    def start(self) -> None:
+        super().start()
+        self._started = time.perf_counter()
+
+    def done(self, item: Any) -> None:
+        self._add_item(item, True)
+
+    def ims_hit(self, item: Any) -> None:
+        self._add_item(item, True)
+
+    def fail(self, item: Any) -> None:
+        # Optional indexes like missing translations are reported as failed with done status
+        success = item.owner.status == item.owner.STAT_DONE
+        if not success:
+            log.warn('Failed to fetch package list', uri=item.uri, error=item.owner.error_text)
+        self._add_item(item, success)
+
+    def get_sources(self) -> list[SourceFetch]:
+        return list(self._sources.values())
+
+    def _add_item(self, item: Any, success: bool) -> None:
+        source = item.description.split()[0] if item.description else item.uri
+        fetch = self._sources.setdefault(source, SourceFetch(source))
+        fetch.items += 1
+        fetch.duration = time.perf_counter() - self._started
+        if not success:
+            fetch.failed += 1
+            fetch.success = False
+
+
+class IListUpdater(object):
+
+    def update(self) -> list[SourceFetch]:
+        raise NotImplementedError()
+
+
+class ListUpdater(IListUpdater):
+    _UPDATE_SOURCE = 'apt'
+
+    def __init__(
+        self,
+        apt_cache: Cache,
+        metrics: Optional[IInstallMetrics] = None,
+        source_timeout: int = 30,
+        fetch_workers: int = 0,
+    ) -> None:
+        self._apt_cache = apt_cache
+        self._metrics = metrics or InstallMetrics()
+        self._source_timeout = source_timeout
+        self._fetch_workers = fetch_workers
+
+    def update(self) -> list[SourceFetch]:
+        self._configure()
+
+        progress = ListFetchProgress()
+        update_error: Optional[Exception] = None
+
+        try:
+            self._apt_cache.update(progress, raise_on_error=False)
+        except Exception as error:
+            log.error('Failed to update package lists', error=error)
+            update_error = error
+
+        sources = progress.get_sources()
+
+        if update_error:
+            # The update did not run to completion (e.g. lock failure), it must not be recorded as done
+            sources.append(SourceFetch(self._UPDATE_SOURCE, success=False, failed=1))
+
+        for fetch in sources:
+            self._metrics.record_source(fetch.source, fetch.duration, fetch.success)
+            if fetch.success:
+                log.info('Package lists updated', source=fetch.source, duration=round(fetch.duration, 3),
+                         items=fetch.items)
+            else:
+                log.warn('Package lists not updated, using previous lists', source=fetch.source,
+                         duration=round(fetch.duration, 3), items=fetch.items, failed=fetch.failed)
+
+        failed = [fetch.source for fetch in sources if not fetch.success]
+
+        if failed:
+            self._metrics.increment('sources_failed', len(failed))
+            log.warn('Continuing with partially updated package lists', failed_sources=failed)
+
+        return sources
+
+    def _configure(self) -> None:
+        for method in ('http', 'https', 'ftp'):
+            apt_pkg.config.set(f'Acquire::{method}::Timeout', str(self._source_timeout))
+
+        if self._fetch_workers:
+            apt_pkg.config.set('Acquire::QueueHost::Limit', str(self._fetch_workers))
@@ -0,0 +1,33 @@
+# SPDX-FileCopyrightText: 2024 Ferenc Nandor Janky <ferenj@effective-range.com>
+# SPDX-FileCopyrightText: 2024 Attila Gombos <attila.gombos@effective-range.com>
+# SPDX-License-Identifier: MIT
+
+from typing import Any
+
+from apt import Cache
+
+from package_installer import IInstallMetrics
+
+
+class MeteredCache(Cache):
+
+    def __init__(self, metrics: IInstallMetrics, *args: Any, **kwargs: Any) -> None:
+        self._metrics = metrics
+        super().__init__(*args, **kwargs)
+
+    def open(self, *args: Any, **kwargs: Any) -> None:
+        self._metrics.increment('cache_open')
+        with self._metrics.measure('cache_open'):
+            super().open(*args, **kwargs)
+
+    def update(self, *args: Any, **kwargs: Any) -> int:
+        self._metrics.increment('cache_update')
+        with self._metrics.measure('cache_update'):
+            result: int = super().update(*args, **kwargs)
+            return result
+
+    def commit(self, *args: Any, **kwargs: Any) -> bool:
+        self._metrics.increment('cache_commit')
+        with self._metrics.measure('cache_commit'):
+            result: bool = super().commit(*args, **kwargs)
+            return result
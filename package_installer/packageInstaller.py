@@ -2,6 +2,7 @@
 # SPDX-FileCopyrightText: 2024 Attila Gombos <attila.gombos@effective-range.com>
 # SPDX-License-Identifier: MIT
 
+from dataclasses import replace
 from typing import Optional
 
 from apt import Cache
@@ -9,7 +10,22 @@ from common_utility.jsonLoader import IJsonLoader
 from context_logger import get_logger
 from package_downloader import PackageConfig
 
-from package_installer import IAptInstaller, IDebInstaller, ISourceAdder
+from package_installer import (
+    IAptInstaller,
+    IDebInstaller,
+    ISourceAdder,
+    IUpdatePolicy,
+    IInstallMetrics,
+    InstallMetrics,
+    ICacheRefresher,
+    CacheRefresher,
+    IResolutionCache,
+    Resolution,
+    IConfigSnapshot,
+    IListUpdater,
+    ListUpdater,
+    IRetryPolicy,
+)
 
 log = get_logger('PackageInstaller')
 
@@ -24,6 +40,14 @@ class PackageInstaller(object):
         apt_installer: IAptInstaller,
         deb_installer: IDebInstaller,
         source_adder: Optional[ISourceAdder] = None,
+        batch_install: bool = False,
+        update_policy: Optional[IUpdatePolicy] = None,
+        metrics: Optional[IInstallMetrics] = None,
+        cache_refresher: Optional[ICacheRefresher] = None,
+        resolution_cache: Optional[IResolutionCache] = None,
+        config_snapshot: Optional[IConfigSnapshot] = None,
+        list_updater: Optional[IListUpdater] = None,
+        retry_policy: Optional[IRetryPolicy] = None,
     ) -> None:
         self._config_path = config_path
         self._json_loader = json_loader
@@ -31,28 +55,164 @@ class PackageInstaller(object):
         self._apt_installer = apt_installer
         self._deb_installer = deb_installer
         self._source_adder = source_adder
+        self._batch_install = batch_install
+        self._update_policy = update_policy
+        self._metrics = metrics or InstallMetrics()
+        self._cache_refresher = cache_refresher or CacheRefresher(apt_cache)
+        self._resolution_cache = resolution_cache
+        self._config_snapshot = config_snapshot
+        self._list_updater = list_updater or ListUpdater(apt_cache, self._metrics)
+        self._retry_policy = retry_policy
 
-    def install_packages(self) -> None:
-        if self._source_adder:
+    def install_packages(self) -> dict[str, bool]:
+        config_list = self._json_loader.load_list(self._config_path, PackageConfig)
+
+        changed_list = self._config_snapshot.get_changes(config_list) if self._config_snapshot else config_list
+        changed_packages = {config.package for config in changed_list}
+
+        results = {config.package: True for config in config_list if config.package not in changed_packages}
+
+        if results:
+            log.info('Skipping packages unchanged since last run', packages=list(results))
+            self._metrics.increment('packages_unchanged', len(results))
+
+        if changed_list or not self._config_snapshot:
+            results.update(self._apply_packages(changed_list))
+
+        if self._resolution_cache:
+            self._resolution_cache.save()
+
+        if self._config_snapshot:
+            self._config_snapshot.update(config_list, results)
+            self._config_snapshot.save()
+
+        return results
+
+    def _apply_packages(self, config_list: list[PackageConfig]) -> dict[str, bool]:
+        sources_changed = False
+
+        if self._retry_policy and self._retry_policy.recover():
+            self._cache_refresher.invalidate()
+
+        if self._source_adder and (not self._config_snapshot or self._config_snapshot.is_source_changed()):
             log.info('Adding apt sources')
-            self._source_adder.add_sources()
+            with self._metrics.measure('sources'):
+                sources_changed = self._source_adder.add_sources()
 
-        log.info('Updating apt cache')
-        self._apt_cache.open()
-        self._apt_cache.update()
-        self._apt_cache.open()
+        self._cache_refresher.refresh()
 
-        config_list = self._json_loader.load_list(self._config_path, PackageConfig)
+        if sources_changed or not self._update_policy or self._update_policy.is_update_needed(config_list):
+            log.info('Updating apt cache')
+            with self._metrics.measure('update'):
+                fetches = self._list_updater.update()
+                self._cache_refresher.invalidate()
 
-        for config in config_list:
-            log.info('Installing package', package=config.package, version=config.version)
+            failed = [fetch.source for fetch in fetches if not fetch.success]
+
+            if failed:
+                log.warn('Some package lists failed to update, next run updates again', sources=failed)
+            elif self._update_policy:
+                self._update_policy.update_done()
+
+        self._prefetch_packages(config_list)
+
+        if self._batch_install:
+            results = self._install_batch(config_list)
+        else:
+            results = {config.package: self._install_package(config) for config in config_list}
+
+        self._metrics.increment('packages_installed', sum(results.values()))
+        self._metrics.increment('packages_failed', len(results) - sum(results.values()))
+
+        return results
+
+    def _prefetch_packages(self, config_list: list[PackageConfig]) -> None:
+        unavailable = [config for config in config_list if not self._is_available(config)]
+
+        if unavailable:
+            log.info('Prefetching packages not available from apt repository',
+                     packages=[config.package for config in unavailable])
+            self._deb_installer.prefetch(unavailable)
+
+    def _is_available(self, config: PackageConfig) -> bool:
+        resolution = self._get_resolution(config)
 
-            if self._apt_installer.install(config):
-                continue
+        if resolution:
+            return resolution.source == 'apt'
 
+        return self._apt_installer.is_available(config)
+
+    def _install_package(self, config: PackageConfig) -> bool:
+        log.info('Installing package', package=config.package, version=config.version)
+
+        if self._is_deb_resolution(config):
+            log.info('Package resolved to package file, skipping apt repository', package=config.package)
+        elif self._apt_installer.install(config):
+            self._store_resolution(config, 'apt')
+            return True
+        else:
             log.warn('Package is not available from apt repository', package=config.package)
 
-            if self._deb_installer.install(config):
-                continue
+        return self._install_deb_package(config)
+
+    def _install_batch(self, config_list: list[PackageConfig]) -> dict[str, bool]:
+        log.info('Installing packages in batch', packages=[config.package for config in config_list])
+
+        apt_configs = [config for config in config_list if not self._is_deb_resolution(config)]
+        results = self._apt_installer.install_batch(apt_configs) if apt_configs else {}
+
+        deb_configs = []
+
+        for config in config_list:
+            if results.get(config.package):
+                self._store_resolution(config, 'apt')
+            else:
+                log.warn('Package is not available from apt repository', package=config.package)
+                deb_configs.append(config)
+
+        if deb_configs:
+            results.update(self._install_deb_batch(deb_configs))
+
+        return results
+
+    def _install_deb_batch(self, config_list: list[PackageConfig]) -> dict[str, bool]:
+        results = self._deb_installer.install_batch(config_list)
+
+        for config in config_list:
+            if results.get(config.package):
+                self._store_resolution(config, 'deb')
+            else:
+                log.error('Failed to install package', package=config.package)
+                results[config.package] = False
+
+        return results
+
+    def _install_deb_package(self, config: PackageConfig) -> bool:
+        if self._deb_installer.install(config):
+            self._store_resolution(config, 'deb')
+            return True
+
+        log.error('Failed to install package', package=config.package)
+
+        return False
+
+    def _get_resolution(self, config: PackageConfig) -> Optional[Resolution]:
+        return self._resolution_cache.get(config) if self._resolution_cache else None
+
+    def _is_deb_resolution(self, config: PackageConfig) -> bool:
+        resolution = self._get_resolution(config)
+        return resolution is not None and resolution.source == 'deb'
+
+    def _store_resolution(self, config: PackageConfig, source: str) -> None:
+        if not self._resolution_cache:
+            return
+
+        version = self._cache_refresher.get_installed_version(config.package)
+        resolution = self._resolution_cache.get(config)
+
+        if resolution:
+            resolution = replace(resolution, source=source, version=version)
+        else:
+            resolution = Resolution(source, version)
 
-            log.error('Failed to install package', package=config.package)
+        self._resolution_cache.put(config, resolution)
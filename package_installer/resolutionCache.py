@@ -0,0 +1,136 @@
+# SPDX-FileCopyrightText: 2024 Ferenc Nandor Janky <ferenj@effective-range.com>
+# SPDX-FileCopyrightText: 2024 Attila Gombos <attila.gombos@effective-range.com>
+# SPDX-License-Identifier: MIT
+
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, asdict, replace
+from threading import Lock
+from typing import Optional, Any
+
+from context_logger import get_logger
+from package_downloader import PackageConfig
+
+from package_installer import AptSources, write_json, get_config_key
+
+log = get_logger('ResolutionCache')
+
+
+@dataclass
+class Resolution:
+    source: str
+    version: Optional[str] = None
+    url: Optional[str] = None
+    sha256: Optional[str] = None
+    resolved_at: float = 0.0
+
+
+class IResolutionCache(object):
+
+    def get(self, package_config: PackageConfig) -> Optional[Resolution]:
+        raise NotImplementedError()
+
+    def put(self, package_config: PackageConfig, resolution: Resolution) -> None:
+        raise NotImplementedError()
+
+    def save(self) -> None:
+        raise NotImplementedError()
+
+
+class ResolutionCache(IResolutionCache):
+
+    def __init__(
+        self,
+        cache_file: str = '/var/lib/debian-package-installer/resolution-cache.json',
+        lists_dir: str = '/var/lib/apt/lists',
+        sources_paths: tuple[str, ...] = ('/etc/apt/sources.list', '/etc/apt/sources.list.d'),
+        latest_max_age: int = 3600,
+    ) -> None:
+        self._cache_file = cache_file
+        self._lists_dir = lists_dir
+        self._apt_sources = AptSources(sources_paths)
+        self._latest_max_age = latest_max_age
+        self._lock = Lock()
+        self._state = ''
+        self._entries: dict[str, dict[str, Any]] = {}
+        self._loaded = False
+        self._changed = False
+
+    def get(self, package_config: PackageConfig) -> Optional[Resolution]:
+        with self._lock:
+            self._load()
+            entry = self._entries.get(get_config_key(package_config))
+
+        if not entry:
+            return None
+
+        resolution = Resolution(**entry)
+
+        if self._is_latest_release(package_config) and time.time() - resolution.resolved_at > self._latest_max_age:
+            log.debug('Resolution of latest release expired', package=package_config.package)
+            return None
+
+        log.debug('Resolution found in cache', package=package_config.package, source=resolution.source,
+                  version=resolution.version)
+
+        return resolution
+
+    def put(self, package_config: PackageConfig, resolution: Resolution) -> None:
+        if not resolution.resolved_at:
+            resolution = replace(resolution, resolved_at=time.time())
+
+        with self._lock:
+            self._load()
+            self._entries[get_config_key(package_config)] = asdict(resolution)
+            self._changed = True
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._changed:
+                return
+
+            # Lists may have been updated since loading, entries resolved in this run belong to the new state
+            data = {'state': self._get_state(), 'entries': self._entries}
+
+            try:
+                write_json(self._cache_file, data)
+                self._changed = False
+            except Exception as error:
+                log.warn('Failed to save resolution cache', file=self._cache_file, error=error)
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+
+        self._loaded = True
+        self._state = self._get_state()
+
+        try:
+            with open(self._cache_file) as file:
+                data = json.load(file)
+        except Exception:
+            return
+
+        if data.get('state') != self._state:
+            log.info('Apt lists or sources changed, resolution cache invalidated')
+            self._changed = True
+            return
+
+        self._entries = data.get('entries', {})
+
+    def _is_latest_release(self, package_config: PackageConfig) -> bool:
+        return package_config.release is not None and package_config.release.tag == 'latest'
+
+    def _get_state(self) -> str:
+        state_hash = hashlib.sha256(self._apt_sources.get_hash().encode())
+
+        if os.path.isdir(self._lists_dir):
+            for name in sorted(os.listdir(self._lists_dir)):
+                list_file = os.path.join(self._lists_dir, name)
+                if os.path.isfile(list_file):
+                    stat = os.stat(list_file)
+                    state_hash.update(f'{name}:{stat.st_size}:{stat.st_mtime_ns}'.encode())
+
+        return state_hash.hexdigest()
@@ -0,0 +1,90 @@
+# SPDX-FileCopyrightText: 2024 Ferenc Nandor Janky <ferenj@effective-range.com>
+# SPDX-FileCopyrightText: 2024 Attila Gombos <attila.gombos@effective-range.com>
+# SPDX-License-Identifier: MIT
+
+import time
+from typing import Optional, Callable, TypeVar
+
+from apt.cache import FetchFailedException, LockFailedException
+from context_logger import get_logger
+
+from package_installer import (
+    IDpkgRunner,
+    DpkgRunner,
+    IDpkgStatusReader,
+    DpkgStatusReader,
+    IInstallMetrics,
+    InstallMetrics,
+)
+
+log = get_logger('RetryPolicy')
+
+T = TypeVar('T')
+
+
+class IRetryPolicy(object):
+
+    def recover(self) -> bool:
+        raise NotImplementedError()
+
+    def run(self, action: Callable[[], T], prepare_retry: Optional[Callable[[], None]] = None) -> T:
+        raise NotImplementedError()
+
+
+class RetryPolicy(IRetryPolicy):
+
+    def __init__(
+        self,
+        dpkg_runner: Optional[IDpkgRunner] = None,
+        status_reader: Optional[IDpkgStatusReader] = None,
+        retries: int = 0,
+        backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        metrics: Optional[IInstallMetrics] = None,
+    ) -> None:
+        self._dpkg_runner = dpkg_runner or DpkgRunner()
+        self._status_reader = status_reader or DpkgStatusReader()
+        self._retries = retries
+        self._backoff = backoff
+        self._max_backoff = max_backoff
+        self._metrics = metrics or InstallMetrics()
+
+    def recover(self) -> bool:
+        if not self._status_reader.is_interrupted():
+            return False
+
+        log.warn('Previous package installation was interrupted, configuring pending packages')
+        self._metrics.increment('dpkg_recoveries')
+
+        try:
+            self._dpkg_runner.configure_pending()
+        except Exception as error:
+            log.error('Failed to configure pending packages', error=error)
+
+        return True
+
+    def run(self, action: Callable[[], T], prepare_retry: Optional[Callable[[], None]] = None) -> T:
+        for attempt in range(self._retries + 1):
+            if attempt:
+                delay = min(self._backoff * 2 ** (attempt - 1), self._max_backoff)
+                log.info('Retrying package installation', attempt=attempt, delay=delay)
+                self._metrics.increment('commit_retries')
+                time.sleep(delay)
+
+                self.recover()
+
+                if prepare_retry:
+                    prepare_retry()
+
+            try:
+                return action()
+            except Exception as error:
+                if attempt == self._retries or not self._is_transient(error):
+                    raise
+                log.warn('Package installation interrupted', attempt=attempt, error=error)
+
+        raise RuntimeError('Package installation retries exhausted')
+
+    def _is_transient(self, error: Exception) -> bool:
+        # Failed downloads and a busy lock may succeed later, other errors only if dpkg was interrupted
+        return isinstance(error, (FetchFailedException, LockFailedException)) or self._status_reader.is_interrupted()
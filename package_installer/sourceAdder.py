@@ -2,6 +2,10 @@
 # SPDX-FileCopyrightText: 2024 Attila Gombos <attila.gombos@effective-range.com>
 # SPDX-License-Identifier: MIT
 
+import os
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import TemporaryDirectory
+from typing import Optional
 from urllib.parse import urlparse
 
 from aptsources.sourceslist import SourcesList, SourceEntry
@@ -9,14 +13,14 @@ from common_utility import IFileDownloader
 from common_utility.jsonLoader import IJsonLoader
 from context_logger import get_logger
 
-from package_installer import SourceConfig, IKeyAdder
+from package_installer import SourceConfig, IKeyAdder, write_file
 
 log = get_logger('SourceAdder')
 
 
 class ISourceAdder(object):
 
-    def add_sources(self) -> None:
+    def add_sources(self) -> bool:
         raise NotImplementedError()
 
 
@@ -29,67 +33,149 @@ class SourceAdder(ISourceAdder):
         sources_list: SourcesList,
         key_adder: IKeyAdder,
         file_downloader: IFileDownloader,
+        key_workers: int = 4,
+        source_file: str = '/etc/apt/sources.list.d/debian-package-installer.list',
     ) -> None:
         self._config_path = config_path
         self._json_loader = json_loader
         self._sources_list = sources_list
         self._key_adder = key_adder
         self._file_downloader = file_downloader
-        self._available_key_ids: list[str] = []
+        self._key_workers = key_workers
+        self._source_file = source_file
+        self._available_key_ids: set[str] = set()
 
-    def add_sources(self) -> None:
+    def add_sources(self) -> bool:
         config_list = self._json_loader.load_list(self._config_path, SourceConfig)
 
-        self._refresh_keys()
+        sources_changed = self._write_source_file(self._get_missing_entries(config_list))
+        keys_added = self._add_missing_keys(config_list)
+
+        return sources_changed or keys_added
+
+    def _get_missing_entries(self, config_list: list[SourceConfig]) -> list[str]:
+        existing: set[tuple[str, str, str, str]] = set()
+
+        for source in self._sources_list.list:
+            if not source.disabled and not source.invalid and source.file != self._source_file:
+                existing.update(self._get_source_keys(source))
+
+        entries: list[str] = []
 
         for config in config_list:
-            log.info('Adding apt source', source=config.source)
             entry = SourceEntry(config.source)
-            self._sources_list.add(entry.type, entry.uri, entry.dist, entry.comps)
-            self._add_key_for_source(config)
+            if all(key in existing for key in self._get_source_keys(entry)):
+                log.info('Apt source already configured', source=config.source)
+            else:
+                log.info('Adding apt source', source=config.source, file=self._source_file)
+                entries.append(' '.join([entry.type, entry.uri, entry.dist] + entry.comps))
 
-        self._sources_list.save()
+        return entries
 
-    def _add_key_for_source(self, config: SourceConfig) -> None:
-        source = config.source
-        key_id = config.key_id
+    def _get_source_keys(self, source: SourceEntry) -> list[tuple[str, str, str, str]]:
+        # Flat repositories have no components, they are identified by type, URI and path only
+        return [(source.type, source.uri.rstrip('/'), source.dist, comp) for comp in source.comps or ['']]
 
-        if self._is_key_missing(key_id):
-            log.info('Key not found, trying to add', key_id=key_id, source=source)
-        else:
-            log.info('Key found', key_id=key_id, source=source)
-            return
+    def _write_source_file(self, entries: list[str]) -> bool:
+        content = ''.join(f'{entry}\n' for entry in entries)
 
-        if self._is_key_missing(key_id) and config.key_server:
-            self._add_from_key_server(config, config.key_server)
+        try:
+            with open(self._source_file) as file:
+                current: Optional[str] = file.read()
+        except FileNotFoundError:
+            current = None
 
-        if self._is_key_missing(key_id) and config.key_file:
-            self._add_from_key_file(config, config.key_file)
+        if current == (content or None):
+            log.info('Apt sources unchanged', file=self._source_file)
+            return False
 
-        if self._is_key_missing(key_id):
-            log.warn('Failed to add key', key_id=key_id, source=source)
+        if content:
+            write_file(self._source_file, content)
         else:
-            log.info('Key added', key_id=key_id, source=source)
+            os.remove(self._source_file)
+
+        log.info('Apt sources written', file=self._source_file, sources=entries)
 
-    def _add_from_key_server(self, config: SourceConfig, key_server: str) -> None:
-        log.info('Adding key from key server', key_server=key_server, key_id=config.key_id, source=config.source)
-        self._key_adder.add_from_key_server(key_server, config.key_id)
+        return True
+
+    def _add_missing_keys(self, config_list: list[SourceConfig]) -> bool:
         self._refresh_keys()
 
-    def _add_from_key_file(self, config: SourceConfig, key_file: str) -> None:
-        if urlparse(config.key_file).scheme:
-            log.info('Downloading key file', url=config.key_file, key_id=config.key_id, source=config.source)
-            key_file_path = self._file_downloader.download(key_file, f'{config.name}.pub')
-        else:
-            key_file_path = key_file
+        missing: dict[str, SourceConfig] = {}
 
-        log.info('Adding key from key file', key_file=key_file_path, key_id=config.key_id, source=config.source)
+        for config in config_list:
+            if not self._is_key_missing(config.key_id):
+                log.info('Key found', key_id=config.key_id, source=config.source)
+            elif config.key_id[-16:] not in missing:
+                log.info('Key not found, trying to add', key_id=config.key_id, source=config.source)
+                missing[config.key_id[-16:]] = config
+
+        if not missing:
+            return False
+
+        with TemporaryDirectory() as key_dir:
+            with ThreadPoolExecutor(max(self._key_workers, 1), thread_name_prefix='KeyFetcher') as executor:
+                key_files = list(executor.map(lambda config: self._fetch_key(config, key_dir), missing.values()))
+
+            for config, key_file in zip(missing.values(), key_files):
+                if key_file:
+                    self._add_from_key_file(config, key_file)
 
-        self._key_adder.add_from_key_file(key_file_path)
         self._refresh_keys()
 
+        keys_added = False
+
+        for config in missing.values():
+            if self._is_key_missing(config.key_id):
+                log.warn('Failed to add key', key_id=config.key_id, source=config.source)
+            else:
+                log.info('Key added', key_id=config.key_id, source=config.source)
+                keys_added = True
+
+        return keys_added
+
+    def _fetch_key(self, config: SourceConfig, key_dir: str) -> Optional[str]:
+        if config.key_server:
+            try:
+                return self._fetch_from_key_server(config, config.key_server, key_dir)
+            except Exception as error:
+                log.warn('Failed to fetch key from key server', key_server=config.key_server, key_id=config.key_id,
+                         source=config.source, error=error)
+
+        if config.key_file:
+            try:
+                return self._fetch_key_file(config, config.key_file)
+            except Exception as error:
+                log.warn('Failed to fetch key file', key_file=config.key_file, key_id=config.key_id,
+                         source=config.source, error=error)
+
+        return None
+
+    def _fetch_from_key_server(self, config: SourceConfig, key_server: str, key_dir: str) -> str:
+        log.info('Fetching key from key server', key_server=key_server, key_id=config.key_id, source=config.source)
+        key_file_path = os.path.join(key_dir, f'{config.name}.gpg')
+        self._key_adder.fetch_from_key_server(key_server, config.key_id, key_file_path)
+        return key_file_path
+
+    def _fetch_key_file(self, config: SourceConfig, key_file: str) -> str:
+        if urlparse(key_file).scheme:
+            log.info('Downloading key file', url=key_file, key_id=config.key_id, source=config.source)
+            key_file_path: str = self._file_downloader.download(key_file, f'{config.name}.pub')
+            return key_file_path
+
+        return key_file
+
+    def _add_from_key_file(self, config: SourceConfig, key_file_path: str) -> None:
+        log.info('Adding key from key file', key_file=key_file_path, key_id=config.key_id, source=config.source)
+
+        try:
+            self._key_adder.add_from_key_file(key_file_path)
+        except Exception as error:
+            log.warn('Failed to add key from key file', key_file=key_file_path, key_id=config.key_id,
+                     source=config.source, error=error)
+
     def _refresh_keys(self) -> None:
-        self._available_key_ids = self._key_adder.get_available_key_ids()
+        self._available_key_ids = set(self._key_adder.get_available_key_ids())
 
     def _is_key_missing(self, key_id_last_16: str) -> bool:
         key_id_last_16 = key_id_last_16[-16:]
@@ -0,0 +1,85 @@
+# SPDX-FileCopyrightText: 2024 Ferenc Nandor Janky <ferenj@effective-range.com>
+# SPDX-FileCopyrightText: 2024 Attila Gombos <attila.gombos@effective-range.com>
+# SPDX-License-Identifier: MIT
+
+import json
+import os
+import time
+from typing import Any
+
+from context_logger import get_logger
+from package_downloader import PackageConfig
+
+from package_installer import IAptInstaller, AptSources
+
+log = get_logger('UpdatePolicy')
+
+
+class IUpdatePolicy(object):
+
+    def is_update_needed(self, package_configs: list[PackageConfig]) -> bool:
+        raise NotImplementedError()
+
+    def update_done(self) -> None:
+        raise NotImplementedError()
+
+
+class UpdatePolicy(IUpdatePolicy):
+
+    def __init__(
+        self,
+        apt_installer: IAptInstaller,
+        max_age: int = 0,
+        state_file: str = '/var/lib/debian-package-installer/update-state.json',
+        sources_paths: tuple[str, ...] = ('/etc/apt/sources.list', '/etc/apt/sources.list.d'),
+        update_stamp: str = '/var/lib/apt/periodic/update-success-stamp',
+    ) -> None:
+        self._apt_installer = apt_installer
+        self._max_age = max_age
+        self._state_file = state_file
+        self._apt_sources = AptSources(sources_paths)
+        self._update_stamp = update_stamp
+
+    def is_update_needed(self, package_configs: list[PackageConfig]) -> bool:
+        if all(self._apt_installer.is_installed(config) for config in package_configs):
+            log.info('All packages are installed, skipping update')
+            return False
+
+        state = self._load_state()
+
+        if state.get('sources_hash') != self._apt_sources.get_hash():
+            log.info('Apt sources changed, update needed')
+            return True
+
+        age = time.time() - max(state.get('updated_at', 0.0), self._get_stamp_time())
+
+        if age < self._max_age * 60:
+            log.info('Package lists are fresh, skipping update', age=int(age), max_age=self._max_age * 60)
+            return False
+
+        log.info('Package lists are outdated, update needed', age=int(age), max_age=self._max_age * 60)
+        return True
+
+    def update_done(self) -> None:
+        state = {'sources_hash': self._apt_sources.get_hash(), 'updated_at': time.time()}
+
+        try:
+            os.makedirs(os.path.dirname(self._state_file), exist_ok=True)
+            with open(self._state_file, 'w') as file:
+                json.dump(state, file)
+        except Exception as error:
+            log.warn('Failed to save update state', file=self._state_file, error=error)
+
+    def _load_state(self) -> dict[str, Any]:
+        try:
+            with open(self._state_file) as file:
+                state: dict[str, Any] = json.load(file)
+                return state
+        except Exception:
+            return {}
+
+    def _get_stamp_time(self) -> float:
+        try:
+            return os.path.getmtime(self._update_stamp)
+        except OSError:
+            return 0.0
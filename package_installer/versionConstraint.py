@@ -0,0 +1,68 @@
+# SPDX-FileCopyrightText: 2024 Ferenc Nandor Janky <ferenj@effective-range.com>
+# SPDX-FileCopyrightText: 2024 Attila Gombos <attila.gombos@effective-range.com>
+# SPDX-License-Identifier: MIT
+
+from fnmatch import fnmatchcase
+from functools import cmp_to_key
+from typing import Optional, Iterable, Callable
+
+import apt_pkg
+
+# Same initialization as the apt package, without loading it
+if 'APT' not in apt_pkg.config:
+    apt_pkg.init_config()
+apt_pkg.init_system()
+
+
+class VersionConstraint(object):
+    _OPERATORS: dict[str, Callable[[int], bool]] = {
+        '>=': lambda result: result >= 0,
+        '<=': lambda result: result <= 0,
+        '>>': lambda result: result > 0,
+        '<<': lambda result: result < 0,
+        '=': lambda result: result == 0,
+    }
+    _WILDCARD = '*'
+
+    def __init__(self, spec: str) -> None:
+        self._spec = spec.strip()
+        self._clauses = [self._parse_clause(clause) for clause in self._spec.split(',')]
+
+    def __str__(self) -> str:
+        return self._spec
+
+    def get_exact_version(self) -> Optional[str]:
+        if len(self._clauses) == 1:
+            operator, version = self._clauses[0]
+            if operator == '=' and self._WILDCARD not in version:
+                return version
+
+        return None
+
+    def matches(self, version: str) -> bool:
+        return all(self._matches_clause(version, operator, required) for operator, required in self._clauses)
+
+    def select(self, versions: Iterable[str]) -> Optional[str]:
+        matching = [version for version in versions if self.matches(version)]
+        return max(matching, key=cmp_to_key(apt_pkg.version_compare)) if matching else None
+
+    def _parse_clause(self, clause: str) -> tuple[str, str]:
+        clause = clause.strip()
+
+        for operator in self._OPERATORS:
+            if clause.startswith(operator):
+                version = clause[len(operator):].strip()
+                break
+        else:
+            operator, version = '=', clause
+
+        if not version or version[0] in '<>=' or ' ' in version or (self._WILDCARD in version and operator != '='):
+            raise ValueError(f'Invalid version constraint: {self._spec}')
+
+        return operator, version
+
+    def _matches_clause(self, version: str, operator: str, required: str) -> bool:
+        if self._WILDCARD in required:
+            return fnmatchcase(version, required)
+
+        return self._OPERATORS[operator](apt_pkg.version_compare(version, required))
@@ -3,10 +3,11 @@ from unittest import TestCase
 from unittest.mock import MagicMock
 
 from apt import Cache, Package, Version
+from apt.cache import FetchFailedException
 from context_logger import setup_logging
 from package_downloader import PackageConfig
 
-from package_installer import AptInstaller
+from package_installer import AptInstaller, RetryPolicy, IDpkgRunner, IDpkgStatusReader
 
 
 class AptInstallerTest(TestCase):
@@ -34,7 +35,7 @@ class AptInstallerTest(TestCase):
     def test_install_returns_false_when_package_with_target_version_not_found(self):
         # Given
         apt_cache = MagicMock(spec=Cache)
-        apt_package = MagicMock(spec=Package)
+        apt_package = create_apt_package()
         apt_package.versions = {'version2': MagicMock(spec=Version)}
         apt_cache.get.return_value = apt_package
         apt_installer = AptInstaller(apt_cache)
@@ -111,15 +112,318 @@ class AptInstallerTest(TestCase):
         self.assertFalse(result)
         apt_cache.commit.assert_called_once()
 
+    def test_is_installed_returns_true_when_installed_version_matches(self):
+        # Given
+        apt_cache = MagicMock(spec=Cache)
+        apt_package = create_apt_package()
+        apt_package.is_installed = True
+        apt_cache.get.return_value = apt_package
+        apt_installer = AptInstaller(apt_cache)
+
+        # When
+        result = apt_installer.is_installed(PackageConfig(package='package1', version='version1'))
+
+        # Then
+        self.assertTrue(result)
+
+    def test_is_installed_returns_false_when_installed_version_differs(self):
+        # Given
+        apt_cache = MagicMock(spec=Cache)
+        apt_package = create_apt_package()
+        apt_package.is_installed = True
+        apt_cache.get.return_value = apt_package
+        apt_installer = AptInstaller(apt_cache)
+
+        # When
+        result = apt_installer.is_installed(PackageConfig(package='package1', version='version2'))
+
+        # Then
+        self.assertFalse(result)
+
+    def test_install_batch_commits_once_for_all_packages(self):
+        # Given
+        apt_cache = MagicMock(spec=Cache)
+        apt_packages = {name: create_apt_package(name) for name in ['package1', 'package2', 'package3']}
+        for apt_package in apt_packages.values():
+            apt_package.mark_install.side_effect = lambda p=apt_package: setattr(p, 'is_installed', True)
+        apt_cache.get.side_effect = lambda name: apt_packages.get(name)
+        apt_installer = AptInstaller(apt_cache)
+        package_configs = [PackageConfig(package=name) for name in apt_packages]
+
+        # When
+        result = apt_installer.install_batch(package_configs)
+
+        # Then
+        self.assertEqual({'package1': True, 'package2': True, 'package3': True}, result)
+        apt_cache.commit.assert_called_once()
+        apt_cache.open.assert_called_once()
+
+    def test_install_batch_reports_result_per_package(self):
+        # Given
+        apt_cache = MagicMock(spec=Cache)
+        installed = create_apt_package('package1')
+        installed.is_installed = True
+        failing = create_apt_package('package2')
+        apt_packages = {'package1': installed, 'package2': failing}
+        apt_cache.get.side_effect = lambda name: apt_packages.get(name)
+        apt_installer = AptInstaller(apt_cache)
+        package_configs = [PackageConfig(package=name) for name in ['package1', 'package2', 'package3']]
+
+        # When
+        result = apt_installer.install_batch(package_configs)
+
+        # Then
+        self.assertEqual({'package1': True, 'package2': False, 'package3': False}, result)
+        failing.mark_install.assert_called_once()
+        installed.mark_install.assert_not_called()
+        apt_cache.commit.assert_called_once()
+
+    def test_install_batch_does_not_commit_when_nothing_to_install(self):
+        # Given
+        apt_cache = MagicMock(spec=Cache)
+        apt_package = create_apt_package()
+        apt_package.is_installed = True
+        apt_cache.get.return_value = apt_package
+        apt_installer = AptInstaller(apt_cache)
+
+        # When
+        result = apt_installer.install_batch([PackageConfig(package='package1')])
+
+        # Then
+        self.assertEqual({'package1': True}, result)
+        apt_cache.commit.assert_not_called()
+        apt_cache.open.assert_not_called()
+
+    def test_mark_batch_marks_packages_without_commit(self):
+        # Given
+        apt_cache = MagicMock(spec=Cache)
+        apt_packages = {'package1': create_apt_package('package1')}
+        apt_cache.get.side_effect = lambda name: apt_packages.get(name)
+        apt_installer = AptInstaller(apt_cache)
+        package_configs = [PackageConfig(package='package1'), PackageConfig(package='package2')]
+
+        # When
+        result = apt_installer.mark_batch(package_configs)
+
+        # Then
+        self.assertEqual({'package1': True, 'package2': False}, result)
+        apt_packages['package1'].mark_install.assert_called_once()
+        apt_cache.commit.assert_not_called()
+
+    def test_mark_batch_reports_package_failed_to_mark(self):
+        # Given
+        apt_cache = MagicMock(spec=Cache)
+        apt_packages = {name: create_apt_package(name) for name in ['package1', 'package2']}
+        apt_packages['package1'].mark_install.side_effect = SystemError('E:Unable to correct problems')
+        apt_cache.get.side_effect = lambda name: apt_packages.get(name)
+        apt_installer = AptInstaller(apt_cache)
+
+        # When
+        result = apt_installer.mark_batch([PackageConfig(package=name) for name in apt_packages])
+
+        # Then
+        self.assertEqual({'package1': False, 'package2': True}, result)
+        apt_cache.clear.assert_called_once()
+
+    def test_install_batch_returns_false_when_exception_raised_on_commit(self):
+        # Given
+        apt_cache = MagicMock(spec=Cache)
+        apt_cache.get.return_value = create_apt_package()
+        apt_cache.commit.side_effect = Exception('Error')
+        apt_installer = AptInstaller(apt_cache)
+
+        # When
+        result = apt_installer.install_batch([PackageConfig(package='package1')])
+
+        # Then
+        self.assertEqual({'package1': False}, result)
+        self.assertEqual(2, apt_cache.commit.call_count)
+        self.assertEqual(2, apt_cache.clear.call_count)
+
+    def test_install_batch_installs_packages_one_by_one_when_batch_commit_fails(self):
+        # Given
+        apt_cache = MagicMock(spec=Cache)
+        apt_packages = {name: create_apt_package(name) for name in ['package1', 'package2']}
+        apt_cache.get.side_effect = lambda name: apt_packages.get(name)
+        marked = []
+        for apt_package in apt_packages.values():
+            apt_package.mark_install.side_effect = lambda p=apt_package: marked.append(p)
+
+        def commit():
+            if len(marked) > 1:
+                marked.clear()
+                raise SystemError('E:Unable to correct problems, you have held broken packages')
+            apt_packages['package1'].is_installed = True
+            marked.clear()
+
+        apt_cache.commit.side_effect = commit
+        apt_cache.clear.side_effect = marked.clear
+        apt_installer = AptInstaller(apt_cache)
+        package_configs = [PackageConfig(package=name) for name in apt_packages]
+
+        # When
+        result = apt_installer.install_batch(package_configs)
 
-def create_apt_package():
+        # Then
+        self.assertEqual({'package1': True, 'package2': False}, result)
+        self.assertEqual(2, apt_packages['package1'].mark_install.call_count)
+
+    def test_install_batch_reports_package_failed_to_mark_and_keeps_others(self):
+        # Given
+        apt_cache = MagicMock(spec=Cache)
+        apt_packages = {name: create_apt_package(name) for name in ['package1', 'package2', 'package3']}
+        for apt_package in apt_packages.values():
+            apt_package.mark_install.side_effect = lambda p=apt_package: setattr(p, 'is_installed', True)
+        apt_packages['package2'].mark_install.side_effect = SystemError('E:Unable to correct problems')
+        apt_cache.get.side_effect = lambda name: apt_packages.get(name)
+        apt_installer = AptInstaller(apt_cache)
+        package_configs = [PackageConfig(package=name) for name in apt_packages]
+
+        # When
+        result = apt_installer.install_batch(package_configs)
+
+        # Then
+        self.assertEqual({'package1': True, 'package2': False, 'package3': True}, result)
+        apt_cache.clear.assert_called_once()
+        apt_cache.commit.assert_called_once()
+
+    def test_install_selects_highest_version_matching_constraint(self):
+        # Given
+        apt_cache = MagicMock(spec=Cache)
+        apt_package = create_apt_package()
+        apt_package.versions = create_version_list(['1.0.0', '1.5.0', '1.10.0', '2.0.0'])
+        apt_cache.get.return_value = apt_package
+        apt_installer = AptInstaller(apt_cache)
+
+        # When
+        apt_installer.install(PackageConfig(package='package1', version='>= 1.0, << 2.0'))
+
+        # Then
+        self.assertEqual('1.10.0', apt_package.candidate.version)
+        apt_package.mark_install.assert_called_once()
+        apt_cache.commit.assert_called_once()
+
+    def test_install_skips_package_when_installed_version_satisfies_constraint(self):
+        # Given
+        apt_cache = MagicMock(spec=Cache)
+        apt_package = create_apt_package()
+        apt_package.is_installed = True
+        apt_package.installed.version = '1.2.0'
+        apt_package.versions = create_version_list([])
+        apt_cache.get.return_value = apt_package
+        apt_installer = AptInstaller(apt_cache)
+
+        # When
+        result = apt_installer.install(PackageConfig(package='package1', version='>= 1.0'))
+
+        # Then
+        self.assertTrue(result)
+        apt_package.mark_install.assert_not_called()
+        apt_cache.commit.assert_not_called()
+
+    def test_install_batch_upgrades_package_when_installed_version_does_not_satisfy_constraint(self):
+        # Given
+        apt_cache = MagicMock(spec=Cache)
+        apt_package = create_apt_package()
+        apt_package.is_installed = True
+        apt_package.installed.version = '1.2.0'
+        apt_package.versions = create_version_list(['1.2.0', '2.0.1', '2.1.0'])
+        apt_cache.get.return_value = apt_package
+        apt_installer = AptInstaller(apt_cache)
+
+        # When
+        apt_installer.install_batch([PackageConfig(package='package1', version='2.0.*')])
+
+        # Then
+        self.assertEqual('2.0.1', apt_package.candidate.version)
+        apt_package.mark_install.assert_called_once()
+        apt_cache.commit.assert_called_once()
+
+    def test_is_available_returns_false_when_no_version_matches_constraint(self):
+        # Given
+        apt_cache = MagicMock(spec=Cache)
+        apt_package = create_apt_package()
+        apt_package.versions = create_version_list(['1.0.0', '2.0.0'])
+        apt_cache.get.return_value = apt_package
+        apt_installer = AptInstaller(apt_cache)
+
+        # When
+        result = apt_installer.is_available(PackageConfig(package='package1', version='>> 2.0.0'))
+
+        # Then
+        self.assertFalse(result)
+
+    def test_install_returns_false_when_version_constraint_is_invalid(self):
+        # Given
+        apt_cache = MagicMock(spec=Cache)
+        apt_package = create_apt_package()
+        apt_package.versions = create_version_list(['1.0.0'])
+        apt_cache.get.return_value = apt_package
+        apt_installer = AptInstaller(apt_cache)
+
+        # When
+        result = apt_installer.install(PackageConfig(package='package1', version='> 1.0.0'))
+
+        # Then
+        self.assertFalse(result)
+        apt_cache.commit.assert_not_called()
+
+    def test_install_retries_failed_commit_and_marks_package_again(self):
+        # Given
+        apt_cache = MagicMock(spec=Cache)
+        apt_package = create_apt_package()
+        apt_cache.get.return_value = apt_package
+        apt_cache.commit.side_effect = commit_after_failures(apt_package, 1)
+        dpkg_runner = MagicMock(spec=IDpkgRunner)
+        status_reader = MagicMock(spec=IDpkgStatusReader)
+        status_reader.is_interrupted.return_value = True
+        retry_policy = RetryPolicy(dpkg_runner, status_reader, 1, 0)
+        apt_installer = AptInstaller(apt_cache, retry_policy=retry_policy)
+
+        # When
+        result = apt_installer.install(PackageConfig(package='package1'))
+
+        # Then
+        self.assertTrue(result)
+        self.assertEqual(2, apt_cache.commit.call_count)
+        self.assertEqual(2, apt_package.mark_install.call_count)
+        dpkg_runner.configure_pending.assert_called_once()
+        apt_cache.clear.assert_not_called()
+
+
+def create_apt_package(name='package1'):
     apt_package = MagicMock(spec=Package)
-    apt_package.name = 'package1'
+    apt_package.name = name
     apt_package.is_installed = False
     apt_package.candidate.version = 'version1'
     apt_package.installed.version = 'version1'
     return apt_package
 
 
+def commit_after_failures(apt_package, failures):
+    attempts = []
+
+    def commit():
+        attempts.append(True)
+        if len(attempts) <= failures:
+            raise FetchFailedException('fetch failed')
+        apt_package.is_installed = True
+        return True
+
+    return commit
+
+
+def create_version_list(versions):
+    apt_versions = {}
+    for version in versions:
+        apt_versions[version] = MagicMock(spec=Version)
+        apt_versions[version].version = version
+    version_list = MagicMock()
+    version_list.__iter__.side_effect = lambda: iter(apt_versions.values())
+    version_list.get.side_effect = apt_versions.get
+    version_list.keys.side_effect = apt_versions.keys
+    return version_list
+
+
 if __name__ == '__main__':
     unittest.main()
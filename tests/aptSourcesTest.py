@@ -0,0 +1,59 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from context_logger import setup_logging
+
+from package_installer import AptSources
+
+
+class AptSourcesTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        setup_logging('debian-package-installer', 'DEBUG', warn_on_overwrite=False)
+
+    def setUp(self):
+        print()
+        self.temp_dir = TemporaryDirectory()
+        self.sources_list = self.write_file('sources.list', 'deb http://deb.debian.org/debian bookworm main\n')
+        self.sources_dir = os.path.join(self.temp_dir.name, 'sources.list.d')
+        os.makedirs(self.sources_dir)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_get_files_returns_existing_source_files_in_order(self):
+        # Given
+        source2 = self.write_file('sources.list.d/source2.list', 'deb http://repo2 bookworm main\n')
+        source1 = self.write_file('sources.list.d/source1.list', 'deb http://repo1 bookworm main\n')
+        apt_sources = AptSources((self.sources_list, self.sources_dir, '/not/existing/sources.list'))
+
+        # When
+        result = apt_sources.get_files()
+
+        # Then
+        self.assertEqual([self.sources_list, source1, source2], result)
+
+    def test_get_hash_changes_when_source_is_added(self):
+        # Given
+        apt_sources = AptSources((self.sources_list, self.sources_dir))
+        sources_hash = apt_sources.get_hash()
+
+        # When
+        self.write_file('sources.list.d/source1.list', 'deb http://repo1 bookworm main\n')
+
+        # Then
+        self.assertNotEqual(sources_hash, apt_sources.get_hash())
+        self.assertEqual(apt_sources.get_hash(), AptSources((self.sources_list, self.sources_dir)).get_hash())
+
+    def write_file(self, name, content):
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, 'w') as file:
+            file.write(content)
+        return path
+
+
+if __name__ == '__main__':
+    unittest.main()
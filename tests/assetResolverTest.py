@@ -0,0 +1,149 @@
+import unittest
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from context_logger import setup_logging
+from package_downloader import PackageConfig, ReleaseConfig
+from requests import Session, Response, HTTPError
+
+from package_installer import AssetResolver, AssetInfo, IResolutionCache, Resolution
+
+ASSET_URL = 'https://github.com/owner/package1/releases/download/v1.0.0/package1_1.0.0_armhf.deb'
+
+
+class AssetResolverTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        setup_logging('debian-package-installer', 'DEBUG', warn_on_overwrite=False)
+
+    def setUp(self):
+        print()
+
+    def test_resolve_returns_file_url_asset(self):
+        # Given
+        session = MagicMock(spec=Session)
+        asset_resolver = AssetResolver(session)
+
+        # When
+        result = asset_resolver.resolve(PackageConfig(package='package1', file_url=f'{ASSET_URL}#sha256=abcd'))
+
+        # Then
+        self.assertEqual(AssetInfo(ASSET_URL, 'package1_1.0.0_armhf.deb', 'abcd'), result)
+        session.get.assert_not_called()
+
+    def test_resolve_returns_matching_release_asset_with_digest(self):
+        # Given
+        session = create_session({'tag_name': 'v1.0.0', 'assets': [
+            {'name': 'package1_1.0.0_amd64.deb', 'browser_download_url': 'amd64', 'digest': None},
+            {'name': 'package1_1.0.0_armhf.deb', 'browser_download_url': ASSET_URL, 'digest': 'sha256:abcd'},
+        ]})
+        asset_resolver = AssetResolver(session)
+        release = ReleaseConfig(repo='owner/package1', tag='v1.0.0', matcher='*armhf.deb')
+
+        # When
+        result = asset_resolver.resolve(PackageConfig(package='package1', release=release))
+
+        # Then
+        self.assertEqual(AssetInfo(ASSET_URL, 'package1_1.0.0_armhf.deb', 'abcd'), result)
+        session.get.assert_called_once_with('https://api.github.com/repos/owner/package1/releases/tags/v1.0.0',
+                                            headers={'Accept': 'application/vnd.github+json'}, timeout=30)
+
+    def test_resolve_uses_latest_release_endpoint(self):
+        # Given
+        session = create_session({'tag_name': 'v1.0.0', 'assets': [
+            {'name': 'package1_1.0.0_armhf.deb', 'browser_download_url': ASSET_URL},
+        ]})
+        asset_resolver = AssetResolver(session)
+        release = ReleaseConfig(repo='owner/package1', tag='latest', matcher='*armhf.deb')
+
+        # When
+        result = asset_resolver.resolve(PackageConfig(package='package1', release=release))
+
+        # Then
+        self.assertEqual(AssetInfo(ASSET_URL, 'package1_1.0.0_armhf.deb'), result)
+        session.get.assert_called_once_with('https://api.github.com/repos/owner/package1/releases/latest',
+                                            headers={'Accept': 'application/vnd.github+json'}, timeout=30)
+
+    def test_resolve_returns_none_when_no_asset_matches(self):
+        # Given
+        session = create_session({'tag_name': 'v1.0.0', 'assets': [
+            {'name': 'package1_1.0.0_amd64.deb', 'browser_download_url': 'amd64'},
+        ]})
+        asset_resolver = AssetResolver(session)
+        release = ReleaseConfig(repo='owner/package1', tag='latest', matcher='*armhf.deb')
+
+        # When
+        result = asset_resolver.resolve(PackageConfig(package='package1', release=release))
+
+        # Then
+        self.assertIsNone(result)
+
+    def test_resolve_returns_none_when_release_request_fails(self):
+        # Given
+        session = create_session({})
+        session.get.return_value.raise_for_status.side_effect = HTTPError('403 rate limit exceeded')
+        asset_resolver = AssetResolver(session)
+        release = ReleaseConfig(repo='owner/package1', tag='latest', matcher='*armhf.deb')
+
+        # When
+        result = asset_resolver.resolve(PackageConfig(package='package1', release=release))
+
+        # Then
+        self.assertIsNone(result)
+
+    def test_resolve_returns_release_asset_from_resolution_cache(self):
+        # Given
+        session = MagicMock(spec=Session)
+        resolution_cache = MagicMock(spec=IResolutionCache)
+        resolution_cache.get.return_value = Resolution('deb', '1.0.0', ASSET_URL, 'abcd')
+        asset_resolver = AssetResolver(session, resolution_cache=resolution_cache)
+        release = ReleaseConfig(repo='owner/package1', tag='latest', matcher='*armhf.deb')
+
+        # When
+        result = asset_resolver.resolve(PackageConfig(package='package1', release=release))
+
+        # Then
+        self.assertEqual(AssetInfo(ASSET_URL, 'package1_1.0.0_armhf.deb', 'abcd'), result)
+        session.get.assert_not_called()
+
+    def test_resolve_stores_release_asset_in_resolution_cache(self):
+        # Given
+        session = create_session({'tag_name': 'v1.0.0', 'assets': [
+            {'name': 'package1_1.0.0_armhf.deb', 'browser_download_url': ASSET_URL, 'digest': 'sha256:abcd'},
+        ]})
+        resolution_cache = MagicMock(spec=IResolutionCache)
+        resolution_cache.get.return_value = None
+        asset_resolver = AssetResolver(session, resolution_cache=resolution_cache)
+        release = ReleaseConfig(repo='owner/package1', tag='latest', matcher='*armhf.deb')
+        package_config = PackageConfig(package='package1', release=release)
+
+        # When
+        asset_resolver.resolve(package_config)
+
+        # Then
+        resolution_cache.put.assert_called_once_with(package_config, Resolution('deb', url=ASSET_URL, sha256='abcd'))
+
+    def test_resolve_returns_none_for_repository_package(self):
+        # Given
+        session = MagicMock(spec=Session)
+        asset_resolver = AssetResolver(session)
+
+        # When
+        result = asset_resolver.resolve(PackageConfig(package='package1', version='1.0.0'))
+
+        # Then
+        self.assertIsNone(result)
+        session.get.assert_not_called()
+
+
+def create_session(release):
+    response = MagicMock(spec=Response)
+    response.json.return_value = release
+    session = MagicMock(spec=Session)
+    session.get.return_value = response
+    return session
+
+
+if __name__ == '__main__':
+    unittest.main()
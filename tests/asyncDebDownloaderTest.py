@@ -0,0 +1,272 @@
+import hashlib
+import os
+import threading
+import time
+import unittest
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from context_logger import setup_logging
+from package_downloader import PackageConfig
+from requests import Session, Response, HTTPError, ConnectionError
+
+from package_installer import AsyncDebDownloader, IAssetResolver, AssetInfo
+
+from debArchiveBuilder import create_deb_archive
+
+CONTROL = 'Package: package1\nVersion: 1.0.0\nArchitecture: armhf\n'
+PACKAGE_URL = 'https://github.com/owner/package1/releases/download/v1.0.0/package1_1.0.0_armhf.deb'
+
+
+class AsyncDebDownloaderTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        setup_logging('debian-package-installer', 'DEBUG', warn_on_overwrite=False)
+
+    def setUp(self):
+        print()
+        self.temp_dir = TemporaryDirectory()
+        self.download_dir = self.temp_dir.name
+        self.package_file = os.path.join(self.download_dir, 'package1_1.0.0_armhf.deb')
+        self.content = create_deb_archive(CONTROL, data=os.urandom(1024))
+        self.sha256 = hashlib.sha256(self.content).hexdigest()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_download_writes_verified_file_and_parses_control(self):
+        # Given
+        asset_resolver, session = create_components(self.sha256)
+        session.get.side_effect = lambda url, **kwargs: create_response(self.content)
+        downloader = AsyncDebDownloader(asset_resolver, session, self.download_dir, backoff=0)
+
+        # When
+        result = downloader.download(PackageConfig(package='package1'))
+
+        # Then
+        self.assertEqual(self.package_file, result)
+        self.assertEqual(self.content, read_file(result))
+        self.assertEqual(CONTROL, downloader.get_control(result))
+
+    def test_download_resumes_after_interrupted_transfer(self):
+        # Given
+        asset_resolver, session = create_components(self.sha256)
+        responses = [
+            create_response(self.content, fail_after=100, headers={'ETag': '"v1"'}),
+            create_range_response(self.content, 100),
+        ]
+        session.get.side_effect = lambda url, **kwargs: responses.pop(0)
+        downloader = AsyncDebDownloader(asset_resolver, session, self.download_dir, backoff=0, chunk_size=50)
+
+        # When
+        result = downloader.download(PackageConfig(package='package1'))
+
+        # Then
+        self.assertEqual(self.content, read_file(result))
+        self.assertEqual(CONTROL, downloader.get_control(result))
+        self.assertIsNone(session.get.call_args_list[0].kwargs['headers'])
+        self.assertEqual({'Range': 'bytes=100-', 'If-Range': '"v1"'}, session.get.call_args_list[1].kwargs['headers'])
+        self.assertFalse(os.path.exists(f'{self.package_file}.part.validator'))
+
+    def test_download_resumes_partial_file_of_previous_run(self):
+        # Given
+        asset_resolver, session = create_components(self.sha256)
+        with open(f'{self.package_file}.part', 'wb') as file:
+            file.write(self.content[:200])
+        session.get.side_effect = lambda url, **kwargs: create_range_response(self.content, 200)
+        downloader = AsyncDebDownloader(asset_resolver, session, self.download_dir, backoff=0)
+
+        # When
+        result = downloader.download(PackageConfig(package='package1'))
+
+        # Then
+        self.assertEqual(self.content, read_file(result))
+        self.assertEqual(CONTROL, downloader.get_control(result))
+        self.assertEqual({'Range': 'bytes=200-'}, session.get.call_args.kwargs['headers'])
+
+    def test_download_restarts_when_server_does_not_support_range(self):
+        # Given
+        asset_resolver, session = create_components(self.sha256)
+        with open(f'{self.package_file}.part', 'wb') as file:
+            file.write(b'stale content')
+        session.get.side_effect = lambda url, **kwargs: create_response(self.content)
+        downloader = AsyncDebDownloader(asset_resolver, session, self.download_dir, backoff=0)
+
+        # When
+        result = downloader.download(PackageConfig(package='package1'))
+
+        # Then
+        self.assertEqual(self.content, read_file(result))
+
+    def test_download_restarts_when_partial_file_is_not_satisfiable(self):
+        # Given
+        asset_resolver, session = create_components(self.sha256)
+        with open(f'{self.package_file}.part', 'wb') as file:
+            file.write(self.content + b'stale content')
+        responses = [create_response(b'', 416), create_response(self.content)]
+        session.get.side_effect = lambda url, **kwargs: responses.pop(0)
+        downloader = AsyncDebDownloader(asset_resolver, session, self.download_dir, retries=0, backoff=0)
+
+        # When
+        result = downloader.download(PackageConfig(package='package1'))
+
+        # Then
+        self.assertEqual(self.content, read_file(result))
+        self.assertIsNone(session.get.call_args.kwargs['headers'])
+
+    def test_download_restarts_when_content_range_does_not_match_partial_file(self):
+        # Given
+        asset_resolver, session = create_components(self.sha256)
+        with open(f'{self.package_file}.part', 'wb') as file:
+            file.write(self.content[:200])
+        responses = [create_range_response(self.content, 100), create_response(self.content)]
+        session.get.side_effect = lambda url, **kwargs: responses.pop(0)
+        downloader = AsyncDebDownloader(asset_resolver, session, self.download_dir, retries=0, backoff=0)
+
+        # When
+        result = downloader.download(PackageConfig(package='package1'))
+
+        # Then
+        self.assertEqual(self.content, read_file(result))
+        self.assertIsNone(session.get.call_args.kwargs['headers'])
+
+    def test_download_does_not_resume_partial_file_without_checksum(self):
+        # Given
+        asset_resolver, session = create_components()
+        with open(f'{self.package_file}.part', 'wb') as file:
+            file.write(b'stale content')
+        session.get.side_effect = lambda url, **kwargs: create_response(self.content)
+        downloader = AsyncDebDownloader(asset_resolver, session, self.download_dir, backoff=0)
+
+        # When
+        result = downloader.download(PackageConfig(package='package1'))
+
+        # Then
+        self.assertEqual(self.content, read_file(result))
+        self.assertIsNone(session.get.call_args.kwargs['headers'])
+
+    def test_download_discards_partial_file_without_checksum_when_retries_exhausted(self):
+        # Given
+        asset_resolver, session = create_components()
+        session.get.side_effect = lambda url, **kwargs: create_response(self.content, fail_after=100)
+        downloader = AsyncDebDownloader(asset_resolver, session, self.download_dir, retries=1, backoff=0,
+                                        chunk_size=50)
+
+        # When
+        result = downloader.download(PackageConfig(package='package1'))
+
+        # Then
+        self.assertIsNone(result)
+        self.assertFalse(os.path.exists(f'{self.package_file}.part'))
+
+    def test_download_returns_none_and_keeps_partial_file_when_retries_exhausted(self):
+        # Given
+        asset_resolver, session = create_components(self.sha256)
+        session.get.side_effect = lambda url, **kwargs: create_response(self.content, fail_after=100)
+        downloader = AsyncDebDownloader(asset_resolver, session, self.download_dir, retries=2, backoff=0,
+                                        chunk_size=50)
+
+        # When
+        result = downloader.download(PackageConfig(package='package1'))
+
+        # Then
+        self.assertIsNone(result)
+        self.assertEqual(3, session.get.call_count)
+        self.assertTrue(os.path.isfile(f'{self.package_file}.part'))
+
+    def test_download_does_not_retry_when_request_rejected(self):
+        # Given
+        asset_resolver, session = create_components(self.sha256)
+        session.get.side_effect = lambda url, **kwargs: create_response(b'', 404)
+        downloader = AsyncDebDownloader(asset_resolver, session, self.download_dir, retries=2, backoff=0)
+
+        # When
+        result = downloader.download(PackageConfig(package='package1'))
+
+        # Then
+        self.assertIsNone(result)
+        self.assertEqual(1, session.get.call_count)
+
+    def test_download_retries_when_server_is_unavailable(self):
+        # Given
+        asset_resolver, session = create_components(self.sha256)
+        responses = [create_response(b'', 503), create_response(self.content)]
+        session.get.side_effect = lambda url, **kwargs: responses.pop(0)
+        downloader = AsyncDebDownloader(asset_resolver, session, self.download_dir, retries=2, backoff=0)
+
+        # When
+        result = downloader.download(PackageConfig(package='package1'))
+
+        # Then
+        self.assertEqual(self.content, read_file(result))
+        self.assertEqual(2, session.get.call_count)
+
+    def test_download_limits_concurrent_downloads_per_host(self):
+        # Given
+        asset_resolver, session = create_components()
+        active = []
+        peak = []
+
+        def get(url, **kwargs):
+            active.append(url)
+            peak.append(len(active))
+            time.sleep(0.05)
+            active.pop()
+            return create_response(self.content)
+
+        session.get.side_effect = get
+        asset_resolver.resolve.side_effect = lambda config: AssetInfo(PACKAGE_URL, f'{config.package}.deb')
+        downloader = AsyncDebDownloader(asset_resolver, session, self.download_dir, host_connections=2)
+
+        # When
+        threads = [threading.Thread(target=downloader.download, args=(PackageConfig(package=f'package{index}'),))
+                   for index in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Then
+        self.assertEqual(6, session.get.call_count)
+        self.assertLessEqual(max(peak), 2)
+
+
+def create_components(sha256=None):
+    asset_resolver = MagicMock(spec=IAssetResolver)
+    asset_resolver.resolve.return_value = AssetInfo(PACKAGE_URL, 'package1_1.0.0_armhf.deb', sha256)
+    session = MagicMock(spec=Session)
+    return asset_resolver, session
+
+
+def create_response(content, status_code=200, fail_after=None, headers=None):
+    response = MagicMock(spec=Response)
+    response.__enter__.return_value = response
+    response.status_code = status_code
+    response.headers = headers or {}
+    if status_code >= 400:
+        response.raise_for_status.side_effect = HTTPError(f'{status_code} Error', response=response)
+
+    def iter_content(size):
+        for offset in range(0, len(content), size):
+            if fail_after is not None and offset >= fail_after:
+                raise ConnectionError('Connection reset by peer')
+            yield content[offset:offset + size]
+
+    response.iter_content.side_effect = iter_content
+    return response
+
+
+def create_range_response(content, offset):
+    content_range = f'bytes {offset}-{len(content) - 1}/{len(content)}'
+    return create_response(content[offset:], 206, headers={'Content-Range': content_range})
+
+
+def read_file(file_path):
+    with open(file_path, 'rb') as file:
+        return file.read()
+
+
+if __name__ == '__main__':
+    unittest.main()
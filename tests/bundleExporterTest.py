@@ -0,0 +1,90 @@
+import json
+import os
+import tarfile
+import unittest
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from apt import Cache, Package, Version
+from context_logger import setup_logging
+from package_downloader import PackageConfig
+
+from package_installer import BundleExporter, IInstallPlanner, InstallPlan, PlanEntry
+
+
+class BundleExporterTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        setup_logging('debian-package-installer', 'DEBUG', warn_on_overwrite=False)
+
+    def setUp(self):
+        print()
+        self.temp_dir = TemporaryDirectory()
+        self.bundle_path = os.path.join(self.temp_dir.name, 'bundle.tar.gz')
+        self.package_file = os.path.join(self.temp_dir.name, 'package2_1.0.0_armhf.deb')
+        with open(self.package_file, 'wb') as file:
+            file.write(b'package2')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_export_writes_apt_and_deb_packages_with_manifest(self):
+        # Given
+        apt_cache, install_planner = create_components()
+        install_planner.plan.return_value = InstallPlan([
+            PlanEntry('package0', 'install', 'apt', '2.0.0', None, 8),
+            PlanEntry('package2', 'install', 'deb', '1.0.0', None, 8, self.package_file),
+            PlanEntry('package3', 'remove', 'apt', '1.0.0', '1.0.0'),
+        ], ['package4'])
+        bundle_exporter = BundleExporter(apt_cache, install_planner)
+
+        # When
+        plan = bundle_exporter.export([PackageConfig(package='package1')], self.bundle_path)
+
+        # Then
+        with tarfile.open(self.bundle_path) as bundle:
+            manifest = json.load(bundle.extractfile('manifest.json'))
+            self.assertEqual(b'package0', bundle.extractfile('packages/package0_2.0.0_armhf.deb').read())
+            self.assertEqual(b'package2', bundle.extractfile('packages/package2_1.0.0_armhf.deb').read())
+        self.assertEqual(plan.to_dict(), manifest['plan'])
+        self.assertEqual(['packages/package0_2.0.0_armhf.deb', 'packages/package2_1.0.0_armhf.deb'],
+                         sorted(manifest['checksums']))
+        self.assertEqual(['package4'], manifest['plan']['unresolved'])
+        self.assertIsNone(plan.entries[2].file)
+
+    def test_export_fails_when_package_version_is_not_available(self):
+        # Given
+        apt_cache, install_planner = create_components()
+        install_planner.plan.return_value = InstallPlan([PlanEntry('package0', 'install', 'apt', '3.0.0')])
+        bundle_exporter = BundleExporter(apt_cache, install_planner)
+
+        # When, Then
+        with self.assertRaises(ValueError):
+            bundle_exporter.export([PackageConfig(package='package1')], self.bundle_path)
+
+        self.assertFalse(os.path.exists(self.bundle_path))
+
+
+def create_components():
+    version = MagicMock(spec=Version)
+    version.version = '2.0.0'
+    version.fetch_binary.side_effect = lambda destdir: write_file(
+        os.path.join(destdir, 'package0_2.0.0_armhf.deb'), b'package0')
+    package = MagicMock(spec=Package)
+    package.versions.get.side_effect = lambda name: version if name == '2.0.0' else None
+    apt_cache = MagicMock(spec=Cache)
+    apt_cache.__getitem__.side_effect = lambda name: package
+    install_planner = MagicMock(spec=IInstallPlanner)
+    return apt_cache, install_planner
+
+
+def write_file(file_path, content):
+    with open(file_path, 'wb') as file:
+        file.write(content)
+    return file_path
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+import hashlib
+import io
+import json
+import os
+import tarfile
+import unittest
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from context_logger import setup_logging
+
+from package_installer import BundleInstaller, IDpkgStatusReader, IDpkgRunner, InstallPlan, PlanEntry
+
+
+class BundleInstallerTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        setup_logging('debian-package-installer', 'DEBUG', warn_on_overwrite=False)
+
+    def setUp(self):
+        print()
+        self.temp_dir = TemporaryDirectory()
+        self.bundle_path = os.path.join(self.temp_dir.name, 'bundle.tar.gz')
+        self.plan = InstallPlan([
+            PlanEntry('package0', 'install', 'apt', '2.0.0', None, 8, 'packages/package0_2.0.0_armhf.deb'),
+            PlanEntry('package1', 'upgrade', 'deb', '1.0.0', '0.9.0', 8, 'packages/package1_1.0.0_armhf.deb'),
+            PlanEntry('package3', 'remove', 'apt', '1.0.0', '1.0.0'),
+        ])
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_install_removes_and_installs_packages_in_single_dpkg_calls(self):
+        # Given
+        create_bundle(self.bundle_path, self.plan, {
+            'packages/package0_2.0.0_armhf.deb': b'package0',
+            'packages/package1_1.0.0_armhf.deb': b'package1',
+        })
+        status_reader, dpkg_runner = create_components(
+            {'package1': '0.9.0', 'package3': '1.0.0'}, {'package0': '2.0.0', 'package1': '1.0.0'})
+        installed_files = []
+        dpkg_runner.install.side_effect = lambda files: installed_files.extend(read_file(file) for file in files)
+        bundle_installer = BundleInstaller(status_reader, dpkg_runner)
+
+        # When
+        result = bundle_installer.install(self.bundle_path)
+
+        # Then
+        self.assertEqual({'package0': True, 'package1': True, 'package3': True}, result)
+        dpkg_runner.remove.assert_called_once_with(['package3'])
+        self.assertEqual([b'package0', b'package1'], installed_files)
+
+    def test_install_skips_packages_already_installed(self):
+        # Given
+        create_bundle(self.bundle_path, self.plan, {
+            'packages/package0_2.0.0_armhf.deb': b'package0',
+            'packages/package1_1.0.0_armhf.deb': b'package1',
+        })
+        installed = {'package0': '2.0.0', 'package1': '1.0.0'}
+        status_reader, dpkg_runner = create_components(installed, installed)
+        bundle_installer = BundleInstaller(status_reader, dpkg_runner)
+
+        # When
+        result = bundle_installer.install(self.bundle_path)
+
+        # Then
+        self.assertEqual({'package0': True, 'package1': True, 'package3': True}, result)
+        dpkg_runner.remove.assert_not_called()
+        dpkg_runner.install.assert_not_called()
+
+    def test_install_reports_failed_packages_when_dpkg_fails(self):
+        # Given
+        create_bundle(self.bundle_path, self.plan, {
+            'packages/package0_2.0.0_armhf.deb': b'package0',
+            'packages/package1_1.0.0_armhf.deb': b'package1',
+        })
+        status_reader, dpkg_runner = create_components({}, {'package0': '2.0.0'})
+        dpkg_runner.install.side_effect = Exception('dpkg failed')
+        bundle_installer = BundleInstaller(status_reader, dpkg_runner)
+
+        # When
+        result = bundle_installer.install(self.bundle_path)
+
+        # Then
+        self.assertEqual({'package0': True, 'package1': False, 'package3': True}, result)
+
+    def test_install_reports_failed_packages_when_bundle_member_is_corrupted(self):
+        # Given
+        create_bundle(self.bundle_path, self.plan, {
+            'packages/package0_2.0.0_armhf.deb': b'package0',
+            'packages/package1_1.0.0_armhf.deb': b'package1',
+        }, {'packages/package1_1.0.0_armhf.deb': b'corrupted'})
+        status_reader, dpkg_runner = create_components({'package3': '1.0.0'}, {'package3': '1.0.0'})
+        bundle_installer = BundleInstaller(status_reader, dpkg_runner)
+
+        # When
+        result = bundle_installer.install(self.bundle_path)
+
+        # Then
+        self.assertEqual({'package0': False, 'package1': False, 'package3': False}, result)
+        dpkg_runner.remove.assert_not_called()
+        dpkg_runner.install.assert_not_called()
+
+    def test_install_reports_failed_packages_when_bundle_member_is_missing(self):
+        # Given
+        create_bundle(self.bundle_path, self.plan, {'packages/package0_2.0.0_armhf.deb': b'package0'})
+        status_reader, dpkg_runner = create_components({}, {})
+        bundle_installer = BundleInstaller(status_reader, dpkg_runner)
+
+        # When
+        result = bundle_installer.install(self.bundle_path)
+
+        # Then
+        self.assertEqual({'package0': False, 'package1': False, 'package3': True}, result)
+        dpkg_runner.install.assert_not_called()
+
+    def test_install_reports_unresolved_packages_as_failed(self):
+        # Given
+        create_bundle(self.bundle_path, InstallPlan([], ['package4']), {})
+        status_reader, dpkg_runner = create_components({}, {})
+        bundle_installer = BundleInstaller(status_reader, dpkg_runner)
+
+        # When
+        result = bundle_installer.install(self.bundle_path)
+
+        # Then
+        self.assertEqual({'package4': False}, result)
+
+
+def create_components(installed_before, installed_after):
+    status_reader = MagicMock(spec=IDpkgStatusReader)
+    status_reader.get_installed_versions.side_effect = [installed_before, installed_after]
+    dpkg_runner = MagicMock(spec=IDpkgRunner)
+    return status_reader, dpkg_runner
+
+
+def create_bundle(bundle_path, plan, files, overrides=None):
+    checksums = {name: hashlib.sha256(content).hexdigest() for name, content in files.items()}
+    manifest = {'created_at': 0, 'plan': plan.to_dict(), 'checksums': checksums}
+    with tarfile.open(bundle_path, 'w:gz') as bundle:
+        add_file(bundle, 'manifest.json', json.dumps(manifest).encode())
+        for name, content in {**files, **(overrides or {})}.items():
+            add_file(bundle, name, content)
+
+
+def add_file(bundle, name, content):
+    info = tarfile.TarInfo(name)
+    info.size = len(content)
+    bundle.addfile(info, io.BytesIO(content))
+
+
+def read_file(file_path):
+    with open(file_path, 'rb') as file:
+        return file.read()
+
+
+if __name__ == '__main__':
+    unittest.main()
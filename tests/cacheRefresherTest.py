@@ -0,0 +1,115 @@
+import unittest
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from apt import Cache, Package
+from context_logger import setup_logging
+
+from package_installer import CacheRefresher, IDpkgStatusReader
+
+
+class CacheRefresherTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        setup_logging('debian-package-installer', 'DEBUG', warn_on_overwrite=False)
+
+    def setUp(self):
+        print()
+
+    def test_refresh_does_not_reopen_cache_when_not_invalidated(self):
+        # Given
+        apt_cache = MagicMock(spec=Cache)
+        cache_refresher = CacheRefresher(apt_cache)
+
+        # When
+        cache_refresher.refresh()
+
+        # Then
+        apt_cache.open.assert_not_called()
+
+    def test_refresh_reopens_cache_once_after_invalidated(self):
+        # Given
+        apt_cache = MagicMock(spec=Cache)
+        cache_refresher = CacheRefresher(apt_cache)
+        cache_refresher.invalidate()
+
+        # When
+        cache_refresher.refresh()
+        cache_refresher.refresh()
+
+        # Then
+        apt_cache.open.assert_called_once()
+
+    def test_refresh_reopens_cache_invalidated_by_other_refresher(self):
+        # Given
+        apt_cache = MagicMock(spec=Cache)
+        cache_refresher = CacheRefresher(apt_cache)
+        other_refresher = CacheRefresher(apt_cache)
+        other_refresher.invalidate()
+
+        # When
+        cache_refresher.refresh()
+        other_refresher.refresh()
+
+        # Then
+        apt_cache.open.assert_called_once()
+
+    def test_get_installed_version_returns_version_from_cache(self):
+        # Given
+        apt_cache = MagicMock(spec=Cache)
+        apt_cache.get.return_value = create_apt_package()
+        cache_refresher = CacheRefresher(apt_cache)
+        cache_refresher.invalidate()
+
+        # When
+        result = cache_refresher.get_installed_version('package1')
+
+        # Then
+        self.assertEqual('1.0.0', result)
+        apt_cache.open.assert_called_once()
+
+    def test_get_installed_version_returns_version_from_dpkg_status_without_reopening_cache(self):
+        # Given
+        apt_cache = MagicMock(spec=Cache)
+        status_reader = MagicMock(spec=IDpkgStatusReader)
+        status_reader.get_installed_versions.return_value = {'package1': '1.0.0'}
+        cache_refresher = CacheRefresher(apt_cache, status_reader)
+        cache_refresher.invalidate()
+
+        # When
+        result1 = cache_refresher.get_installed_version('package1')
+        result2 = cache_refresher.get_installed_version('package2')
+
+        # Then
+        self.assertEqual('1.0.0', result1)
+        self.assertIsNone(result2)
+        status_reader.get_installed_versions.assert_called_once()
+        apt_cache.open.assert_not_called()
+
+    def test_get_installed_version_uses_cache_when_not_invalidated(self):
+        # Given
+        apt_cache = MagicMock(spec=Cache)
+        apt_cache.get.return_value = create_apt_package()
+        status_reader = MagicMock(spec=IDpkgStatusReader)
+        cache_refresher = CacheRefresher(apt_cache, status_reader)
+
+        # When
+        result = cache_refresher.get_installed_version('package1')
+
+        # Then
+        self.assertEqual('1.0.0', result)
+        status_reader.get_installed_versions.assert_not_called()
+        apt_cache.open.assert_not_called()
+
+
+def create_apt_package():
+    apt_package = MagicMock(spec=Package)
+    apt_package.name = 'package1'
+    apt_package.is_installed = True
+    apt_package.installed.version = '1.0.0'
+    return apt_package
+
+
+if __name__ == '__main__':
+    unittest.main()
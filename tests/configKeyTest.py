@@ -0,0 +1,40 @@
+import unittest
+from unittest import TestCase
+
+from context_logger import setup_logging
+from package_downloader import PackageConfig, ReleaseConfig
+
+from package_installer import get_config_key
+
+
+class ConfigKeyTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        setup_logging('debian-package-installer', 'DEBUG', warn_on_overwrite=False)
+
+    def setUp(self):
+        print()
+
+    def test_get_config_key_returns_same_key_for_equal_configs(self):
+        # Given
+        release = ReleaseConfig(repo='owner/package1', tag='v1.0.0', matcher='*.deb')
+
+        # When
+        result = get_config_key(PackageConfig(package='package1', release=release))
+
+        # Then
+        self.assertEqual(get_config_key(PackageConfig(package='package1', release=release)), result)
+        self.assertEqual('{"file_url": null, "package": "package1", "release": ["owner/package1", "v1.0.0", '
+                         '"*.deb"], "version": null}', result)
+
+    def test_get_config_key_returns_different_key_when_version_differs(self):
+        # When
+        result = get_config_key(PackageConfig(package='package1', version='1.0.0'))
+
+        # Then
+        self.assertNotEqual(get_config_key(PackageConfig(package='package1', version='1.1.0')), result)
+
+
+if __name__ == '__main__':
+    unittest.main()
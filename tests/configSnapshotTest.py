@@ -0,0 +1,125 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from context_logger import setup_logging
+from package_downloader import PackageConfig
+
+from package_installer import ConfigSnapshot, IDpkgStatusReader
+
+
+class ConfigSnapshotTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        setup_logging('debian-package-installer', 'DEBUG', warn_on_overwrite=False)
+
+    def setUp(self):
+        print()
+        self.temp_dir = TemporaryDirectory()
+        self.snapshot_file = os.path.join(self.temp_dir.name, 'state', 'config-snapshot.json')
+        self.source_config = os.path.join(self.temp_dir.name, 'source-config.json')
+        self.write_file(self.source_config, '[]')
+        self.status_reader = MagicMock(spec=IDpkgStatusReader)
+        self.status_reader.get_installed_versions.return_value = {'package1': '1.0.0', 'package2': '2.0.0'}
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_get_changes_returns_all_packages_without_snapshot(self):
+        # Given
+        config_list = create_config_list()
+        config_snapshot = self.create_snapshot()
+
+        # When
+        result = config_snapshot.get_changes(config_list)
+
+        # Then
+        self.assertEqual(config_list, result)
+
+    def test_get_changes_returns_no_packages_when_config_is_unchanged(self):
+        # Given
+        config_list = create_config_list()
+        self.save_snapshot(config_list)
+
+        # When
+        result = self.create_snapshot().get_changes(config_list)
+
+        # Then
+        self.assertEqual([], result)
+
+    def test_get_changes_returns_added_and_changed_packages(self):
+        # Given
+        self.save_snapshot(create_config_list())
+        config_list = [
+            PackageConfig(package='package1', version='1.0.0'),
+            PackageConfig(package='package2', version='2.1.0'),
+            PackageConfig(package='package3'),
+        ]
+
+        # When
+        result = self.create_snapshot().get_changes(config_list)
+
+        # Then
+        self.assertEqual(config_list[1:], result)
+
+    def test_get_changes_returns_drifted_packages(self):
+        # Given
+        config_list = create_config_list()
+        self.save_snapshot(config_list)
+        self.status_reader.get_installed_versions.return_value = {'package1': '1.0.0'}
+
+        # When
+        result = self.create_snapshot().get_changes(config_list)
+
+        # Then
+        self.assertEqual([config_list[1]], result)
+
+    def test_get_changes_returns_all_packages_when_source_config_changed(self):
+        # Given
+        config_list = create_config_list()
+        self.save_snapshot(config_list)
+        self.write_file(self.source_config, '[{"name": "source"}]')
+        config_snapshot = self.create_snapshot()
+
+        # When
+        result = config_snapshot.get_changes(config_list)
+
+        # Then
+        self.assertTrue(config_snapshot.is_source_changed())
+        self.assertEqual(config_list, result)
+
+    def test_update_does_not_store_failed_packages(self):
+        # Given
+        config_list = create_config_list()
+        config_snapshot = self.create_snapshot()
+        config_snapshot.update(config_list, {'package1': True, 'package2': False})
+        config_snapshot.save()
+
+        # When
+        result = self.create_snapshot().get_changes(config_list)
+
+        # Then
+        self.assertEqual([config_list[1]], result)
+
+    def create_snapshot(self):
+        return ConfigSnapshot(self.snapshot_file, self.source_config, self.status_reader)
+
+    def save_snapshot(self, config_list):
+        config_snapshot = self.create_snapshot()
+        config_snapshot.update(config_list, {config.package: True for config in config_list})
+        config_snapshot.save()
+
+    def write_file(self, path, content):
+        with open(path, 'w') as file:
+            file.write(content)
+
+
+def create_config_list():
+    return [PackageConfig(package='package1', version='1.0.0'), PackageConfig(package='package2')]
+
+
+if __name__ == '__main__':
+    unittest.main()
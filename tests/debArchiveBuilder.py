@@ -0,0 +1,24 @@
+import io
+import tarfile
+
+
+def create_deb_archive(control: str, compression: str = 'gz', data: bytes = b'binary' * 100) -> bytes:
+    return (b'!<arch>\n'
+            + create_ar_member('debian-binary', b'2.0\n')
+            + create_ar_member(f'control.tar.{compression}', create_tar({'./control': control.encode()}, compression))
+            + create_ar_member('data.tar.gz', create_tar({'./usr/bin/package1': data}, 'gz')))
+
+
+def create_tar(files: dict[str, bytes], compression: str = 'gz') -> bytes:
+    data = io.BytesIO()
+    with tarfile.open(fileobj=data, mode=f'w:{compression}') as archive:
+        for name, content in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+    return data.getvalue()
+
+
+def create_ar_member(name: str, content: bytes) -> bytes:
+    header = f'{name:<16}{0:<12}{0:<6}{0:<6}{100644:<8}{len(content):<10}`\n'.encode('ascii')
+    return header + content + (b'\n' if len(content) % 2 else b'')
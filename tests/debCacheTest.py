@@ -0,0 +1,152 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+from unittest import TestCase, mock
+
+from context_logger import setup_logging
+from package_downloader import PackageConfig
+
+from package_installer import DebCache
+
+
+class DebCacheTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        setup_logging('debian-package-installer', 'DEBUG', warn_on_overwrite=False)
+
+    def setUp(self):
+        print()
+        self.temp_dir = TemporaryDirectory()
+        self.cache_dir = os.path.join(self.temp_dir.name, 'cache')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_find_returns_none_when_package_is_not_cached(self):
+        # Given
+        deb_cache = DebCache(self.cache_dir, 1024, ['armhf', 'all'])
+
+        # When
+        result = deb_cache.find(PackageConfig(package='package1', version='1.0.0'))
+
+        # Then
+        self.assertIsNone(result)
+
+    def test_find_returns_cached_file_by_version(self):
+        # Given
+        deb_cache = DebCache(self.cache_dir, 1024, ['armhf', 'all'])
+        package_file = self.create_package_file('package1.deb', b'package1')
+        deb_cache.store(PackageConfig(package='package1'), package_file, 'package1', '1.0.0', 'armhf')
+
+        # When
+        result = DebCache(self.cache_dir, 1024, ['armhf', 'all']).find(
+            PackageConfig(package='package1', version='1.0.0'))
+
+        # Then
+        self.assertTrue(result.startswith(self.cache_dir))
+        with open(result, 'rb') as file:
+            self.assertEqual(b'package1', file.read())
+
+    def test_find_returns_highest_cached_version_matching_constraint(self):
+        # Given
+        deb_cache = DebCache(self.cache_dir, 1024, ['armhf', 'all'])
+        for version in ['1.0.0', '1.2.0', '2.0.0']:
+            package_file = self.create_package_file('package1.deb', f'package1_{version}'.encode())
+            deb_cache.store(PackageConfig(package='package1'), package_file, 'package1', version, 'armhf')
+
+        # When
+        result = deb_cache.find(PackageConfig(package='package1', version='>= 1.0.0, << 2.0.0'))
+
+        # Then
+        with open(result, 'rb') as file:
+            self.assertEqual(b'package1_1.2.0', file.read())
+
+    def test_find_returns_cached_file_by_url(self):
+        # Given
+        deb_cache = DebCache(self.cache_dir, 1024, ['armhf', 'all'])
+        package_config = PackageConfig(package='package1', file_url='http://url1/package1.deb')
+        package_file = self.create_package_file('package1.deb', b'package1')
+        deb_cache.store(package_config, package_file, 'package1', '1.0.0', 'all')
+
+        # When
+        result = deb_cache.find(package_config)
+
+        # Then
+        self.assertIsNotNone(result)
+
+    def test_find_returns_none_when_cached_file_is_corrupted(self):
+        # Given
+        deb_cache = DebCache(self.cache_dir, 1024, ['armhf', 'all'])
+        package_config = PackageConfig(package='package1', version='1.0.0')
+        package_file = self.create_package_file('package1.deb', b'package1')
+        deb_cache.store(package_config, package_file, 'package1', '1.0.0', 'all')
+        with open(deb_cache.find(package_config), 'wb') as file:
+            file.write(b'corrupted')
+
+        # When
+        result = deb_cache.find(package_config)
+
+        # Then
+        self.assertIsNone(result)
+
+    def test_find_does_not_hash_unchanged_cached_file(self):
+        # Given
+        deb_cache = DebCache(self.cache_dir, 1024, ['armhf', 'all'])
+        package_config = PackageConfig(package='package1', version='1.0.0')
+        deb_cache.store(package_config, self.create_package_file('package1.deb', b'package1'), 'package1', '1.0.0',
+                        'all')
+
+        # When
+        with mock.patch('package_installer.debCache.get_file_checksum') as get_checksum:
+            result = deb_cache.find(package_config)
+
+        # Then
+        self.assertIsNotNone(result)
+        get_checksum.assert_not_called()
+
+    def test_verify_removes_corrupted_file_with_unchanged_size_and_time(self):
+        # Given
+        deb_cache = DebCache(self.cache_dir, 1024, ['armhf', 'all'])
+        package_config = PackageConfig(package='package1', version='1.0.0')
+        deb_cache.store(package_config, self.create_package_file('package1.deb', b'package1'), 'package1', '1.0.0',
+                        'all')
+        object_path = deb_cache.find(package_config)
+        stat = os.stat(object_path)
+        with open(object_path, 'wb') as file:
+            file.write(b'package2')
+        os.utime(object_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        # When
+        result = deb_cache.verify()
+
+        # Then
+        self.assertEqual(1, result)
+        self.assertIsNone(deb_cache.find(package_config))
+
+    def test_store_evicts_least_recently_used_files(self):
+        # Given
+        deb_cache = DebCache(self.cache_dir, 40, ['armhf', 'all'])
+        for name in ['package1', 'package2']:
+            package_file = self.create_package_file(f'{name}.deb', name.encode() * 2)
+            deb_cache.store(PackageConfig(package=name), package_file, name, '1.0.0', 'all')
+        deb_cache.find(PackageConfig(package='package1', version='1.0.0'))
+
+        # When
+        package_file = self.create_package_file('package3.deb', b'package3' * 2)
+        deb_cache.store(PackageConfig(package='package3'), package_file, 'package3', '1.0.0', 'all')
+
+        # Then
+        self.assertIsNotNone(deb_cache.find(PackageConfig(package='package1', version='1.0.0')))
+        self.assertIsNone(deb_cache.find(PackageConfig(package='package2', version='1.0.0')))
+        self.assertIsNotNone(deb_cache.find(PackageConfig(package='package3', version='1.0.0')))
+
+    def create_package_file(self, name, content):
+        package_file = os.path.join(self.temp_dir.name, name)
+        with open(package_file, 'wb') as file:
+            file.write(content)
+        return package_file
+
+
+if __name__ == '__main__':
+    unittest.main()
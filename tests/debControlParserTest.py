@@ -0,0 +1,84 @@
+import unittest
+from unittest import TestCase
+
+from context_logger import setup_logging
+
+from package_installer import DebControlParser
+
+from debArchiveBuilder import create_deb_archive, create_ar_member
+
+CONTROL = 'Package: package1\nVersion: 1.0.0\nArchitecture: armhf\nDepends: package0 (>= 1.0)\n'
+
+
+class DebControlParserTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        setup_logging('debian-package-installer', 'DEBUG', warn_on_overwrite=False)
+
+    def setUp(self):
+        print()
+
+    def test_control_is_parsed_from_single_chunk(self):
+        # Given
+        parser = DebControlParser()
+
+        # When
+        parser.feed(create_deb_archive(CONTROL))
+
+        # Then
+        self.assertTrue(parser.is_done())
+        self.assertEqual(CONTROL, parser.get_control())
+
+    def test_control_is_parsed_from_small_chunks(self):
+        # Given
+        parser = DebControlParser()
+        archive = create_deb_archive(CONTROL, 'xz')
+
+        # When
+        for offset in range(0, len(archive), 7):
+            parser.feed(archive[offset:offset + 7])
+
+        # Then
+        self.assertTrue(parser.is_done())
+        self.assertEqual(CONTROL, parser.get_control())
+
+    def test_parsing_stops_before_data_member(self):
+        # Given
+        parser = DebControlParser()
+        archive = create_deb_archive(CONTROL)
+        control_end = archive.index(b'data.tar.gz')
+
+        # When
+        parser.feed(archive[:control_end])
+
+        # Then
+        self.assertTrue(parser.is_done())
+        self.assertEqual(CONTROL, parser.get_control())
+
+    def test_control_is_none_when_stream_is_not_a_deb_archive(self):
+        # Given
+        parser = DebControlParser()
+
+        # When
+        parser.feed(b'<html>Not found</html>')
+
+        # Then
+        self.assertTrue(parser.is_done())
+        self.assertIsNone(parser.get_control())
+
+    def test_control_is_none_when_control_member_is_missing(self):
+        # Given
+        parser = DebControlParser()
+        archive = b'!<arch>\n' + create_ar_member('debian-binary', b'2.0\n') + create_ar_member('data.tar.gz', b'')
+
+        # When
+        parser.feed(archive)
+
+        # Then
+        self.assertTrue(parser.is_done())
+        self.assertIsNone(parser.get_control())
+
+
+if __name__ == '__main__':
+    unittest.main()
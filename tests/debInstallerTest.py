@@ -1,13 +1,27 @@
 import unittest
+from tempfile import NamedTemporaryFile
 from unittest import TestCase
+from unittest import mock
 from unittest.mock import MagicMock
 
-from apt import Cache, Package
-from apt.debfile import DebPackage
+import apt_pkg
+from apt import Cache, Package, Version
 from context_logger import setup_logging
 from package_downloader import IDebDownloader, PackageConfig
 
-from package_installer import IDebProvider, DebInstaller
+from package_installer import (
+    IDebProvider,
+    DebInstaller,
+    IDebCache,
+    PlanEntry,
+    IDpkgRunner,
+    ICacheRefresher,
+    DebMetadata,
+    RetryPolicy,
+    IDpkgStatusReader,
+    DebProvider,
+    IDebStreamDownloader,
+)
 
 
 class DebInstallerTest(TestCase):
@@ -21,8 +35,8 @@ class DebInstallerTest(TestCase):
 
     def test_install_returns_true_when_package_is_installed_successfully(self):
         # Given
-        apt_cache, deb_downloader, deb_provider = create_components()
-        deb_installer = DebInstaller(apt_cache, deb_downloader, deb_provider)
+        apt_cache, deb_downloader, deb_provider, dpkg_runner = create_components()
+        deb_installer = DebInstaller(apt_cache, deb_downloader, deb_provider, dpkg_runner=dpkg_runner)
         package_config = PackageConfig(package='package1')
 
         # When
@@ -30,12 +44,13 @@ class DebInstallerTest(TestCase):
 
         # Then
         self.assertTrue(result)
+        dpkg_runner.install.assert_called_once_with(['package1.deb'])
 
     def test_install_returns_false_when_package_file_download_failed(self):
         # Given
-        apt_cache, deb_downloader, deb_provider = create_components()
+        apt_cache, deb_downloader, deb_provider, dpkg_runner = create_components()
         deb_downloader.download.return_value = None
-        deb_installer = DebInstaller(apt_cache, deb_downloader, deb_provider)
+        deb_installer = DebInstaller(apt_cache, deb_downloader, deb_provider, dpkg_runner=dpkg_runner)
         package_config = PackageConfig(package='package1')
 
         # When
@@ -46,9 +61,9 @@ class DebInstallerTest(TestCase):
 
     def test_install_returns_false_when_deb_package_creation_failed(self):
         # Given
-        apt_cache, deb_downloader, deb_provider = create_components()
+        apt_cache, deb_downloader, deb_provider, dpkg_runner = create_components()
         deb_provider.get_deb_package.return_value = None
-        deb_installer = DebInstaller(apt_cache, deb_downloader, deb_provider)
+        deb_installer = DebInstaller(apt_cache, deb_downloader, deb_provider, dpkg_runner=dpkg_runner)
         package_config = PackageConfig(package='package1')
 
         # When
@@ -57,19 +72,60 @@ class DebInstallerTest(TestCase):
         # Then
         self.assertFalse(result)
 
-    def test_install_returns_true_when_conflicting_package_is_removed(self):
+    @mock.patch('package_installer.debInstaller.ProblemResolver')
+    def test_install_returns_true_when_conflicting_package_is_removed(self, problem_resolver):
         # Given
-        apt_cache, deb_downloader, deb_provider = create_components()
+        apt_cache, deb_downloader, deb_provider, dpkg_runner = create_components()
         deb_package = create_deb_package()
-        deb_package.check_conflicts.return_value = False
         deb_package.conflicts = [[('package2', '', '')]]
         deb_provider.get_deb_package.return_value = deb_package
-        apt_package = create_apt_package()
-        conflict = create_apt_package()
-        conflict.name = 'package2'
+        conflict = create_apt_package('package2')
+        conflict.is_installed = True
+        set_apt_packages(apt_cache, [create_apt_package(), conflict])
+        deb_installer = DebInstaller(apt_cache, deb_downloader, deb_provider, dpkg_runner=dpkg_runner)
+        package_config = PackageConfig(package='package1')
+
+        # When
+        result = deb_installer.install(package_config)
+
+        # Then
+        self.assertTrue(result)
+        conflict.mark_delete.assert_called_once()
+        problem_resolver.return_value.resolve.assert_called_once()
+        apt_cache.commit.assert_called_once()
+        apt_cache.open.assert_called_once()
+
+    @mock.patch('package_installer.debInstaller.ProblemResolver')
+    def test_install_removes_conflicting_package_declared_in_streamed_control(self, problem_resolver):
+        # Given
+        apt_cache, deb_downloader, _, dpkg_runner = create_components()
+        stream_downloader = MagicMock(spec=IDebStreamDownloader)
+        stream_downloader.get_control.return_value = 'Package: package1\nVersion: 1.0.0\nConflicts: package2\n'
+        conflict = create_apt_package('package2')
+        set_apt_packages(apt_cache, [create_apt_package(), conflict])
+        deb_installer = DebInstaller(apt_cache, deb_downloader, DebProvider(stream_downloader), dpkg_runner=dpkg_runner)
+        package_config = PackageConfig(package='package1')
+
+        # When
+        result = deb_installer.install(package_config)
+
+        # Then
+        self.assertTrue(result)
+        conflict.mark_delete.assert_called_once()
+        dpkg_runner.install.assert_called_once_with(['package1.deb'])
+
+    @mock.patch('package_installer.debInstaller.ProblemResolver')
+    def test_install_keeps_installed_package_not_matching_conflict_version(self, problem_resolver):
+        # Given
+        apt_cache, deb_downloader, deb_provider, dpkg_runner = create_components()
+        deb_package = create_deb_package()
+        deb_package.conflicts = [[('package2', '2.0.0', '<<')]]
+        deb_provider.get_deb_package.return_value = deb_package
+        conflict = create_apt_package('package2')
         conflict.is_installed = True
-        apt_cache.get.side_effect = [conflict, apt_package]
-        deb_installer = DebInstaller(apt_cache, deb_downloader, deb_provider)
+        conflict.installed.version = '2.1.0'
+        set_apt_packages(apt_cache, [create_apt_package(), conflict])
+        deb_installer = DebInstaller(apt_cache, deb_downloader, deb_provider, dpkg_runner=dpkg_runner)
         package_config = PackageConfig(package='package1')
 
         # When
@@ -77,19 +133,95 @@ class DebInstallerTest(TestCase):
 
         # Then
         self.assertTrue(result)
+        conflict.mark_delete.assert_not_called()
+        apt_cache.commit.assert_not_called()
 
-    def test_install_returns_true_when_package_dependency_is_installed(self):
+    @mock.patch('package_installer.debInstaller.ProblemResolver')
+    def test_install_returns_true_when_package_dependency_is_installed(self, problem_resolver):
         # Given
-        apt_cache, deb_downloader, deb_provider = create_components()
+        apt_cache, deb_downloader, deb_provider, dpkg_runner = create_components()
         deb_package = create_deb_package()
         deb_package.depends = [[('package0', '', '')]]
         deb_provider.get_deb_package.return_value = deb_package
-        apt_package = create_apt_package()
-        dependency = create_apt_package()
-        dependency.name = 'package0'
+        dependency = create_apt_package('package0', ['1.0.0'])
         dependency.is_installed = False
-        apt_cache.get.side_effect = [dependency, apt_package]
-        deb_installer = DebInstaller(apt_cache, deb_downloader, deb_provider)
+        set_apt_packages(apt_cache, [create_apt_package(), dependency])
+        deb_installer = DebInstaller(apt_cache, deb_downloader, deb_provider, dpkg_runner=dpkg_runner)
+        package_config = PackageConfig(package='package1')
+
+        # When
+        result = deb_installer.install(package_config)
+
+        # Then
+        self.assertTrue(result)
+        dependency.mark_install.assert_called_once()
+        apt_cache.commit.assert_called_once()
+        apt_cache.open.assert_called_once()
+
+    @mock.patch('package_installer.debInstaller.ProblemResolver')
+    def test_install_resolves_all_changes_in_single_commit(self, problem_resolver):
+        # Given
+        apt_cache, deb_downloader, deb_provider, dpkg_runner = create_components()
+        deb_package = create_deb_package()
+        deb_package.conflicts = [[('package2', '', '')], [('package3', '', '')]]
+        deb_package.depends = [[('package4', '', '')], [('package5', '', '')]]
+        deb_provider.get_deb_package.return_value = deb_package
+        apt_packages = [create_apt_package()]
+        for name in ['package2', 'package3']:
+            apt_packages.append(create_apt_package(name))
+        for name in ['package4', 'package5']:
+            apt_packages.append(create_apt_package(name, ['1.0.0']))
+            apt_packages[-1].is_installed = False
+        set_apt_packages(apt_cache, apt_packages)
+        deb_installer = DebInstaller(apt_cache, deb_downloader, deb_provider, dpkg_runner=dpkg_runner)
+        package_config = PackageConfig(package='package1')
+
+        # When
+        result = deb_installer.install(package_config)
+
+        # Then
+        self.assertTrue(result)
+        self.assertEqual(4, problem_resolver.return_value.protect.call_count)
+        apt_cache.commit.assert_called_once()
+        apt_cache.open.assert_called_once()
+
+    @mock.patch('package_installer.debInstaller.ProblemResolver')
+    def test_install_selects_dependency_alternative_matching_version(self, problem_resolver):
+        # Given
+        apt_cache, deb_downloader, deb_provider, dpkg_runner = create_components()
+        deb_package = create_deb_package()
+        deb_package.depends = [[('package4', '2.0.0', '>='), ('package5', '2.0.0', '>=')]]
+        deb_provider.get_deb_package.return_value = deb_package
+        alternative1 = create_apt_package('package4', ['1.0.0'])
+        alternative1.is_installed = False
+        alternative2 = create_apt_package('package5', ['1.0.0', '2.1.0', '2.0.0'])
+        alternative2.is_installed = False
+        set_apt_packages(apt_cache, [create_apt_package(), alternative1, alternative2])
+        deb_installer = DebInstaller(apt_cache, deb_downloader, deb_provider, dpkg_runner=dpkg_runner)
+        package_config = PackageConfig(package='package1')
+
+        # When
+        result = deb_installer.install(package_config)
+
+        # Then
+        self.assertTrue(result)
+        alternative1.mark_install.assert_not_called()
+        alternative2.mark_install.assert_called_once()
+        self.assertEqual('2.1.0', alternative2.candidate.version)
+
+    @mock.patch('package_installer.debInstaller.ProblemResolver')
+    def test_install_skips_dependency_satisfied_by_installed_alternative(self, problem_resolver):
+        # Given
+        apt_cache, deb_downloader, deb_provider, dpkg_runner = create_components()
+        deb_package = create_deb_package()
+        deb_package.depends = [[('package4', '', ''), ('package5', '1.0.0', '>=')]]
+        deb_provider.get_deb_package.return_value = deb_package
+        alternative1 = create_apt_package('package4', ['1.0.0'])
+        alternative1.is_installed = False
+        alternative2 = create_apt_package('package5')
+        alternative2.installed.version = '1.2.0'
+        set_apt_packages(apt_cache, [create_apt_package(), alternative1, alternative2])
+        deb_installer = DebInstaller(apt_cache, deb_downloader, deb_provider, dpkg_runner=dpkg_runner)
         package_config = PackageConfig(package='package1')
 
         # When
@@ -97,17 +229,19 @@ class DebInstallerTest(TestCase):
 
         # Then
         self.assertTrue(result)
+        alternative1.mark_install.assert_not_called()
+        apt_cache.commit.assert_not_called()
 
     def test_install_returns_false_when_deb_package_install_failed(self):
         # Given
-        apt_cache, deb_downloader, deb_provider = create_components()
+        apt_cache, deb_downloader, deb_provider, dpkg_runner = create_components()
         deb_package = create_deb_package()
-        deb_package.install.side_effect = Exception('Install failed')
+        dpkg_runner.install.side_effect = Exception('Install failed')
         deb_provider.get_deb_package.return_value = deb_package
         apt_package = create_apt_package()
         apt_package.is_installed = False
         apt_cache.get.return_value = apt_package
-        deb_installer = DebInstaller(apt_cache, deb_downloader, deb_provider)
+        deb_installer = DebInstaller(apt_cache, deb_downloader, deb_provider, dpkg_runner=dpkg_runner)
         package_config = PackageConfig(package='package1')
 
         # When
@@ -116,22 +250,299 @@ class DebInstallerTest(TestCase):
         # Then
         self.assertFalse(result)
 
+    def test_install_uses_prefetched_package_file(self):
+        # Given
+        apt_cache, deb_downloader, deb_provider, dpkg_runner = create_components()
+        deb_installer = DebInstaller(apt_cache, deb_downloader, deb_provider, download_workers=2,
+                                     dpkg_runner=dpkg_runner)
+        package_config = PackageConfig(package='package1')
+        deb_installer.prefetch([package_config])
+
+        # When
+        result = deb_installer.install(package_config)
+
+        # Then
+        self.assertTrue(result)
+        deb_downloader.download.assert_called_once_with(package_config)
+        deb_provider.get_deb_package.assert_called_once_with('package1.deb')
+
+    def test_install_downloads_package_file_when_prefetch_failed(self):
+        # Given
+        apt_cache, deb_downloader, deb_provider, dpkg_runner = create_components()
+        deb_downloader.download.side_effect = [Exception('Download failed'), 'package1.deb']
+        deb_installer = DebInstaller(apt_cache, deb_downloader, deb_provider, download_workers=2,
+                                     dpkg_runner=dpkg_runner)
+        package_config = PackageConfig(package='package1')
+        deb_installer.prefetch([package_config])
+
+        # When
+        result = deb_installer.install(package_config)
+
+        # Then
+        self.assertTrue(result)
+        self.assertEqual(2, deb_downloader.download.call_count)
+
+    def test_install_uses_cached_package_file(self):
+        # Given
+        apt_cache, deb_downloader, deb_provider, dpkg_runner = create_components()
+        deb_cache = MagicMock(spec=IDebCache)
+        deb_cache.find.return_value = '/cache/package1.deb'
+        deb_installer = DebInstaller(apt_cache, deb_downloader, deb_provider, deb_cache=deb_cache,
+                                     dpkg_runner=dpkg_runner)
+        package_config = PackageConfig(package='package1', version='1.0.0')
+
+        # When
+        result = deb_installer.install(package_config)
 
-def create_apt_package():
+        # Then
+        self.assertTrue(result)
+        deb_downloader.download.assert_not_called()
+        deb_provider.get_deb_package.assert_called_once_with('/cache/package1.deb')
+        deb_cache.store.assert_not_called()
+
+    def test_install_stores_downloaded_package_file_in_cache(self):
+        # Given
+        apt_cache, deb_downloader, deb_provider, dpkg_runner = create_components()
+        deb_cache = MagicMock(spec=IDebCache)
+        deb_cache.find.return_value = None
+        deb_installer = DebInstaller(apt_cache, deb_downloader, deb_provider, deb_cache=deb_cache,
+                                     dpkg_runner=dpkg_runner)
+        package_config = PackageConfig(package='package1')
+
+        # When
+        result = deb_installer.install(package_config)
+
+        # Then
+        self.assertTrue(result)
+        deb_cache.store.assert_called_once_with(package_config, 'package1.deb', 'package1', '1.0.0', 'armhf')
+
+    def test_install_uses_local_package_file_without_download(self):
+        # Given
+        apt_cache, deb_downloader, deb_provider, dpkg_runner = create_components()
+        deb_installer = DebInstaller(apt_cache, deb_downloader, deb_provider, dpkg_runner=dpkg_runner)
+
+        with NamedTemporaryFile(suffix='.deb') as package_file:
+            package_config = PackageConfig(package='package1', file_url=f'file://{package_file.name}')
+
+            # When
+            result = deb_installer.install(package_config)
+
+            # Then
+            self.assertTrue(result)
+            deb_downloader.download.assert_not_called()
+            deb_provider.get_deb_package.assert_called_once_with(package_file.name)
+
+    @mock.patch('package_installer.debInstaller.ProblemResolver')
+    def test_mark_returns_plan_entry_and_marks_dependencies_without_commit(self, problem_resolver):
+        # Given
+        apt_cache, deb_downloader, deb_provider, dpkg_runner = create_components()
+        deb_package = create_deb_package()
+        deb_package.depends = [[('package0', '', '')]]
+        deb_provider.get_deb_package.return_value = deb_package
+        apt_package = create_apt_package()
+        apt_package.installed.version = '0.9.0'
+        dependency = create_apt_package('package0', ['1.0.0'])
+        dependency.is_installed = False
+        set_apt_packages(apt_cache, [apt_package, dependency])
+        deb_installer = DebInstaller(apt_cache, deb_downloader, deb_provider, dpkg_runner=dpkg_runner)
+
+        # When
+        result = deb_installer.mark(PackageConfig(package='package1'))
+
+        # Then
+        self.assertEqual(PlanEntry('package1', 'upgrade', 'deb', '1.0.0', '0.9.0', 0, 'package1.deb'), result)
+        dependency.mark_install.assert_called_once()
+        dpkg_runner.install.assert_not_called()
+        apt_cache.commit.assert_not_called()
+
+    @mock.patch('package_installer.debInstaller.ProblemResolver')
+    def test_install_batch_installs_packages_in_dependency_order_with_single_dpkg_call(self, problem_resolver):
+        # Given
+        apt_cache, deb_downloader, deb_provider, dpkg_runner = create_components()
+        deb_packages = {
+            'package1.deb': create_deb_package('package1', [[('package2', '1.0.0', '>=')], [('package0', '', '')]]),
+            'package2.deb': create_deb_package('package2', [[('package3', '', '')]]),
+            'package3.deb': create_deb_package('package3'),
+        }
+        deb_downloader.download.side_effect = lambda config: f'{config.package}.deb'
+        deb_provider.get_deb_package.side_effect = lambda file: deb_packages[file]
+        dependency = create_apt_package('package0', ['1.0.0'])
+        dependency.is_installed = False
+        set_apt_packages(apt_cache, [dependency])
+        cache_refresher = MagicMock(spec=ICacheRefresher)
+        cache_refresher.get_installed_version.return_value = '1.0.0'
+        deb_installer = DebInstaller(apt_cache, deb_downloader, deb_provider, cache_refresher=cache_refresher,
+                                     dpkg_runner=dpkg_runner)
+        package_configs = [PackageConfig(package=f'package{index}') for index in range(1, 4)]
+
+        # When
+        result = deb_installer.install_batch(package_configs)
+
+        # Then
+        self.assertEqual({'package1': True, 'package2': True, 'package3': True}, result)
+        dpkg_runner.install.assert_called_once_with(['package3.deb', 'package2.deb', 'package1.deb'])
+        dependency.mark_install.assert_called_once_with(auto_fix=False)
+        apt_cache.commit.assert_called_once()
+
+    def test_install_batch_skips_packages_with_unresolvable_dependencies(self):
+        # Given
+        apt_cache, deb_downloader, deb_provider, dpkg_runner = create_components()
+        deb_packages = {
+            'package1.deb': create_deb_package('package1', [[('package0', '', '')]]),
+            'package2.deb': create_deb_package('package2'),
+            'package3.deb': create_deb_package('package3', [[('package1', '', '')]]),
+        }
+        deb_downloader.download.side_effect = lambda config: f'{config.package}.deb'
+        deb_provider.get_deb_package.side_effect = lambda file: deb_packages[file]
+        set_apt_packages(apt_cache, [])
+        cache_refresher = MagicMock(spec=ICacheRefresher)
+        cache_refresher.get_installed_version.return_value = '1.0.0'
+        deb_installer = DebInstaller(apt_cache, deb_downloader, deb_provider, cache_refresher=cache_refresher,
+                                     dpkg_runner=dpkg_runner)
+        package_configs = [PackageConfig(package=f'package{index}') for index in range(1, 4)]
+
+        # When
+        result = deb_installer.install_batch(package_configs)
+
+        # Then
+        self.assertEqual({'package1': False, 'package2': True, 'package3': False}, result)
+        dpkg_runner.install.assert_called_once_with(['package2.deb'])
+        apt_cache.commit.assert_not_called()
+
+    def test_install_batch_resolves_virtual_and_multi_arch_qualified_dependencies(self):
+        # Given
+        apt_cache, deb_downloader, _, dpkg_runner = create_components()
+        controls = {
+            'package1.deb': 'Package: package1\nVersion: 1.0.0\nDepends: python3:any (>= 1.0), awk, virtual2\n',
+            'package2.deb': 'Package: package2\nVersion: 1.0.0\nProvides: virtual2\n',
+        }
+        stream_downloader = MagicMock(spec=IDebStreamDownloader)
+        stream_downloader.get_control.side_effect = lambda file: controls[file]
+        deb_downloader.download.side_effect = lambda config: f'{config.package}.deb'
+        set_apt_packages(apt_cache, [create_apt_package('python3', ['1.0.0'])])
+        awk_provider = create_apt_package('mawk', ['1.0.0'])
+        apt_cache.get_providing_packages.side_effect = lambda name, **kwargs: [awk_provider] if name == 'awk' else []
+        cache_refresher = MagicMock(spec=ICacheRefresher)
+        cache_refresher.get_installed_version.return_value = '1.0.0'
+        deb_installer = DebInstaller(apt_cache, deb_downloader, DebProvider(stream_downloader),
+                                     cache_refresher=cache_refresher, dpkg_runner=dpkg_runner)
+
+        # When
+        result = deb_installer.install_batch([PackageConfig(package='package1'), PackageConfig(package='package2')])
+
+        # Then
+        self.assertEqual({'package1': True, 'package2': True}, result)
+        dpkg_runner.install.assert_called_once_with(['package2.deb', 'package1.deb'])
+        apt_cache.commit.assert_not_called()
+
+    def test_install_batch_skips_package_with_versioned_dependency_on_virtual_package(self):
+        # Given
+        apt_cache, deb_downloader, deb_provider, dpkg_runner = create_components()
+        deb_provider.get_deb_package.return_value = create_deb_package('package1', [[('awk', '2.0', '>=')]])
+        set_apt_packages(apt_cache, [])
+        apt_cache.get_providing_packages.return_value = [create_apt_package('mawk', ['1.0.0'])]
+        cache_refresher = MagicMock(spec=ICacheRefresher)
+        deb_installer = DebInstaller(apt_cache, deb_downloader, deb_provider, cache_refresher=cache_refresher,
+                                     dpkg_runner=dpkg_runner)
+
+        # When
+        result = deb_installer.install_batch([PackageConfig(package='package1')])
+
+        # Then
+        self.assertEqual({'package1': False}, result)
+        dpkg_runner.install.assert_not_called()
+
+    def test_install_batch_reports_packages_failed_to_download(self):
+        # Given
+        apt_cache, deb_downloader, deb_provider, dpkg_runner = create_components()
+        deb_downloader.download.side_effect = lambda config: 'package1.deb' if config.package == 'package1' else None
+        cache_refresher = MagicMock(spec=ICacheRefresher)
+        cache_refresher.get_installed_version.return_value = '1.0.0'
+        deb_installer = DebInstaller(apt_cache, deb_downloader, deb_provider, cache_refresher=cache_refresher,
+                                     dpkg_runner=dpkg_runner)
+
+        # When
+        result = deb_installer.install_batch([PackageConfig(package='package1'), PackageConfig(package='package2')])
+
+        # Then
+        self.assertEqual({'package1': True, 'package2': False}, result)
+        dpkg_runner.install.assert_called_once_with(['package1.deb'])
+        apt_cache.commit.assert_not_called()
+
+    def test_install_batch_returns_false_when_dpkg_failed(self):
+        # Given
+        apt_cache, deb_downloader, deb_provider, dpkg_runner = create_components()
+        dpkg_runner.install.side_effect = Exception('dpkg failed')
+        cache_refresher = MagicMock(spec=ICacheRefresher)
+        cache_refresher.get_installed_version.return_value = None
+        deb_installer = DebInstaller(apt_cache, deb_downloader, deb_provider, cache_refresher=cache_refresher,
+                                     dpkg_runner=dpkg_runner)
+
+        # When
+        result = deb_installer.install_batch([PackageConfig(package='package1')])
+
+        # Then
+        self.assertEqual({'package1': False}, result)
+        cache_refresher.invalidate.assert_called_once()
+
+    def test_install_batch_retries_dpkg_after_configuring_pending_packages(self):
+        # Given
+        apt_cache, deb_downloader, deb_provider, dpkg_runner = create_components()
+        dpkg_runner.install.side_effect = [Exception('dpkg interrupted'), None]
+        status_reader = MagicMock(spec=IDpkgStatusReader)
+        status_reader.is_interrupted.return_value = True
+        cache_refresher = MagicMock(spec=ICacheRefresher)
+        cache_refresher.get_installed_version.return_value = '1.0.0'
+        retry_policy = RetryPolicy(dpkg_runner, status_reader, 1, 0)
+        deb_installer = DebInstaller(apt_cache, deb_downloader, deb_provider, cache_refresher=cache_refresher,
+                                     dpkg_runner=dpkg_runner, retry_policy=retry_policy)
+
+        # When
+        result = deb_installer.install_batch([PackageConfig(package='package1')])
+
+        # Then
+        self.assertEqual({'package1': True}, result)
+        self.assertEqual(2, dpkg_runner.install.call_count)
+        dpkg_runner.configure_pending.assert_called_once()
+
+    def test_prefetch_is_skipped_when_download_workers_is_zero(self):
+        # Given
+        apt_cache, deb_downloader, deb_provider, dpkg_runner = create_components()
+        deb_installer = DebInstaller(apt_cache, deb_downloader, deb_provider, download_workers=0,
+                                     dpkg_runner=dpkg_runner)
+
+        # When
+        deb_installer.prefetch([PackageConfig(package='package1')])
+
+        # Then
+        deb_downloader.download.assert_not_called()
+
+
+def create_apt_package(name='package1', versions=()):
     apt_package = MagicMock(spec=Package)
-    apt_package.name = 'package1'
+    apt_package.name = name
     apt_package.is_installed = True
+    apt_package.marked_install = False
+    apt_package.installed.version = '1.0.0'
+    apt_package.versions = [create_version(version) for version in versions]
 
     return apt_package
 
 
-def create_deb_package():
-    deb_package = MagicMock(spec=DebPackage)
-    deb_package.filename = 'package1.deb'
-    deb_package.pkgname = 'package1'
-    deb_package._sections = {'Version': '1.0.0'}
+def create_version(version):
+    apt_version = MagicMock(spec=Version)
+    apt_version.version = version
+    apt_version.__lt__ = lambda self, other: apt_pkg.version_compare(self.version, other.version) < 0
+    apt_version.__gt__ = lambda self, other: apt_pkg.version_compare(self.version, other.version) > 0
+    return apt_version
+
+
+def set_apt_packages(apt_cache, apt_packages):
+    apt_cache.get.side_effect = lambda name: {apt_package.name: apt_package for apt_package in apt_packages}.get(name)
+
 
-    return deb_package
+def create_deb_package(name='package1', depends=()):
+    return DebMetadata(f'{name}.deb', name, '1.0.0', 'armhf', list(depends))
 
 
 def create_components():
@@ -141,8 +552,9 @@ def create_components():
     deb_downloader.download.return_value = 'package1.deb'
     deb_provider = MagicMock(spec=IDebProvider)
     deb_provider.get_deb_package.return_value = create_deb_package()
+    dpkg_runner = MagicMock(spec=IDpkgRunner)
 
-    return apt_cache, deb_downloader, deb_provider
+    return apt_cache, deb_downloader, deb_provider, dpkg_runner
 
 
 if __name__ == '__main__':
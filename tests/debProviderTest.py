@@ -0,0 +1,96 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from context_logger import setup_logging
+
+from package_installer import DebProvider, IDebStreamDownloader
+
+from debArchiveBuilder import create_deb_archive
+
+CONTROL = ('Package: package1\nVersion: 1.0.0\nArchitecture: armhf\nPre-Depends: package0\n'
+           'Depends: package2 (>= 1.0) | package3, package4:any\nConflicts: package5 (<< 2.0)\nProvides: virtual1\n')
+
+
+class DebProviderTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        setup_logging('debian-package-installer', 'DEBUG', warn_on_overwrite=False)
+
+    def setUp(self):
+        print()
+        self.temp_dir = TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_get_deb_package_returns_metadata_from_package_file(self):
+        # Given
+        package_file = self.write_file('package1.deb', create_deb_archive(CONTROL))
+        deb_provider = DebProvider()
+
+        # When
+        result = deb_provider.get_deb_package(package_file)
+
+        # Then
+        self.assertEqual(package_file, result.filename)
+        self.assertEqual(('package1', '1.0.0', 'armhf'), (result.pkgname, result.version, result.architecture))
+        self.assertEqual([
+            [('package2', '1.0', '>='), ('package3', '', '')],
+            [('package4', '', '')],
+            [('package0', '', '')],
+        ], result.depends)
+        self.assertEqual([[('package5', '2.0', '<')]], result.conflicts)
+        self.assertEqual([[('virtual1', '', '')]], result.provides)
+
+    def test_get_deb_package_uses_streamed_control(self):
+        # Given
+        stream_downloader = MagicMock(spec=IDebStreamDownloader)
+        stream_downloader.get_control.return_value = 'Package: package1\nVersion: 1.0.0\n'
+        deb_provider = DebProvider(stream_downloader)
+
+        # When
+        result = deb_provider.get_deb_package('/not/existing/package1.deb')
+
+        # Then
+        self.assertEqual(('package1', '1.0.0', 'all'), (result.pkgname, result.version, result.architecture))
+        self.assertEqual([], result.depends)
+        self.assertEqual([], result.conflicts)
+        self.assertEqual([], result.provides)
+
+    def test_get_deb_package_returns_conflicts_from_streamed_control(self):
+        # Given
+        stream_downloader = MagicMock(spec=IDebStreamDownloader)
+        stream_downloader.get_control.return_value = CONTROL
+        deb_provider = DebProvider(stream_downloader)
+
+        # When
+        result = deb_provider.get_deb_package('/not/existing/package1.deb')
+
+        # Then
+        self.assertEqual('/not/existing/package1.deb', result.filename)
+        self.assertEqual([[('package5', '2.0', '<')]], result.conflicts)
+
+    def test_get_deb_package_returns_none_when_package_file_is_invalid(self):
+        # Given
+        package_file = self.write_file('package1.deb', b'<html>Not found</html>')
+        deb_provider = DebProvider()
+
+        # When
+        result = deb_provider.get_deb_package(package_file)
+
+        # Then
+        self.assertIsNone(result)
+
+    def write_file(self, name, content):
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, 'wb') as file:
+            file.write(content)
+        return path
+
+
+if __name__ == '__main__':
+    unittest.main()
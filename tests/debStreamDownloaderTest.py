@@ -0,0 +1,118 @@
+import hashlib
+import os
+import unittest
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from context_logger import setup_logging
+from package_downloader import PackageConfig, IDebDownloader
+from requests import Session, Response, HTTPError
+
+from package_installer import DebStreamDownloader, IAssetResolver, AssetInfo
+
+from debArchiveBuilder import create_deb_archive
+
+CONTROL = 'Package: package1\nVersion: 1.0.0\nArchitecture: armhf\n'
+PACKAGE_URL = 'https://github.com/owner/package1/releases/download/v1.0.0/package1_1.0.0_armhf.deb'
+
+
+class DebStreamDownloaderTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        setup_logging('debian-package-installer', 'DEBUG', warn_on_overwrite=False)
+
+    def setUp(self):
+        print()
+        self.temp_dir = TemporaryDirectory()
+        self.download_dir = os.path.join(self.temp_dir.name, 'packages')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_download_writes_verified_file_and_parses_control(self):
+        # Given
+        content = create_deb_archive(CONTROL)
+        asset_resolver, session, deb_downloader = create_components(content, hashlib.sha256(content).hexdigest())
+        stream_downloader = DebStreamDownloader(asset_resolver, session, self.download_dir, deb_downloader, 16)
+
+        # When
+        result = stream_downloader.download(PackageConfig(package='package1'))
+
+        # Then
+        self.assertEqual(os.path.join(self.download_dir, 'package1_1.0.0_armhf.deb'), result)
+        with open(result, 'rb') as file:
+            self.assertEqual(content, file.read())
+        self.assertEqual(CONTROL, stream_downloader.get_control(result))
+        session.get.assert_called_once_with(PACKAGE_URL, stream=True, timeout=30)
+        deb_downloader.download.assert_not_called()
+
+    def test_download_returns_none_and_removes_file_when_checksum_mismatch(self):
+        # Given
+        content = create_deb_archive(CONTROL)
+        asset_resolver, session, deb_downloader = create_components(content, '0' * 64)
+        stream_downloader = DebStreamDownloader(asset_resolver, session, self.download_dir, deb_downloader)
+
+        # When
+        result = stream_downloader.download(PackageConfig(package='package1'))
+
+        # Then
+        self.assertIsNone(result)
+        self.assertEqual([], os.listdir(self.download_dir))
+
+    def test_download_returns_none_when_request_fails(self):
+        # Given
+        asset_resolver, session, deb_downloader = create_components(b'')
+        session.get.return_value.raise_for_status.side_effect = HTTPError('404 Not Found')
+        stream_downloader = DebStreamDownloader(asset_resolver, session, self.download_dir, deb_downloader)
+
+        # When
+        result = stream_downloader.download(PackageConfig(package='package1'))
+
+        # Then
+        self.assertIsNone(result)
+        self.assertEqual([], os.listdir(self.download_dir))
+
+    def test_download_falls_back_to_deb_downloader_when_asset_is_not_resolved(self):
+        # Given
+        asset_resolver, session, deb_downloader = create_components(b'')
+        asset_resolver.resolve.return_value = None
+        deb_downloader.download.return_value = '/tmp/packages/package1.deb'
+        stream_downloader = DebStreamDownloader(asset_resolver, session, self.download_dir, deb_downloader)
+
+        # When
+        result = stream_downloader.download(PackageConfig(package='package1'))
+
+        # Then
+        self.assertEqual('/tmp/packages/package1.deb', result)
+        self.assertIsNone(stream_downloader.get_control(result))
+        session.get.assert_not_called()
+
+    def test_get_control_returns_none_when_stream_is_not_a_deb_archive(self):
+        # Given
+        asset_resolver, session, deb_downloader = create_components(b'not a package')
+        stream_downloader = DebStreamDownloader(asset_resolver, session, self.download_dir, deb_downloader)
+
+        # When
+        result = stream_downloader.download(PackageConfig(package='package1'))
+
+        # Then
+        self.assertIsNotNone(result)
+        self.assertIsNone(stream_downloader.get_control(result))
+
+
+def create_components(content, sha256=None):
+    asset_resolver = MagicMock(spec=IAssetResolver)
+    asset_resolver.resolve.return_value = AssetInfo(PACKAGE_URL, 'package1_1.0.0_armhf.deb', sha256)
+    response = MagicMock(spec=Response)
+    response.__enter__.return_value = response
+    response.iter_content.side_effect = lambda size: [content[i:i + size] for i in range(0, len(content), size)]
+    session = MagicMock(spec=Session)
+    session.get.return_value = response
+    deb_downloader = MagicMock(spec=IDebDownloader)
+    return asset_resolver, session, deb_downloader
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import os
+import subprocess
+import sys
+import unittest
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from context_logger import setup_logging
+
+from package_installer import DpkgStatusReader
+
+DPKG_STATUS = '''Package: package1
+Status: install ok installed
+Priority: optional
+Architecture: all
+Version: 1.0.0
+Description: Package 1
+ Multi-line description
+
+Package: package2
+Status: hold ok installed
+Architecture: armhf
+Version: 2.0.0-1
+
+Package: package3
+Status: deinstall ok config-files
+Architecture: all
+Version: 3.0.0
+'''
+
+
+class DpkgStatusReaderTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        setup_logging('debian-package-installer', 'DEBUG', warn_on_overwrite=False)
+
+    def setUp(self):
+        print()
+        self.temp_dir = TemporaryDirectory()
+        self.status_file = os.path.join(self.temp_dir.name, 'status')
+        with open(self.status_file, 'w') as file:
+            file.write(DPKG_STATUS)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_get_installed_versions_returns_installed_packages(self):
+        # Given
+        status_reader = DpkgStatusReader(self.status_file)
+
+        # When
+        result = status_reader.get_installed_versions()
+
+        # Then
+        self.assertEqual({'package1': '1.0.0', 'package2': '2.0.0-1'}, result)
+
+    def test_get_installed_versions_returns_empty_when_status_file_is_missing(self):
+        # Given
+        status_reader = DpkgStatusReader(os.path.join(self.temp_dir.name, 'missing'))
+
+        # When
+        result = status_reader.get_installed_versions()
+
+        # Then
+        self.assertEqual({}, result)
+
+    def test_get_missing_returns_packages_not_installed_in_required_version(self):
+        # Given
+        status_reader = DpkgStatusReader(self.status_file)
+        requirements = {'package1': None, 'package2': '2.1.0', 'package3': None, 'package4': '1.0.0'}
+
+        # When
+        result = status_reader.get_missing(requirements)
+
+        # Then
+        self.assertEqual(['package2', 'package3', 'package4'], result)
+
+    def test_get_missing_matches_version_constraints(self):
+        # Given
+        status_reader = DpkgStatusReader(self.status_file)
+        requirements = {'package1': '>= 1.0.0, << 2.0.0', 'package2': '2.0.*', 'package3': '>= 3.0.0'}
+
+        # When
+        result = status_reader.get_missing(requirements)
+
+        # Then
+        self.assertEqual(['package3'], result)
+
+    def test_get_missing_returns_package_with_invalid_version_constraint(self):
+        # Given
+        status_reader = DpkgStatusReader(self.status_file)
+
+        # When
+        result = status_reader.get_missing({'package1': '> 1.0.0'})
+
+        # Then
+        self.assertEqual(['package1'], result)
+
+    def test_is_interrupted_returns_false_when_no_operation_is_pending(self):
+        # Given
+        status_reader = DpkgStatusReader(self.status_file)
+
+        # When
+        result = status_reader.is_interrupted()
+
+        # Then
+        self.assertFalse(result)
+
+    def test_is_interrupted_returns_true_when_package_is_half_configured(self):
+        # Given
+        with open(self.status_file, 'a') as file:
+            file.write('\nPackage: package4\nStatus: install ok half-configured\nVersion: 4.0.0\n')
+        status_reader = DpkgStatusReader(self.status_file)
+
+        # When
+        result = status_reader.is_interrupted()
+
+        # Then
+        self.assertTrue(result)
+
+    def test_is_interrupted_returns_true_when_journal_is_not_processed(self):
+        # Given
+        os.makedirs(os.path.join(self.temp_dir.name, 'updates'))
+        with open(os.path.join(self.temp_dir.name, 'updates', '0001'), 'w') as file:
+            file.write('Package: package1\n')
+        status_reader = DpkgStatusReader(self.status_file)
+
+        # When
+        result = status_reader.is_interrupted()
+
+        # Then
+        self.assertTrue(result)
+
+    def test_import_does_not_load_heavy_dependencies(self):
+        # Given
+        script = 'import sys, package_installer; package_installer.DpkgStatusReader; ' \
+                 'print(",".join(name for name in ("apt", "package_downloader", "requests") if name in sys.modules))'
+
+        # When
+        result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+
+        # Then
+        self.assertEqual('', result.stdout.strip())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import hashlib
+import json
+import os
+import unittest
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from context_logger import setup_logging
+
+from package_installer import get_file_checksum, write_file, write_json
+
+
+class FileWriterTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        setup_logging('debian-package-installer', 'DEBUG', warn_on_overwrite=False)
+
+    def setUp(self):
+        print()
+        self.temp_dir = TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_get_file_checksum_returns_sha256_of_file(self):
+        # Given
+        file_path = os.path.join(self.temp_dir.name, 'package1.deb')
+        with open(file_path, 'wb') as file:
+            file.write(b'package1')
+
+        # When
+        result = get_file_checksum(file_path)
+
+        # Then
+        self.assertEqual(hashlib.sha256(b'package1').hexdigest(), result)
+
+    def test_write_file_creates_directory_and_replaces_file(self):
+        # Given
+        file_path = os.path.join(self.temp_dir.name, 'sources', 'test.list')
+        write_file(file_path, 'old')
+
+        # When
+        write_file(file_path, 'new')
+
+        # Then
+        with open(file_path) as file:
+            self.assertEqual('new', file.read())
+        self.assertEqual(['test.list'], os.listdir(os.path.dirname(file_path)))
+
+    def test_write_json_writes_data(self):
+        # Given
+        file_path = os.path.join(self.temp_dir.name, 'index.json')
+
+        # When
+        write_json(file_path, {'entries': {}})
+
+        # Then
+        with open(file_path) as file:
+            self.assertEqual({'entries': {}}, json.load(file))
+
+
+if __name__ == '__main__':
+    unittest.main()
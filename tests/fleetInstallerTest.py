@@ -0,0 +1,173 @@
+import json
+import os
+import unittest
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from common_utility.jsonLoader import IJsonLoader
+from context_logger import setup_logging
+from package_downloader import PackageConfig
+
+from package_installer import (
+    FleetInstaller,
+    IInstallPlanner,
+    IFleetTransport,
+    CommandResult,
+    HostResult,
+    InstallPlan,
+    PlanEntry,
+)
+
+
+class FleetInstallerTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        setup_logging('debian-package-installer', 'DEBUG', warn_on_overwrite=False)
+
+    def setUp(self):
+        print()
+        self.temp_dir = TemporaryDirectory()
+        self.package_file = os.path.join(self.temp_dir.name, 'package2_1.0.0_armhf.deb')
+        with open(self.package_file, 'wb') as file:
+            file.write(b'package2')
+        self.config_path = os.path.join(self.temp_dir.name, 'package-config.json')
+        self.raw_configs = [
+            {'package': 'package1', 'version': '1.0.0'},
+            {'package': 'package2', 'release': {'repo': 'owner/package2', 'tag': 'latest', 'matcher': '*.deb'}},
+        ]
+        with open(self.config_path, 'w') as file:
+            json.dump(self.raw_configs, file)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_install_resolves_once_and_installs_on_every_host(self):
+        # Given
+        json_loader, install_planner, transport = self.create_components()
+        fleet_installer = FleetInstaller(json_loader, install_planner, transport, ['host1', 'host2'], '/tmp/fleet')
+
+        # When
+        result = fleet_installer.install(self.config_path)
+
+        # Then
+        self.assertEqual({
+            'host1': HostResult('host1', True, {'package1': True, 'package2': True}),
+            'host2': HostResult('host2', True, {'package1': True, 'package2': True}),
+        }, result)
+        install_planner.plan.assert_called_once()
+        uploaded = {(call.args[0], call.args[2]) for call in transport.upload.call_args_list}
+        for host in ['host1', 'host2']:
+            self.assertIn((host, '/tmp/fleet/package2_1.0.0_armhf.deb'), uploaded)
+            self.assertIn((host, '/tmp/fleet/package-config.json'), uploaded)
+        self.assertEqual(4, len(uploaded))
+
+    def test_install_rewrites_deb_entries_to_uploaded_files(self):
+        # Given
+        json_loader, install_planner, transport = self.create_components()
+        target_configs = []
+        transport.upload.side_effect = lambda host, local_file, remote_file: target_configs.extend(
+            self.read_json(local_file) if remote_file.endswith('package-config.json') else [])
+        fleet_installer = FleetInstaller(json_loader, install_planner, transport, ['host1'], '/tmp/fleet')
+
+        # When
+        fleet_installer.install(self.config_path)
+
+        # Then
+        self.assertEqual([
+            {'package': 'package1', 'version': '1.0.0'},
+            {'package': 'package2', 'file_url': 'file:///tmp/fleet/package2_1.0.0_armhf.deb'},
+        ], target_configs)
+
+    def test_install_passes_source_config_to_hosts(self):
+        # Given
+        json_loader, install_planner, transport = self.create_components()
+        fleet_installer = FleetInstaller(json_loader, install_planner, transport, ['host1'], '/tmp/fleet')
+
+        # When
+        fleet_installer.install(self.config_path, '/etc/source-config.json')
+
+        # Then
+        transport.upload.assert_any_call('host1', '/etc/source-config.json', '/tmp/fleet/source-config.json')
+        transport.run.assert_any_call('host1', [
+            'debian-package-installer.py', '/tmp/fleet/package-config.json', '--download', '/tmp/fleet',
+            '--output', '/tmp/fleet/results.json', '--source-config', '/tmp/fleet/source-config.json'
+        ])
+
+    def test_install_runs_configured_installer_command(self):
+        # Given
+        json_loader, install_planner, transport = self.create_components()
+        fleet_installer = FleetInstaller(json_loader, install_planner, transport, ['host1'], '/tmp/fleet',
+                                         installer_command=['sudo', '/opt/installer/debian-package-installer.py'])
+
+        # When
+        fleet_installer.install(self.config_path)
+
+        # Then
+        transport.run.assert_any_call('host1', [
+            'sudo', '/opt/installer/debian-package-installer.py', '/tmp/fleet/package-config.json',
+            '--download', '/tmp/fleet', '--output', '/tmp/fleet/results.json'
+        ])
+
+    def test_install_reports_failed_hosts(self):
+        # Given
+        json_loader, install_planner, transport = self.create_components()
+        transport.upload.side_effect = lambda host, local_file, remote_file: self.fail_on_host(host, 'host2')
+        fleet_installer = FleetInstaller(json_loader, install_planner, transport, ['host1', 'host2', 'host3'])
+
+        # When
+        result = fleet_installer.install(self.config_path)
+
+        # Then
+        self.assertTrue(result['host1'].success)
+        self.assertEqual(HostResult('host2', False, {}, 'Connection refused'), result['host2'])
+        self.assertTrue(result['host3'].success)
+
+    def test_install_reports_failed_packages(self):
+        # Given
+        json_loader, install_planner, transport = self.create_components({'package1': True, 'package2': False})
+        fleet_installer = FleetInstaller(json_loader, install_planner, transport, ['host1'])
+
+        # When
+        result = fleet_installer.install(self.config_path)
+
+        # Then
+        self.assertEqual(HostResult('host1', False, {'package1': True, 'package2': False}), result['host1'])
+
+    def test_install_reports_installer_exit_code(self):
+        # Given
+        json_loader, install_planner, transport = self.create_components()
+        transport.run.side_effect = lambda host, command: CommandResult(1, '')
+        fleet_installer = FleetInstaller(json_loader, install_planner, transport, ['host1'])
+
+        # When
+        result = fleet_installer.install(self.config_path)
+
+        # Then
+        self.assertEqual(HostResult('host1', False, {}, 'Installer exited with code 1'), result['host1'])
+
+    def create_components(self, results=None):
+        json_loader = MagicMock(spec=IJsonLoader)
+        json_loader.load_list.return_value = [PackageConfig(**config) for config in self.raw_configs]
+        install_planner = MagicMock(spec=IInstallPlanner)
+        install_planner.plan.return_value = InstallPlan([
+            PlanEntry('package1', 'install', 'apt', '1.0.0', None, 1024),
+            PlanEntry('package2', 'install', 'deb', '1.0.0', None, 8, self.package_file),
+        ])
+        transport = MagicMock(spec=IFleetTransport)
+        output = json.dumps(results or {'package1': True, 'package2': True})
+        transport.run.side_effect = lambda host, command: CommandResult(0, output if command[0] == 'cat' else '')
+        return json_loader, install_planner, transport
+
+    def read_json(self, file_path):
+        with open(file_path) as file:
+            return json.load(file)
+
+    def fail_on_host(self, host, failing_host):
+        if host == failing_host:
+            raise ConnectionError('Connection refused')
+
+
+if __name__ == '__main__':
+    unittest.main()
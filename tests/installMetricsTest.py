@@ -0,0 +1,121 @@
+import json
+import os
+import unittest
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from context_logger import setup_logging
+
+from package_installer import InstallMetrics
+
+
+class InstallMetricsTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        setup_logging('debian-package-installer', 'DEBUG', warn_on_overwrite=False)
+
+    def setUp(self):
+        print()
+        self.temp_dir = TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_get_report_contains_phase_and_package_durations(self):
+        # Given
+        metrics = InstallMetrics()
+
+        # When
+        with metrics.measure('update'):
+            pass
+        with metrics.measure('install', 'package1'):
+            pass
+        with metrics.measure('install', 'package2'):
+            pass
+
+        # Then
+        report = metrics.get_report()
+        self.assertEqual({'update', 'install'}, set(report['phases']))
+        self.assertEqual({'install'}, set(report['packages']['package1']))
+        self.assertEqual({'install'}, set(report['packages']['package2']))
+
+    def test_measure_records_duration_when_exception_raised(self):
+        # Given
+        metrics = InstallMetrics()
+
+        # When
+        with self.assertRaises(ValueError):
+            with metrics.measure('download', 'package1'):
+                raise ValueError('Download failed')
+
+        # Then
+        self.assertIn('download', metrics.get_report()['packages']['package1'])
+
+    def test_increment_accumulates_counters(self):
+        # Given
+        metrics = InstallMetrics()
+
+        # When
+        metrics.increment('cache_open')
+        metrics.increment('cache_open')
+        metrics.increment('download_bytes', 1024)
+
+        # Then
+        self.assertEqual({'cache_open': 2, 'download_bytes': 1024}, metrics.get_report()['counters'])
+
+    def test_write_report_as_json(self):
+        # Given
+        metrics = InstallMetrics()
+        metrics.increment('cache_commit')
+        report_file = os.path.join(self.temp_dir.name, 'metrics.json')
+
+        # When
+        metrics.write_report(report_file)
+
+        # Then
+        with open(report_file) as file:
+            report = json.load(file)
+        self.assertEqual({'cache_commit': 1}, report['counters'])
+
+    def test_write_report_as_prometheus_textfile(self):
+        # Given
+        metrics = InstallMetrics()
+        metrics.increment('cache_commit')
+        with metrics.measure('install', 'package1'):
+            pass
+        report_file = os.path.join(self.temp_dir.name, 'metrics.prom')
+
+        # When
+        metrics.write_report(report_file, 'prometheus')
+
+        # Then
+        with open(report_file) as file:
+            content = file.read()
+        self.assertIn('package_installer_cache_commit_total 1\n', content)
+        self.assertIn('package_installer_phase_duration_seconds{phase="install"}', content)
+        self.assertIn('package_installer_package_phase_duration_seconds{package="package1",phase="install"}', content)
+
+    def test_record_source_adds_source_fetch_to_report(self):
+        # Given
+        metrics = InstallMetrics()
+        report_file = os.path.join(self.temp_dir.name, 'metrics.prom')
+
+        # When
+        metrics.record_source('http://deb.debian.org/debian', 1.5, True)
+        metrics.record_source('http://apt.vendor.com/debian', 30.0, False)
+
+        # Then
+        self.assertEqual({
+            'http://deb.debian.org/debian': {'duration': 1.5, 'success': True},
+            'http://apt.vendor.com/debian': {'duration': 30.0, 'success': False},
+        }, metrics.get_report()['sources'])
+        metrics.write_report(report_file, 'prometheus')
+        with open(report_file) as file:
+            content = file.read()
+        self.assertIn('package_installer_source_fetch_duration_seconds{source="http://apt.vendor.com/debian",'
+                      'success="false"} 30.0\n', content)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import unittest
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from apt import Cache, Package
+from context_logger import setup_logging
+from package_downloader import PackageConfig
+
+from package_installer import InstallPlanner, IAptInstaller, IDebInstaller, PlanEntry, InstallPlan
+
+
+class InstallPlannerTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        setup_logging('debian-package-installer', 'DEBUG', warn_on_overwrite=False)
+
+    def setUp(self):
+        print()
+
+    def test_plan_is_empty_when_all_packages_are_installed(self):
+        # Given
+        apt_cache, apt_installer, deb_installer = create_components()
+        apt_installer.mark_batch.return_value = {'package1': True}
+        planner = InstallPlanner(apt_cache, apt_installer, deb_installer)
+
+        # When
+        plan = planner.plan([PackageConfig(package='package1')])
+
+        # Then
+        self.assertTrue(plan.is_empty())
+        deb_installer.mark.assert_not_called()
+        apt_cache.clear.assert_called_once()
+        apt_cache.commit.assert_not_called()
+
+    def test_plan_contains_apt_changes(self):
+        # Given
+        apt_cache, apt_installer, deb_installer = create_components()
+        apt_installer.mark_batch.return_value = {'package1': True}
+        apt_cache.get_changes.return_value = [
+            create_apt_package('package1', install=True),
+            create_apt_package('package2', upgrade=True, installed='0.9.0'),
+            create_apt_package('package3', delete=True, installed='1.0.0'),
+        ]
+        planner = InstallPlanner(apt_cache, apt_installer, deb_installer)
+
+        # When
+        plan = planner.plan([PackageConfig(package='package1')])
+
+        # Then
+        self.assertEqual([
+            PlanEntry('package1', 'install', 'apt', '1.0.0', None, 1024),
+            PlanEntry('package2', 'upgrade', 'apt', '1.0.0', '0.9.0', 1024),
+            PlanEntry('package3', 'remove', 'apt', '1.0.0', '1.0.0', 0),
+        ], plan.entries)
+        self.assertEqual(2048, plan.get_download_size())
+        apt_cache.commit.assert_not_called()
+
+    def test_plan_contains_deb_fallbacks_and_unresolved_packages(self):
+        # Given
+        apt_cache, apt_installer, deb_installer = create_components()
+        apt_installer.mark_batch.return_value = {'package1': False, 'package2': False}
+        deb_entry = PlanEntry('package1', 'install', 'deb', '1.0.0', None, 2048, '/tmp/packages/package1.deb')
+        deb_installer.mark.side_effect = [deb_entry, None]
+        planner = InstallPlanner(apt_cache, apt_installer, deb_installer)
+
+        # When
+        plan = planner.plan([PackageConfig(package='package1'), PackageConfig(package='package2')])
+
+        # Then
+        self.assertEqual([deb_entry], plan.entries)
+        self.assertEqual(['package2'], plan.unresolved)
+        self.assertFalse(plan.is_empty())
+
+    def test_plan_contains_unresolved_package_when_deb_resolution_fails(self):
+        # Given
+        apt_cache, apt_installer, deb_installer = create_components()
+        apt_installer.mark_batch.return_value = {'package1': False, 'package2': False}
+        deb_entry = PlanEntry('package2', 'install', 'deb', '1.0.0', None, 2048, '/tmp/packages/package2.deb')
+        deb_installer.mark.side_effect = [Exception('download failed'), deb_entry]
+        planner = InstallPlanner(apt_cache, apt_installer, deb_installer)
+
+        # When
+        plan = planner.plan([PackageConfig(package='package1'), PackageConfig(package='package2')])
+
+        # Then
+        self.assertEqual([deb_entry], plan.entries)
+        self.assertEqual(['package1'], plan.unresolved)
+        apt_cache.clear.assert_called_once()
+
+    def test_plan_can_be_restored_from_dict(self):
+        # Given
+        plan = InstallPlan([PlanEntry('package1', 'install', 'apt', '1.0.0', None, 1024)], ['package2'])
+
+        # When
+        result = InstallPlan.from_dict(plan.to_dict())
+
+        # Then
+        self.assertEqual(plan, result)
+
+
+def create_apt_package(name, install=False, upgrade=False, delete=False, installed=None):
+    apt_package = MagicMock(spec=Package)
+    apt_package.name = name
+    apt_package.marked_install = install
+    apt_package.marked_upgrade = upgrade
+    apt_package.marked_downgrade = False
+    apt_package.marked_reinstall = False
+    apt_package.marked_delete = delete
+    apt_package.candidate.version = '1.0.0'
+    apt_package.candidate.size = 1024
+    if installed:
+        apt_package.installed.version = installed
+    else:
+        apt_package.installed = None
+    return apt_package
+
+
+def create_components():
+    apt_cache = MagicMock(spec=Cache)
+    apt_cache.get_changes.return_value = []
+    apt_installer = MagicMock(spec=IAptInstaller)
+    deb_installer = MagicMock(spec=IDebInstaller)
+    return apt_cache, apt_installer, deb_installer
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+import json
+import os
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from context_logger import setup_logging
+
+from package_installer import InstallQueue
+
+
+class InstallQueueTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        setup_logging('debian-package-installer', 'DEBUG', warn_on_overwrite=False)
+
+    def setUp(self):
+        print()
+        self.temp_dir = TemporaryDirectory()
+        self.queue_dir = os.path.join(self.temp_dir.name, 'queue')
+        self.merged = []
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_submit_installs_package_config(self):
+        # Given
+        package_config = self.write_config('package-config.json', [{'package': 'package1'}])
+        install_queue = InstallQueue(self.queue_dir, 0)
+
+        # When
+        result = install_queue.submit(package_config, None, self.install)
+
+        # Then
+        self.assertEqual({'package1': True}, result)
+        self.assertEqual([([{'package': 'package1'}], None)], self.merged)
+
+    def test_submit_merges_concurrent_requests_into_one_install(self):
+        # Given
+        package_configs = [
+            self.write_config('package-config1.json', [{'package': 'package1'}, {'package': 'package2'}]),
+            self.write_config('package-config2.json', [{'package': 'package2'}, {'package': 'package3'}]),
+            self.write_config('package-config3.json', [{'package': 'package4'}]),
+        ]
+        source_config = self.write_config('source-config.json', [{'name': 'source1'}])
+
+        # When
+        with ThreadPoolExecutor(len(package_configs)) as executor:
+            futures = [executor.submit(InstallQueue(self.queue_dir, 0.5).submit, package_config, source_config,
+                                       self.install) for package_config in package_configs]
+            results = [future.result() for future in futures]
+
+        # Then
+        self.assertEqual([
+            {'package1': True, 'package2': True},
+            {'package2': True, 'package3': True},
+            {'package4': True},
+        ], results)
+        self.assertEqual(1, len(self.merged))
+        self.assertEqual(['package1', 'package2', 'package3', 'package4'],
+                         sorted(entry['package'] for entry in self.merged[0][0]))
+        self.assertEqual([{'name': 'source1'}], self.merged[0][1])
+
+    def test_submit_defers_conflicting_request_to_next_install(self):
+        # Given
+        package_configs = [
+            self.write_config('package-config1.json', [{'package': 'package1', 'version': '1.0.0'}]),
+            self.write_config('package-config2.json', [{'package': 'package1', 'version': '2.0.0'}]),
+        ]
+
+        # When
+        with ThreadPoolExecutor(len(package_configs)) as executor:
+            futures = [executor.submit(InstallQueue(self.queue_dir, 0.5).submit, package_config, None, self.install)
+                       for package_config in package_configs]
+            results = [future.result() for future in futures]
+
+        # Then
+        self.assertEqual([{'package1': True}, {'package1': True}], results)
+        self.assertEqual(2, len(self.merged))
+
+    def test_submit_does_not_merge_requests_with_different_options(self):
+        # Given
+        package_configs = [
+            self.write_config('package-config1.json', [{'package': 'package1'}]),
+            self.write_config('package-config2.json', [{'package': 'package2'}]),
+        ]
+        installs = []
+
+        def install(options, package_config_path, source_config_path):
+            installs.append((options, sorted(self.install(package_config_path, source_config_path))))
+            return {'package1': True, 'package2': True}
+
+        # When
+        with ThreadPoolExecutor(len(package_configs)) as executor:
+            futures = [executor.submit(InstallQueue(self.queue_dir, 0.5).submit, package_config, None,
+                                       partial(install, {'batch': batch}), {'batch': batch})
+                       for package_config, batch in zip(package_configs, [True, False])]
+            results = [future.result() for future in futures]
+
+        # Then
+        self.assertEqual([{'package1': True}, {'package2': True}], results)
+        self.assertEqual([({'batch': True}, ['package1']), ({'batch': False}, ['package2'])],
+                         sorted(installs, key=lambda install_call: install_call[1]))
+
+    def test_submit_removes_stale_results_of_other_callers(self):
+        # Given
+        package_config = self.write_config('package-config.json', [{'package': 'package1'}])
+        stale_results = os.path.join(self.queue_dir, 'results', '1-1.json')
+        os.makedirs(os.path.dirname(stale_results))
+        with open(stale_results, 'w') as file:
+            json.dump({'package2': True}, file)
+        os.utime(stale_results, (0, 0))
+        install_queue = InstallQueue(self.queue_dir, 0)
+
+        # When
+        result = install_queue.submit(package_config, None, self.install)
+
+        # Then
+        self.assertEqual({'package1': True}, result)
+        self.assertEqual([], os.listdir(os.path.join(self.queue_dir, 'results')))
+
+    def test_submit_returns_failure_when_install_fails(self):
+        # Given
+        package_config = self.write_config('package-config.json', [{'package': 'package1'}])
+        install = MagicMock(side_effect=Exception('dpkg failed'))
+        install_queue = InstallQueue(self.queue_dir, 0)
+
+        # When
+        result = install_queue.submit(package_config, None, install)
+
+        # Then
+        self.assertEqual({'package1': False}, result)
+        self.assertEqual([], os.listdir(os.path.join(self.queue_dir, 'requests')))
+
+    def test_submit_raises_error_on_invalid_package_config(self):
+        # Given
+        package_config = self.write_config('package-config.json', [{'name': 'package1'}])
+        install_queue = InstallQueue(self.queue_dir, 0)
+
+        # When, Then
+        with self.assertRaises(ValueError):
+            install_queue.submit(package_config, None, self.install)
+
+    def install(self, package_config_path, source_config_path):
+        with open(package_config_path) as file:
+            entries = json.load(file)
+
+        sources = None
+        if source_config_path:
+            with open(source_config_path) as file:
+                sources = json.load(file)
+
+        self.merged.append((entries, sources))
+
+        return {entry['package']: True for entry in entries}
+
+    def write_config(self, name, entries):
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, 'w') as file:
+            json.dump(entries, file)
+        return path
+
+
+if __name__ == '__main__':
+    unittest.main()
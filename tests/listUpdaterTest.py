@@ -0,0 +1,128 @@
+import unittest
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+import apt_pkg
+from apt import Cache
+from context_logger import setup_logging
+
+from package_installer import ListUpdater, ListFetchProgress, IInstallMetrics, SourceFetch
+
+
+class ListUpdaterTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        setup_logging('debian-package-installer', 'DEBUG', warn_on_overwrite=False)
+
+    def setUp(self):
+        print()
+
+    def test_update_reports_fetch_per_source(self):
+        # Given
+        apt_cache, metrics = create_components()
+        apt_cache.update.side_effect = lambda progress, **kwargs: fetch_items(progress, [
+            create_item('http://deb.debian.org/debian bookworm InRelease'),
+            create_item('http://deb.debian.org/debian bookworm/main amd64 Packages'),
+            create_item('http://apt.vendor.com/debian stable InRelease'),
+        ])
+        list_updater = ListUpdater(apt_cache, metrics)
+
+        # When
+        result = list_updater.update()
+
+        # Then
+        self.assertEqual(['http://deb.debian.org/debian', 'http://apt.vendor.com/debian'],
+                         [fetch.source for fetch in result])
+        self.assertEqual([2, 1], [fetch.items for fetch in result])
+        self.assertTrue(all(fetch.success for fetch in result))
+        self.assertEqual(2, metrics.record_source.call_count)
+        metrics.increment.assert_not_called()
+
+    def test_update_continues_when_source_fails(self):
+        # Given
+        apt_cache, metrics = create_components()
+        apt_cache.update.side_effect = lambda progress, **kwargs: fetch_items(progress, [
+            create_item('http://deb.debian.org/debian bookworm InRelease'),
+            create_item('http://apt.vendor.com/debian stable InRelease', failed=True),
+        ])
+        list_updater = ListUpdater(apt_cache, metrics)
+
+        # When
+        result = list_updater.update()
+
+        # Then
+        self.assertEqual([True, False], [fetch.success for fetch in result])
+        apt_cache.update.assert_called_once()
+        self.assertFalse(apt_cache.update.call_args.kwargs['raise_on_error'])
+        metrics.increment.assert_called_once_with('sources_failed', 1)
+
+    def test_update_reports_failed_update_when_update_fails(self):
+        # Given
+        apt_cache, metrics = create_components()
+        apt_cache.update.side_effect = Exception('lock failed')
+        list_updater = ListUpdater(apt_cache, metrics)
+
+        # When
+        result = list_updater.update()
+
+        # Then
+        self.assertEqual([SourceFetch('apt', success=False, failed=1)], result)
+        metrics.increment.assert_called_once_with('sources_failed', 1)
+
+    def test_update_configures_source_timeout_and_fetch_workers(self):
+        # Given
+        apt_cache, metrics = create_components()
+        list_updater = ListUpdater(apt_cache, metrics, source_timeout=5, fetch_workers=3)
+
+        # When
+        list_updater.update()
+
+        # Then
+        self.assertEqual('5', apt_pkg.config.find('Acquire::http::Timeout'))
+        self.assertEqual('5', apt_pkg.config.find('Acquire::https::Timeout'))
+        self.assertEqual('3', apt_pkg.config.find('Acquire::QueueHost::Limit'))
+
+    def test_progress_treats_ignored_items_as_success(self):
+        # Given
+        progress = ListFetchProgress()
+        progress.start()
+
+        # When
+        progress.fail(create_item('http://deb.debian.org/debian bookworm/main Translation-en', ignored=True))
+
+        # Then
+        fetch = progress.get_sources()[0]
+        self.assertEqual(('http://deb.debian.org/debian', True, 1, 0),
+                         (fetch.source, fetch.success, fetch.items, fetch.failed))
+
+
+def create_components():
+    apt_cache = MagicMock(spec=Cache)
+    metrics = MagicMock(spec=IInstallMetrics)
+    return apt_cache, metrics
+
+
+def create_item(description, failed=False, ignored=False):
+    item = MagicMock()
+    item.description = description
+    item.uri = description.split()[0]
+    item.owner.STAT_DONE = 2
+    item.owner.status = 2 if ignored else 4
+    item.failed = failed or ignored
+    return item
+
+
+def fetch_items(progress, items):
+    progress.start()
+    for item in items:
+        if item.failed:
+            progress.fail(item)
+        else:
+            progress.done(item)
+    progress.stop()
+    return not any(item.failed for item in items)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,7 +7,22 @@ from common_utility.jsonLoader import IJsonLoader
 from context_logger import setup_logging
 from package_downloader import PackageConfig
 
-from package_installer import PackageInstaller, IAptInstaller, IDebInstaller, ISourceAdder
+from package_installer import (
+    PackageInstaller,
+    IAptInstaller,
+    IDebInstaller,
+    ISourceAdder,
+    IUpdatePolicy,
+    ICacheRefresher,
+    IResolutionCache,
+    Resolution,
+    IConfigSnapshot,
+    IListUpdater,
+    IRetryPolicy,
+    SourceFetch,
+    AptInstaller,
+    ListUpdater,
+)
 
 
 class PackageInstallerTest(TestCase):
@@ -22,13 +37,135 @@ class PackageInstallerTest(TestCase):
     def test_install_packages_initialize_apt_cache(self):
         # Given
         json_loader, apt_cache, apt_installer, deb_installer, source_adder = create_components([])
-        package_installer = PackageInstaller('path', json_loader, apt_cache, apt_installer, deb_installer, source_adder)
+        cache_refresher = MagicMock(spec=ICacheRefresher)
+        package_installer = PackageInstaller(
+            'path', json_loader, apt_cache, apt_installer, deb_installer, source_adder, cache_refresher=cache_refresher
+        )
+
+        # When
+        package_installer.install_packages()
+
+        # Then
+        cache_refresher.assert_has_calls([mock.call.refresh(), mock.call.invalidate()])
+        apt_cache.update.assert_called_once()
+        apt_cache.open.assert_not_called()
+
+    def test_install_packages_skips_apt_cache_update_when_not_needed(self):
+        # Given
+        json_loader, apt_cache, apt_installer, deb_installer, source_adder = create_components([])
+        update_policy = MagicMock(spec=IUpdatePolicy)
+        update_policy.is_update_needed.return_value = False
+        package_installer = PackageInstaller(
+            'path', json_loader, apt_cache, apt_installer, deb_installer, source_adder, update_policy=update_policy
+        )
+
+        # When
+        package_installer.install_packages()
+
+        # Then
+        apt_cache.update.assert_not_called()
+        update_policy.update_done.assert_not_called()
+
+    def test_install_packages_updates_apt_cache_when_needed(self):
+        # Given
+        json_loader, apt_cache, apt_installer, deb_installer, source_adder = create_components([])
+        update_policy = MagicMock(spec=IUpdatePolicy)
+        update_policy.is_update_needed.return_value = True
+        package_installer = PackageInstaller(
+            'path', json_loader, apt_cache, apt_installer, deb_installer, source_adder, update_policy=update_policy
+        )
+
+        # When
+        package_installer.install_packages()
+
+        # Then
+        apt_cache.update.assert_called_once()
+        update_policy.update_done.assert_called_once()
+
+    def test_install_packages_does_not_record_update_when_source_fetch_failed(self):
+        # Given
+        json_loader, apt_cache, apt_installer, deb_installer, source_adder = create_components([])
+        update_policy = MagicMock(spec=IUpdatePolicy)
+        update_policy.is_update_needed.return_value = True
+        list_updater = MagicMock(spec=IListUpdater)
+        list_updater.update.return_value = [SourceFetch('source1'), SourceFetch('source2', success=False)]
+        package_installer = PackageInstaller(
+            'path', json_loader, apt_cache, apt_installer, deb_installer, source_adder, update_policy=update_policy,
+            list_updater=list_updater
+        )
+
+        # When
+        package_installer.install_packages()
+
+        # Then
+        list_updater.update.assert_called_once()
+        update_policy.update_done.assert_not_called()
+
+    def test_install_packages_does_not_record_update_when_list_update_failed(self):
+        # Given
+        json_loader, apt_cache, apt_installer, deb_installer, source_adder = create_components([])
+        apt_cache.update.side_effect = Exception('lock failed')
+        update_policy = MagicMock(spec=IUpdatePolicy)
+        update_policy.is_update_needed.return_value = True
+        package_installer = PackageInstaller(
+            'path', json_loader, apt_cache, apt_installer, deb_installer, source_adder, update_policy=update_policy,
+            list_updater=ListUpdater(apt_cache)
+        )
 
         # When
         package_installer.install_packages()
 
         # Then
-        apt_cache.assert_has_calls([mock.call.open(), mock.call.update(), mock.call.open()])
+        apt_cache.update.assert_called_once()
+        update_policy.update_done.assert_not_called()
+
+    def test_install_packages_reopens_updated_cache_for_installers_with_default_refresher(self):
+        # Given
+        json_loader, apt_cache, _, deb_installer, source_adder = create_components([PackageConfig(package='a')])
+        apt_installer = AptInstaller(apt_cache)
+        apt_cache.get.return_value = None
+        package_installer = PackageInstaller('path', json_loader, apt_cache, apt_installer, deb_installer,
+                                             source_adder, batch_install=True)
+
+        # When
+        package_installer.install_packages()
+
+        # Then
+        calls = [call[0] for call in apt_cache.method_calls]
+        self.assertLess(calls.index('update'), calls.index('open'))
+        self.assertLess(calls.index('open'), calls.index('get'))
+
+    def test_install_packages_updates_package_lists_with_list_updater(self):
+        # Given
+        json_loader, apt_cache, apt_installer, deb_installer, source_adder = create_components([])
+        list_updater = MagicMock(spec=IListUpdater)
+        package_installer = PackageInstaller(
+            'path', json_loader, apt_cache, apt_installer, deb_installer, source_adder, list_updater=list_updater
+        )
+
+        # When
+        package_installer.install_packages()
+
+        # Then
+        list_updater.update.assert_called_once()
+        apt_cache.update.assert_not_called()
+
+    def test_install_packages_updates_apt_cache_when_sources_changed(self):
+        # Given
+        json_loader, apt_cache, apt_installer, deb_installer, source_adder = create_components([])
+        source_adder.add_sources.return_value = True
+        update_policy = MagicMock(spec=IUpdatePolicy)
+        update_policy.is_update_needed.return_value = False
+        package_installer = PackageInstaller(
+            'path', json_loader, apt_cache, apt_installer, deb_installer, source_adder, update_policy=update_policy
+        )
+
+        # When
+        package_installer.install_packages()
+
+        # Then
+        apt_cache.update.assert_called_once()
+        update_policy.is_update_needed.assert_not_called()
 
     def test_install_packages_from_apt_repository(self):
         # Given
@@ -112,6 +249,188 @@ class PackageInstallerTest(TestCase):
         )
         deb_installer.install.assert_has_calls([mock.call(config_list[1]), mock.call(config_list[2])])
 
+    def test_install_packages_returns_result_per_package(self):
+        # Given
+        config_list = create_config_list()
+        json_loader, apt_cache, apt_installer, deb_installer, source_adder = create_components(config_list)
+        apt_installer.install.side_effect = [True, False, False]
+        deb_installer.install.side_effect = [True, False]
+        package_installer = PackageInstaller('path', json_loader, apt_cache, apt_installer, deb_installer, source_adder)
+
+        # When
+        result = package_installer.install_packages()
+
+        # Then
+        self.assertEqual({'package1': True, 'package2': True, 'package3': False}, result)
+
+    def test_install_packages_prefetches_packages_not_available_from_apt_repository(self):
+        # Given
+        config_list = create_config_list()
+        json_loader, apt_cache, apt_installer, deb_installer, source_adder = create_components(config_list)
+        apt_installer.is_available.side_effect = [True, False, False]
+        package_installer = PackageInstaller('path', json_loader, apt_cache, apt_installer, deb_installer, source_adder)
+
+        # When
+        package_installer.install_packages()
+
+        # Then
+        deb_installer.prefetch.assert_called_once_with([config_list[1], config_list[2]])
+
+    def test_install_packages_in_batch(self):
+        # Given
+        config_list = create_config_list()
+        json_loader, apt_cache, apt_installer, deb_installer, source_adder = create_components(config_list)
+        apt_installer.install_batch.return_value = {'package1': True, 'package2': False, 'package3': False}
+        deb_installer.install_batch.return_value = {'package2': True, 'package3': False}
+        package_installer = PackageInstaller(
+            'path', json_loader, apt_cache, apt_installer, deb_installer, source_adder, batch_install=True
+        )
+
+        # When
+        result = package_installer.install_packages()
+
+        # Then
+        self.assertEqual({'package1': True, 'package2': True, 'package3': False}, result)
+        apt_installer.install_batch.assert_called_once_with(config_list)
+        apt_installer.install.assert_not_called()
+        deb_installer.install_batch.assert_called_once_with([config_list[1], config_list[2]])
+        deb_installer.install.assert_not_called()
+
+    def test_install_packages_skips_apt_repository_for_packages_resolved_to_package_file(self):
+        # Given
+        config_list = create_config_list()
+        json_loader, apt_cache, apt_installer, deb_installer, source_adder = create_components(config_list)
+        resolution_cache = MagicMock(spec=IResolutionCache)
+        resolutions = {'package2': Resolution('deb', '1.0.0', 'http://url/package2.deb')}
+        resolution_cache.get.side_effect = lambda config: resolutions.get(config.package)
+        apt_installer.is_available.return_value = True
+        apt_installer.install.return_value = True
+        deb_installer.install.return_value = True
+        cache_refresher = MagicMock(spec=ICacheRefresher)
+        cache_refresher.get_installed_version.return_value = '1.0.0'
+        package_installer = PackageInstaller(
+            'path', json_loader, apt_cache, apt_installer, deb_installer, source_adder,
+            cache_refresher=cache_refresher, resolution_cache=resolution_cache
+        )
+
+        # When
+        result = package_installer.install_packages()
+
+        # Then
+        self.assertEqual({'package1': True, 'package2': True, 'package3': True}, result)
+        deb_installer.prefetch.assert_called_once_with([config_list[1]])
+        apt_installer.install.assert_has_calls([mock.call(config_list[0]), mock.call(config_list[2])])
+        deb_installer.install.assert_called_once_with(config_list[1])
+        resolution_cache.put.assert_has_calls([
+            mock.call(config_list[0], Resolution('apt', '1.0.0')),
+            mock.call(config_list[1], Resolution('deb', '1.0.0', 'http://url/package2.deb')),
+            mock.call(config_list[2], Resolution('apt', '1.0.0')),
+        ])
+        resolution_cache.save.assert_called_once()
+
+    def test_install_packages_in_batch_excludes_packages_resolved_to_package_file(self):
+        # Given
+        config_list = create_config_list()
+        json_loader, apt_cache, apt_installer, deb_installer, source_adder = create_components(config_list)
+        resolution_cache = MagicMock(spec=IResolutionCache)
+        resolution_cache.get.side_effect = lambda config: Resolution('deb') if config.package == 'package3' else None
+        apt_installer.install_batch.return_value = {'package1': True, 'package2': True}
+        deb_installer.install_batch.return_value = {'package3': True}
+        package_installer = PackageInstaller(
+            'path', json_loader, apt_cache, apt_installer, deb_installer, source_adder, batch_install=True,
+            resolution_cache=resolution_cache
+        )
+
+        # When
+        result = package_installer.install_packages()
+
+        # Then
+        self.assertEqual({'package1': True, 'package2': True, 'package3': True}, result)
+        apt_installer.install_batch.assert_called_once_with(config_list[:2])
+        deb_installer.install_batch.assert_called_once_with([config_list[2]])
+
+    def test_install_packages_applies_only_changed_packages(self):
+        # Given
+        config_list = create_config_list()
+        json_loader, apt_cache, apt_installer, deb_installer, source_adder = create_components(config_list)
+        config_snapshot = MagicMock(spec=IConfigSnapshot)
+        config_snapshot.get_changes.return_value = [config_list[1]]
+        config_snapshot.is_source_changed.return_value = False
+        apt_installer.install.return_value = True
+        package_installer = PackageInstaller(
+            'path', json_loader, apt_cache, apt_installer, deb_installer, source_adder, config_snapshot=config_snapshot
+        )
+
+        # When
+        result = package_installer.install_packages()
+
+        # Then
+        self.assertEqual({'package1': True, 'package2': True, 'package3': True}, result)
+        apt_installer.install.assert_called_once_with(config_list[1])
+        source_adder.add_sources.assert_not_called()
+        config_snapshot.update.assert_called_once_with(config_list, result)
+        config_snapshot.save.assert_called_once()
+
+    def test_install_packages_skips_apt_when_nothing_changed(self):
+        # Given
+        config_list = create_config_list()
+        json_loader, apt_cache, apt_installer, deb_installer, source_adder = create_components(config_list)
+        config_snapshot = MagicMock(spec=IConfigSnapshot)
+        config_snapshot.get_changes.return_value = []
+        package_installer = PackageInstaller(
+            'path', json_loader, apt_cache, apt_installer, deb_installer, source_adder, config_snapshot=config_snapshot
+        )
+
+        # When
+        result = package_installer.install_packages()
+
+        # Then
+        self.assertEqual({'package1': True, 'package2': True, 'package3': True}, result)
+        source_adder.add_sources.assert_not_called()
+        apt_cache.update.assert_not_called()
+        apt_installer.install.assert_not_called()
+        deb_installer.install.assert_not_called()
+        config_snapshot.save.assert_called_once()
+
+    def test_install_packages_adds_sources_when_source_config_changed(self):
+        # Given
+        config_list = create_config_list()
+        json_loader, apt_cache, apt_installer, deb_installer, source_adder = create_components(config_list)
+        config_snapshot = MagicMock(spec=IConfigSnapshot)
+        config_snapshot.get_changes.return_value = config_list
+        config_snapshot.is_source_changed.return_value = True
+        apt_installer.install.return_value = True
+        package_installer = PackageInstaller(
+            'path', json_loader, apt_cache, apt_installer, deb_installer, source_adder, config_snapshot=config_snapshot
+        )
+
+        # When
+        package_installer.install_packages()
+
+        # Then
+        source_adder.add_sources.assert_called_once()
+        self.assertEqual(3, apt_installer.install.call_count)
+
+    def test_install_packages_recovers_interrupted_installation_before_apply(self):
+        # Given
+        config_list = create_config_list()
+        json_loader, apt_cache, apt_installer, deb_installer, source_adder = create_components(config_list)
+        apt_installer.install.return_value = True
+        cache_refresher = MagicMock(spec=ICacheRefresher)
+        retry_policy = MagicMock(spec=IRetryPolicy)
+        retry_policy.recover.return_value = True
+        package_installer = PackageInstaller(
+            'path', json_loader, apt_cache, apt_installer, deb_installer, source_adder,
+            cache_refresher=cache_refresher, retry_policy=retry_policy
+        )
+
+        # When
+        package_installer.install_packages()
+
+        # Then
+        retry_policy.recover.assert_called_once()
+        self.assertEqual(mock.call.invalidate(), cache_refresher.method_calls[0])
+
 
 def create_config_list():
     return [PackageConfig(package='package1'), PackageConfig(package='package2'), PackageConfig(package='package3')]
@@ -124,6 +443,7 @@ def create_components(config_list):
     apt_installer = MagicMock(spec=IAptInstaller)
     deb_installer = MagicMock(spec=IDebInstaller)
     source_adder = MagicMock(spec=ISourceAdder)
+    source_adder.add_sources.return_value = False
     return json_loader, apt_cache, apt_installer, deb_installer, source_adder
 
 
@@ -0,0 +1,130 @@
+import os
+import time
+import unittest
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from context_logger import setup_logging
+from package_downloader import PackageConfig, ReleaseConfig
+
+from package_installer import ResolutionCache, Resolution
+
+
+class ResolutionCacheTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        setup_logging('debian-package-installer', 'DEBUG', warn_on_overwrite=False)
+
+    def setUp(self):
+        print()
+        self.temp_dir = TemporaryDirectory()
+        self.cache_file = os.path.join(self.temp_dir.name, 'state', 'resolution-cache.json')
+        self.lists_dir = os.path.join(self.temp_dir.name, 'lists')
+        self.sources_file = os.path.join(self.temp_dir.name, 'sources.list')
+        os.makedirs(self.lists_dir)
+        self.write_file(os.path.join(self.lists_dir, 'deb.debian.org_Packages'), 'Package: package1\n')
+        self.write_file(self.sources_file, 'deb http://deb.debian.org/debian bookworm main\n')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_get_returns_none_when_package_is_not_resolved(self):
+        # Given
+        resolution_cache = self.create_cache()
+
+        # When
+        result = resolution_cache.get(PackageConfig(package='package1'))
+
+        # Then
+        self.assertIsNone(result)
+
+    def test_get_returns_saved_resolution(self):
+        # Given
+        package_config = PackageConfig(package='package1', version='1.0.0')
+        resolution_cache = self.create_cache()
+        resolution_cache.put(package_config, Resolution('apt', '1.0.0', resolved_at=100.0))
+        resolution_cache.save()
+
+        # When
+        result = self.create_cache().get(package_config)
+
+        # Then
+        self.assertEqual(Resolution('apt', '1.0.0', resolved_at=100.0), result)
+
+    def test_get_returns_none_for_different_config(self):
+        # Given
+        resolution_cache = self.create_cache()
+        resolution_cache.put(PackageConfig(package='package1', version='1.0.0'), Resolution('apt', '1.0.0'))
+        resolution_cache.save()
+
+        # When
+        result = self.create_cache().get(PackageConfig(package='package1', version='2.0.0'))
+
+        # Then
+        self.assertIsNone(result)
+
+    def test_get_returns_none_when_apt_lists_changed(self):
+        # Given
+        package_config = PackageConfig(package='package1')
+        resolution_cache = self.create_cache()
+        resolution_cache.put(package_config, Resolution('apt', '1.0.0'))
+        resolution_cache.save()
+        self.write_file(os.path.join(self.lists_dir, 'deb.debian.org_Packages'), 'Package: package1\nVersion: 2\n')
+
+        # When
+        result = self.create_cache().get(package_config)
+
+        # Then
+        self.assertIsNone(result)
+
+    def test_get_returns_none_when_sources_changed(self):
+        # Given
+        package_config = PackageConfig(package='package1')
+        resolution_cache = self.create_cache()
+        resolution_cache.put(package_config, Resolution('apt', '1.0.0'))
+        resolution_cache.save()
+        self.write_file(self.sources_file, 'deb http://deb.debian.org/debian trixie main\n')
+
+        # When
+        result = self.create_cache().get(package_config)
+
+        # Then
+        self.assertIsNone(result)
+
+    def test_get_returns_none_when_latest_release_resolution_expired(self):
+        # Given
+        release = ReleaseConfig(repo='owner/package1', tag='latest', matcher='*.deb')
+        package_config = PackageConfig(package='package1', release=release)
+        resolution_cache = self.create_cache()
+        resolution_cache.put(package_config, Resolution('deb', url='http://url', resolved_at=time.time() - 7200))
+
+        # When
+        result = resolution_cache.get(package_config)
+
+        # Then
+        self.assertIsNone(result)
+
+    def test_get_returns_pinned_release_resolution_regardless_of_age(self):
+        # Given
+        release = ReleaseConfig(repo='owner/package1', tag='v1.0.0', matcher='*.deb')
+        package_config = PackageConfig(package='package1', release=release)
+        resolution_cache = self.create_cache()
+        resolution_cache.put(package_config, Resolution('deb', url='http://url', resolved_at=time.time() - 7200))
+
+        # When
+        result = resolution_cache.get(package_config)
+
+        # Then
+        self.assertEqual('http://url', result.url)
+
+    def create_cache(self):
+        return ResolutionCache(self.cache_file, self.lists_dir, (self.sources_file,))
+
+    def write_file(self, file_path, content):
+        with open(file_path, 'w') as file:
+            file.write(content)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+import unittest
+from unittest import TestCase, mock
+from unittest.mock import MagicMock
+
+from apt.cache import FetchFailedException, LockFailedException
+from context_logger import setup_logging
+
+from package_installer import RetryPolicy, IDpkgRunner, IDpkgStatusReader, IInstallMetrics
+
+
+class RetryPolicyTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        setup_logging('debian-package-installer', 'DEBUG', warn_on_overwrite=False)
+
+    def setUp(self):
+        print()
+
+    def test_run_returns_result_without_retry(self):
+        # Given
+        dpkg_runner, status_reader, metrics = create_components()
+        retry_policy = RetryPolicy(dpkg_runner, status_reader, 2, 0, metrics=metrics)
+        action = MagicMock(return_value=True)
+
+        # When
+        result = retry_policy.run(action)
+
+        # Then
+        self.assertTrue(result)
+        action.assert_called_once()
+        status_reader.is_interrupted.assert_not_called()
+
+    def test_run_recovers_and_retries_failed_action(self):
+        # Given
+        dpkg_runner, status_reader, metrics = create_components()
+        status_reader.is_interrupted.return_value = True
+        retry_policy = RetryPolicy(dpkg_runner, status_reader, 2, 0, metrics=metrics)
+        action = MagicMock(side_effect=[Exception('dpkg interrupted'), True])
+        prepare_retry = MagicMock()
+
+        # When
+        result = retry_policy.run(action, prepare_retry)
+
+        # Then
+        self.assertTrue(result)
+        self.assertEqual(2, action.call_count)
+        dpkg_runner.configure_pending.assert_called_once()
+        prepare_retry.assert_called_once()
+        metrics.increment.assert_any_call('commit_retries')
+
+    def test_run_raises_error_when_retries_exhausted(self):
+        # Given
+        dpkg_runner, status_reader, metrics = create_components()
+        retry_policy = RetryPolicy(dpkg_runner, status_reader, 2, 0, metrics=metrics)
+        action = MagicMock(side_effect=FetchFailedException('fetch failed'))
+
+        # When, Then
+        with self.assertRaises(Exception):
+            retry_policy.run(action)
+        self.assertEqual(3, action.call_count)
+        dpkg_runner.configure_pending.assert_not_called()
+
+    @mock.patch('package_installer.retryPolicy.time.sleep')
+    def test_run_backs_off_exponentially_up_to_max_backoff(self, sleep):
+        # Given
+        dpkg_runner, status_reader, metrics = create_components()
+        retry_policy = RetryPolicy(dpkg_runner, status_reader, 3, 2.0, 5.0, metrics)
+        action = MagicMock(side_effect=[FetchFailedException('fetch failed')] * 3 + [True])
+
+        # When
+        retry_policy.run(action)
+
+        # Then
+        self.assertEqual([mock.call(2.0), mock.call(4.0), mock.call(5.0)], sleep.call_args_list)
+
+    def test_recover_returns_false_when_dpkg_was_not_interrupted(self):
+        # Given
+        dpkg_runner, status_reader, metrics = create_components()
+        retry_policy = RetryPolicy(dpkg_runner, status_reader, metrics=metrics)
+
+        # When
+        result = retry_policy.recover()
+
+        # Then
+        self.assertFalse(result)
+        dpkg_runner.configure_pending.assert_not_called()
+
+    def test_recover_configures_pending_packages_when_dpkg_was_interrupted(self):
+        # Given
+        dpkg_runner, status_reader, metrics = create_components()
+        dpkg_runner.configure_pending.side_effect = Exception('dpkg failed')
+        status_reader.is_interrupted.return_value = True
+        retry_policy = RetryPolicy(dpkg_runner, status_reader, metrics=metrics)
+
+        # When
+        result = retry_policy.recover()
+
+        # Then
+        self.assertTrue(result)
+        dpkg_runner.configure_pending.assert_called_once()
+        metrics.increment.assert_called_once_with('dpkg_recoveries')
+
+    def test_run_retries_when_apt_lock_is_busy(self):
+        # Given
+        dpkg_runner, status_reader, metrics = create_components()
+        retry_policy = RetryPolicy(dpkg_runner, status_reader, 2, 0, metrics=metrics)
+        action = MagicMock(side_effect=[LockFailedException('lock busy'), True])
+
+        # When
+        result = retry_policy.run(action)
+
+        # Then
+        self.assertTrue(result)
+        self.assertEqual(2, action.call_count)
+
+    def test_run_does_not_retry_permanent_error(self):
+        # Given
+        dpkg_runner, status_reader, metrics = create_components()
+        retry_policy = RetryPolicy(dpkg_runner, status_reader, 2, 0, metrics=metrics)
+        action = MagicMock(side_effect=Exception('unmet dependencies'))
+        prepare_retry = MagicMock()
+
+        # When, Then
+        with self.assertRaises(Exception):
+            retry_policy.run(action, prepare_retry)
+        action.assert_called_once()
+        prepare_retry.assert_not_called()
+        metrics.increment.assert_not_called()
+
+
+def create_components():
+    dpkg_runner = MagicMock(spec=IDpkgRunner)
+    status_reader = MagicMock(spec=IDpkgStatusReader)
+    status_reader.is_interrupted.return_value = False
+    metrics = MagicMock(spec=IInstallMetrics)
+    return dpkg_runner, status_reader, metrics
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,10 @@
+import os
 import unittest
+from tempfile import TemporaryDirectory
 from unittest import TestCase
 from unittest.mock import MagicMock
 
-from aptsources.sourceslist import SourcesList
+from aptsources.sourceslist import SourcesList, SourceEntry
 from common_utility.jsonLoader import IJsonLoader
 from context_logger import setup_logging
 from package_downloader import IFileDownloader
@@ -18,40 +20,182 @@ class SourceAdderTest(TestCase):
 
     def setUp(self):
         print()
+        self.temp_dir = TemporaryDirectory()
+        self.source_file = os.path.join(self.temp_dir.name, 'sources.list.d', 'debian-package-installer.list')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
 
     def test_add_sources_adds_sources_and_keys(self):
         # Given
         json_loader, sources_list, key_adder, file_downloader = create_components()
-        source_adder = SourceAdder('path/to/config.json', json_loader, sources_list, key_adder, file_downloader)
+        source_adder = SourceAdder('path/to/config.json', json_loader, sources_list, key_adder, file_downloader,
+                                   source_file=self.source_file)
+
+        # When
+        result = source_adder.add_sources()
+
+        # Then
+        self.assertTrue(result)
+        self.assertEqual(SOURCE_FILE_CONTENT, read_file(self.source_file))
+        key_adder.fetch_from_key_server.assert_called_once()
+        self.assertEqual(('keyserver.test1.com', '0123456789ABCDEF012345671111111111111111'),
+                         key_adder.fetch_from_key_server.call_args.args[:2])
+        key_adder.add_from_key_file.assert_any_call(key_adder.fetch_from_key_server.call_args.args[2])
+        key_adder.add_from_key_file.assert_any_call('/path/to/public2.key')
+        key_adder.add_from_key_file.assert_any_call('/path/to/public3.key')
+        sources_list.save.assert_not_called()
+
+    def test_add_sources_lists_keys_once_before_and_once_after_import(self):
+        # Given
+        json_loader, sources_list, key_adder, file_downloader = create_components()
+        source_adder = SourceAdder('path/to/config.json', json_loader, sources_list, key_adder, file_downloader,
+                                   source_file=self.source_file)
+
+        # When
+        source_adder.add_sources()
+
+        # Then
+        self.assertEqual(2, key_adder.get_available_key_ids.call_count)
+
+    def test_add_sources_skips_available_keys(self):
+        # Given
+        json_loader, sources_list, key_adder, file_downloader = create_components()
+        key_adder.get_available_key_ids.side_effect = None
+        key_adder.get_available_key_ids.return_value = ['1111111111111111', '2222222222222222', '3333333333333333']
+        source_adder = SourceAdder('path/to/config.json', json_loader, sources_list, key_adder, file_downloader,
+                                   source_file=self.source_file)
 
         # When
         source_adder.add_sources()
 
         # Then
-        sources_list.add.assert_any_call('deb', 'http://url1', 'stable', ['main'])
-        key_adder.add_from_key_server.assert_any_call('keyserver.test1.com', '0123456789ABCDEF012345671111111111111111')
-        sources_list.add.assert_any_call('deb', 'http://url2', 'stable', ['main'])
+        key_adder.fetch_from_key_server.assert_not_called()
+        key_adder.add_from_key_file.assert_not_called()
+        key_adder.get_available_key_ids.assert_called_once()
+
+    def test_add_sources_does_not_rewrite_unchanged_source_file(self):
+        # Given
+        json_loader, sources_list, key_adder, file_downloader = create_components()
+        key_adder.get_available_key_ids.side_effect = None
+        key_adder.get_available_key_ids.return_value = ['1111111111111111', '2222222222222222', '3333333333333333']
+        source_adder = SourceAdder('path/to/config.json', json_loader, sources_list, key_adder, file_downloader,
+                                   source_file=self.source_file)
+        source_adder.add_sources()
+        os.utime(self.source_file, ns=(0, 0))
+
+        # When
+        result = source_adder.add_sources()
+
+        # Then
+        self.assertFalse(result)
+        self.assertEqual(0, os.stat(self.source_file).st_mtime_ns)
+
+    def test_add_sources_skips_sources_configured_in_other_files(self):
+        # Given
+        json_loader, sources_list, key_adder, file_downloader = create_components()
+        key_adder.get_available_key_ids.side_effect = None
+        key_adder.get_available_key_ids.return_value = ['1111111111111111', '2222222222222222', '3333333333333333']
+        sources_list.list = [
+            SourceEntry('deb http://url1/ stable main contrib', '/etc/apt/sources.list'),
+            SourceEntry('# deb http://url2 stable main', '/etc/apt/sources.list'),
+            SourceEntry('deb http://url3 stable main', self.source_file),
+        ]
+        source_adder = SourceAdder('path/to/config.json', json_loader, sources_list, key_adder, file_downloader,
+                                   source_file=self.source_file)
+
+        # When
+        result = source_adder.add_sources()
+
+        # Then
+        self.assertTrue(result)
+        self.assertEqual('deb http://url2 stable main\ndeb http://url3 stable main\n', read_file(self.source_file))
+
+    def test_add_sources_adds_flat_repository_source_configured_in_other_file_only_once(self):
+        # Given
+        json_loader, sources_list, key_adder, file_downloader = create_components()
+        json_loader.load_list.return_value = [
+            SourceConfig(name='source1', source='deb http://url1/debian ./',
+                         key_id='0123456789ABCDEF012345671111111111111111'),
+            SourceConfig(name='source2', source='deb http://url2/debian ./',
+                         key_id='0123456789ABCDEF012345671111111111111111'),
+        ]
+        key_adder.get_available_key_ids.side_effect = None
+        key_adder.get_available_key_ids.return_value = ['1111111111111111']
+        sources_list.list = [
+            SourceEntry('deb http://url1/debian ./', '/etc/apt/sources.list'),
+            SourceEntry('deb http://url2/debian stable main', '/etc/apt/sources.list'),
+        ]
+        source_adder = SourceAdder('path/to/config.json', json_loader, sources_list, key_adder, file_downloader,
+                                   source_file=self.source_file)
+
+        # When
+        result = source_adder.add_sources()
+
+        # Then
+        self.assertTrue(result)
+        self.assertEqual('deb http://url2/debian ./\n', read_file(self.source_file))
+
+    def test_add_sources_removes_source_file_when_no_source_is_missing(self):
+        # Given
+        json_loader, sources_list, key_adder, file_downloader = create_components()
+        json_loader.load_list.return_value = []
+        os.makedirs(os.path.dirname(self.source_file))
+        with open(self.source_file, 'w') as file:
+            file.write('deb http://url1 stable main\n')
+        source_adder = SourceAdder('path/to/config.json', json_loader, sources_list, key_adder, file_downloader,
+                                   source_file=self.source_file)
+
+        # When
+        result = source_adder.add_sources()
+
+        # Then
+        self.assertTrue(result)
+        self.assertFalse(os.path.exists(self.source_file))
+
+    def test_add_sources_falls_back_to_key_file_when_key_server_fails(self):
+        # Given
+        json_loader, sources_list, key_adder, file_downloader = create_components()
+        key_adder.fetch_from_key_server.side_effect = Exception('Key server unreachable')
+        source_adder = SourceAdder('path/to/config.json', json_loader, sources_list, key_adder, file_downloader,
+                                   source_file=self.source_file)
+
+        # When
+        source_adder.add_sources()
+
+        # Then
+        file_downloader.download.assert_any_call('http://url1/dists/stable/public1.key', 'source1.pub')
         key_adder.add_from_key_file.assert_any_call('/path/to/public2.key')
-        sources_list.add.assert_any_call('deb', 'http://url3', 'stable', ['main'])
         key_adder.add_from_key_file.assert_any_call('/path/to/public3.key')
 
     def test_add_sources_fails_to_add_key(self):
         # Given
         json_loader, sources_list, key_adder, file_downloader = create_components()
-        key_adder.get_available_key_ids.side_effect = [['1111111111111111'], [], []]
-        source_adder = SourceAdder('path/to/config.json', json_loader, sources_list, key_adder, file_downloader)
+        key_adder.get_available_key_ids.side_effect = [['1111111111111111'], ['1111111111111111']]
+        key_adder.add_from_key_file.side_effect = Exception('Invalid key file')
+        source_adder = SourceAdder('path/to/config.json', json_loader, sources_list, key_adder, file_downloader,
+                                   source_file=self.source_file)
 
         # When
         source_adder.add_sources()
 
         # Then
-        sources_list.add.assert_any_call('deb', 'http://url1', 'stable', ['main'])
-        sources_list.add.assert_any_call('deb', 'http://url2', 'stable', ['main'])
+        self.assertEqual(SOURCE_FILE_CONTENT, read_file(self.source_file))
         key_adder.add_from_key_file.assert_any_call('/path/to/public2.key')
-        sources_list.add.assert_any_call('deb', 'http://url3', 'stable', ['main'])
         key_adder.add_from_key_file.assert_any_call('/path/to/public3.key')
 
 
+SOURCE_FILE_CONTENT = '''deb http://url1 stable main
+deb http://url2 stable main
+deb http://url3 stable main
+'''
+
+
+def read_file(path):
+    with open(path) as file:
+        return file.read()
+
+
 def create_components():
     json_loader = MagicMock(spec=IJsonLoader)
     json_loader.load_list.return_value = [
@@ -76,8 +220,9 @@ def create_components():
         ),
     ]
     sources_list = MagicMock(spec=SourcesList)
+    sources_list.list = []
     key_adder = MagicMock(spec=IKeyAdder)
-    key_adder.get_available_key_ids.side_effect = [[], ['1111111111111111'], ['2222222222222222'], ['3333333333333333']]
+    key_adder.get_available_key_ids.side_effect = [[], ['1111111111111111', '2222222222222222', '3333333333333333']]
     file_downloader = MagicMock(spec=IFileDownloader)
     file_downloader.download.return_value = '/path/to/public2.key'
 
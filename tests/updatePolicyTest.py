@@ -0,0 +1,115 @@
+import os
+import time
+import unittest
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from context_logger import setup_logging
+from package_downloader import PackageConfig
+
+from package_installer import IAptInstaller, UpdatePolicy, AptSources
+
+
+class UpdatePolicyTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        setup_logging('debian-package-installer', 'DEBUG', warn_on_overwrite=False)
+
+    def setUp(self):
+        print()
+        self.temp_dir = TemporaryDirectory()
+        self.sources_list = os.path.join(self.temp_dir.name, 'sources.list')
+        self.state_file = os.path.join(self.temp_dir.name, 'state', 'update-state.json')
+        self.update_stamp = os.path.join(self.temp_dir.name, 'update-success-stamp')
+        with open(self.sources_list, 'w') as file:
+            file.write('deb http://deb.debian.org/debian bookworm main\n')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_update_not_needed_when_all_packages_are_installed(self):
+        # Given
+        apt_installer = MagicMock(spec=IAptInstaller)
+        apt_installer.is_installed.return_value = True
+        update_policy = self.create_update_policy(apt_installer)
+
+        # When
+        result = update_policy.is_update_needed([PackageConfig(package='package1')])
+
+        # Then
+        self.assertFalse(result)
+
+    def test_update_needed_when_no_previous_update_recorded(self):
+        # Given
+        update_policy = self.create_update_policy(create_apt_installer(), max_age=60)
+
+        # When
+        result = update_policy.is_update_needed([PackageConfig(package='package1')])
+
+        # Then
+        self.assertTrue(result)
+
+    def test_update_not_needed_when_package_lists_are_fresh(self):
+        # Given
+        update_policy = self.create_update_policy(create_apt_installer(), max_age=60)
+        update_policy.update_done()
+
+        # When
+        result = update_policy.is_update_needed([PackageConfig(package='package1')])
+
+        # Then
+        self.assertFalse(result)
+
+    def test_update_needed_when_package_lists_are_outdated(self):
+        # Given
+        update_policy = self.create_update_policy(create_apt_installer(), max_age=0)
+        update_policy.update_done()
+
+        # When
+        result = update_policy.is_update_needed([PackageConfig(package='package1')])
+
+        # Then
+        self.assertTrue(result)
+
+    def test_update_not_needed_when_system_update_stamp_is_fresh(self):
+        # Given
+        update_policy = self.create_update_policy(create_apt_installer(), max_age=60)
+        update_policy.update_done()
+        with open(self.state_file, 'w') as file:
+            file.write(f'{{"sources_hash": "{AptSources((self.sources_list,)).get_hash()}", "updated_at": 0}}')
+        with open(self.update_stamp, 'w'):
+            os.utime(self.update_stamp, (time.time(), time.time()))
+
+        # When
+        result = update_policy.is_update_needed([PackageConfig(package='package1')])
+
+        # Then
+        self.assertFalse(result)
+
+    def test_update_needed_when_sources_changed(self):
+        # Given
+        update_policy = self.create_update_policy(create_apt_installer(), max_age=60)
+        update_policy.update_done()
+        with open(self.sources_list, 'a') as file:
+            file.write('deb http://aptrepo.effective-range.com stable main\n')
+
+        # When
+        result = update_policy.is_update_needed([PackageConfig(package='package1')])
+
+        # Then
+        self.assertTrue(result)
+
+    def create_update_policy(self, apt_installer, max_age=0):
+        return UpdatePolicy(apt_installer, max_age, self.state_file, (self.sources_list,), self.update_stamp)
+
+
+def create_apt_installer():
+    apt_installer = MagicMock(spec=IAptInstaller)
+    apt_installer.is_installed.return_value = False
+    return apt_installer
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+from unittest import TestCase
+
+from context_logger import setup_logging
+
+from package_installer import VersionConstraint
+
+VERSIONS = ['1.0.0', '1.2.0', '1.2.5', '1.10.0', '2.0.0', '2.0.0-1']
+
+
+class VersionConstraintTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        setup_logging('debian-package-installer', 'DEBUG', warn_on_overwrite=False)
+
+    def setUp(self):
+        print()
+
+    def test_plain_version_is_exact(self):
+        # Given
+        constraint = VersionConstraint('1.2.0')
+
+        # When
+        result = constraint.get_exact_version()
+
+        # Then
+        self.assertEqual('1.2.0', result)
+        self.assertEqual(['1.2.0'], [version for version in VERSIONS if constraint.matches(version)])
+
+    def test_operators_are_compared_as_debian_versions(self):
+        # Given
+        constraints = ['>= 1.2.5', '<= 1.2.0', '>> 1.10.0', '<< 1.2.0', '= 2.0.0-1']
+
+        # When
+        result = [[version for version in VERSIONS if VersionConstraint(constraint).matches(version)]
+                  for constraint in constraints]
+
+        # Then
+        self.assertEqual([
+            ['1.2.5', '1.10.0', '2.0.0', '2.0.0-1'],
+            ['1.0.0', '1.2.0'],
+            ['2.0.0', '2.0.0-1'],
+            ['1.0.0'],
+            ['2.0.0-1'],
+        ], result)
+
+    def test_range_matches_all_clauses(self):
+        # Given
+        constraint = VersionConstraint('>=1.2.0, <<2.0.0')
+
+        # When
+        result = constraint.select(VERSIONS)
+
+        # Then
+        self.assertIsNone(constraint.get_exact_version())
+        self.assertEqual('1.10.0', result)
+
+    def test_wildcard_matches_version_prefix(self):
+        # Given
+        constraint = VersionConstraint('1.2.*')
+
+        # When
+        result = constraint.select(VERSIONS)
+
+        # Then
+        self.assertIsNone(constraint.get_exact_version())
+        self.assertEqual('1.2.5', result)
+
+    def test_select_returns_none_when_no_version_matches(self):
+        # Given
+        constraint = VersionConstraint('>> 3.0')
+
+        # When
+        result = constraint.select(VERSIONS)
+
+        # Then
+        self.assertIsNone(result)
+
+    def test_invalid_constraint_raises_error(self):
+        # Given
+        specs = ['', '> 1.0', '>= 1.*', '1.0 1.1', '>=, << 2.0']
+
+        # When, Then
+        for spec in specs:
+            with self.assertRaises(ValueError):
+                VersionConstraint(spec)
+
+
+if __name__ == '__main__':
+    unittest.main()